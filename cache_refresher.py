@@ -0,0 +1,196 @@
+"""
+Background re-validation of cached username -> user ID mappings
+Usernames get renamed and reused, so cached entries are re-fetched slowly, oldest first
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from lookup_engine import PRIORITY_BACKGROUND, LookupEngine
+
+logger = logging.getLogger(__name__)
+
+
+class CacheRefresher:
+    """
+    Re-validates the entries of a lookup engine's ID cache in the background
+
+    Entries are refreshed least recently checked first, through the
+    engine's background lane, so they only use workers that have nothing
+    else to do. Refreshes are spread evenly: with N cached entries one is
+    refreshed every `max_age / N` seconds, so each entry is checked about
+    once per `max_age` instead of all of them at once when a TTL expires.
+    Nothing is refreshed while the account pool is short on capacity.
+
+    A refreshed username that now belongs to another user ID is recorded by
+    the cache (see IDCache.owner_changes and IDCache.history). A username
+    whose profile returned 404 on `max_not_found` refreshes in a row (deleted
+    or renamed away) is removed from the cache. A refresh that failed
+    otherwise (an error, a 429, a network failure) leaves the entry as it is
+    until the next round.
+    """
+
+    def __init__(self, engine: LookupEngine, max_age: float = 7 * 86400, min_age: Optional[float] = None,
+                 daily_budget: Optional[int] = None, reserve_fraction: float = 0.2, poll_interval: float = 5,
+                 max_not_found: int = 3):
+        """
+        Args:
+            engine: Running lookup engine whose cache is refreshed
+            max_age: Target maximum age of an entry in seconds
+            min_age: Entries checked more recently than this are left alone (default: max_age / 2)
+            daily_budget: Maximum refresh lookups per day
+            reserve_fraction: Share of today's per-account request allowance kept for
+                foreground lookups (only used with a daily request cap)
+            poll_interval: Seconds between checks while the pool is busy
+            max_not_found: Remove an entry after this many refreshes in a row got a 404
+        """
+        self.engine = engine
+        self.cache = engine.cache
+        self.max_age = max_age
+        self.min_age = max_age / 2 if min_age is None else min_age
+        self.daily_budget = daily_budget
+        self.reserve_fraction = reserve_fraction
+        self.poll_interval = poll_interval
+        self.max_not_found = max_not_found
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._day = None
+        self._refreshed_today = 0
+
+        self.stats = {
+            "refreshed": 0,
+            "unchanged": 0,
+            "changed_owner": 0,
+            "failed": 0,
+            "not_found": 0,
+            "invalidated": 0,
+            "deferred_busy": 0,
+        }
+
+    def start(self):
+        """Start the refresher thread"""
+        self._thread = threading.Thread(target=self._run, name="cache-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the refresher thread"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def interval(self) -> float:
+        """Seconds between two refreshes at the current cache size"""
+        interval = self.max_age / max(len(self.cache), 1)
+        if self.daily_budget:
+            interval = max(interval, 86400 / self.daily_budget)
+        return interval
+
+    def has_spare_capacity(self) -> bool:
+        """True when no lookups are waiting and the accounts have allowance left beyond the reserve"""
+        if self.engine.queue_depth() > 0:
+            return False
+
+        scraper = self.engine.scraper
+        now = datetime.now()
+        today = now.date().isoformat()
+        ready = [acc for acc in scraper.accounts
+                 if acc.is_active and (acc.cooldown_until is None or acc.cooldown_until <= now)]
+        if not ready:
+            return False
+
+        cap = scraper.max_requests_per_account_per_day
+        if cap:
+            headroom = sum(max(0, cap - acc.daily_requests.get(today, 0)) for acc in ready)
+            return headroom > self.reserve_fraction * cap * len(ready)
+        return True
+
+    def refresh_next(self) -> bool:
+        """
+        Queue a refresh of the least recently checked entry if it is due
+
+        Returns:
+            True if a refresh was queued
+        """
+        today = datetime.now().date()
+        if today != self._day:
+            self._day = today
+            self._refreshed_today = 0
+        if self.daily_budget and self._refreshed_today >= self.daily_budget:
+            return False
+
+        # Entries being refreshed keep their place until their result is in
+        with self._lock:
+            in_flight = set(self._in_flight)
+        entries = [entry for entry in self.cache.oldest(len(in_flight) + 1) if entry[0] not in in_flight]
+        if not entries:
+            return False
+        username, old_user_id, checked_at = entries[0]
+        if time.time() - checked_at < self.min_age:
+            return False
+
+        if not self.has_spare_capacity():
+            with self._lock:
+                self.stats["deferred_busy"] += 1
+            return False
+
+        self._refreshed_today += 1
+        with self._lock:
+            self._in_flight.add(username)
+        submitted_at = time.time()
+        future = self.engine.submit(username, PRIORITY_BACKGROUND, refresh=True)
+        future.add_done_callback(lambda f: self._on_done(f, username, old_user_id, submitted_at))
+        return True
+
+    def _on_done(self, future, username: str, old_user_id: str, submitted_at: float):
+        try:
+            if future.cancelled():
+                return
+            self._count("refreshed")
+            user_id = None if future.exception() is not None else future.result()
+            # None also means a 429, a network error or exhausted retries; only a 404 says the user is gone
+            if not user_id and (future.exception() is not None
+                                or not self.engine.scraper.confirmed_not_found(username, submitted_at)):
+                # Not reachable right now; move it to the back and try again next round
+                self.cache.mark_checked(username)
+                self._count("failed")
+                return
+            if not user_id:
+                self._count("not_found")
+                if self.cache.record_not_found(username) >= self.max_not_found:
+                    logger.info(f"@{username} was not found {self.max_not_found} times in a row, "
+                                f"removing it from the cache")
+                    self.cache.invalidate(username)
+                    self._count("invalidated")
+            elif user_id != old_user_id:
+                self._count("changed_owner")
+            else:
+                self._count("unchanged")
+        finally:
+            with self._lock:
+                self._in_flight.discard(username)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> Dict:
+        """Refresher statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+        return {**stats, "in_flight": len(self._in_flight), "interval": round(self.interval(), 3),
+                "refreshed_today": self._refreshed_today}
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                queued = self.refresh_next()
+            except Exception as e:
+                logger.error(f"Cache refresh failed: {e}")
+                queued = False
+            self._stopping.wait(self.interval() if queued else self.poll_interval)
@@ -0,0 +1,262 @@
+"""
+Capacity planning and live progress for large jobs
+Estimates how long a batch takes with the current account/proxy pool and reports ETA while it runs
+"""
+
+import collections
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from instagram_scraper import InstagramIDScraper
+
+# Assumptions used until the scraper has observed enough requests
+DEFAULT_LATENCY = 1.5
+DEFAULT_SUCCESS_RATE = 0.9
+MIN_OBSERVED_REQUESTS = 20
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown"
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+def observed_performance(scraper: InstagramIDScraper) -> Tuple[float, float, bool]:
+    """
+    Mean request latency and success rate seen by a scraper so far
+
+    Returns:
+        (latency seconds, success rate, whether the values were observed rather than assumed)
+    """
+    with scraper._lock:
+        latencies = list(scraper._latencies)
+        total = scraper.stats["total_requests"]
+        successful = scraper.stats["successful_requests"]
+
+    observed = total >= MIN_OBSERVED_REQUESTS
+    latency = sum(latencies) / len(latencies) if latencies else DEFAULT_LATENCY
+    success_rate = successful / total if observed else DEFAULT_SUCCESS_RATE
+    return latency, max(success_rate, 0.01), observed
+
+
+def plan_job(scraper: InstagramIDScraper, total: int, processes: int = 1, retries: int = 3,
+             finish_within: Optional[float] = None, account_hourly_limit: Optional[int] = None,
+             proxy_hourly_limit: Optional[int] = None, delay: Optional[float] = None) -> Dict:
+    """
+    Estimate throughput and duration of a username batch
+
+    Each worker resolves usernames one after another, so one worker needs
+    about `attempts * (latency + mean delay)` seconds per username, where
+    attempts is the expected number of tries at the observed success rate.
+    With a fixed `delay` between usernames, retries still wait the random
+    min_delay-max_delay delay, so only the first wait per username changes.
+    Workers run in parallel up to the number of active accounts. The result
+    is then capped by the optional per-account/per-proxy hourly limits and by
+    the remaining daily request allowance of the accounts.
+
+    Args:
+        scraper: Scraper whose accounts, proxies, pacing and observed stats are used
+        total: Number of usernames in the batch
+        processes: Worker processes that will run the batch
+        retries: Attempts per username (as passed to get_user_id)
+        finish_within: Seconds the batch must finish in; adds a warning if it can't
+        account_hourly_limit: Maximum requests per account per hour to plan with
+        proxy_hourly_limit: Maximum requests per proxy per hour to plan with
+        delay: Fixed delay between usernames in seconds (as passed to get_user_ids; default: random)
+
+    Returns:
+        Dictionary with the inputs, 'usernames_per_hour', 'eta_seconds',
+        'limited_by' and a list of 'warnings'
+    """
+    today = date.today().isoformat()
+    accounts = [acc for acc in scraper.accounts if acc.is_active]
+    proxies = [p for p in scraper.proxies if p.is_active]
+    latency, success_rate, observed = observed_performance(scraper)
+    mean_delay = (scraper.min_delay + scraper.max_delay) / 2
+
+    failure_rate = 1 - success_rate
+    attempts = sum(failure_rate ** k for k in range(retries))
+    workers = max(1, min(processes, len(accounts))) if accounts else 0
+
+    warnings: List[str] = []
+    seconds_per_username = attempts * latency + (attempts - 1) * mean_delay + (mean_delay if delay is None else delay)
+    limits = {"pacing": workers * 3600 / seconds_per_username if workers and seconds_per_username else 0.0}
+    if account_hourly_limit:
+        limits["account_hourly_limit"] = len(accounts) * account_hourly_limit / attempts
+    if proxy_hourly_limit and scraper.proxies:
+        limits["proxy_hourly_limit"] = len(proxies) * proxy_hourly_limit / attempts
+
+    limited_by = min(limits, key=limits.get)
+    per_hour = limits[limited_by]
+
+    eta = total / per_hour * 3600 if per_hour else None
+    daily_left = None
+    if scraper.max_requests_per_account_per_day:
+        cap = scraper.max_requests_per_account_per_day
+        daily_left = sum(max(0, cap - acc.daily_requests.get(today, 0)) for acc in accounts)
+        if per_hour and total * attempts > daily_left:
+            # The rest waits for the allowance of the following day(s)
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            days = int((total * attempts - daily_left) / (len(accounts) * cap))
+            capped_eta = (midnight - now).total_seconds() + 86400 * days
+            if capped_eta > eta:
+                eta = capped_eta
+                per_hour = total / eta * 3600
+                limited_by = "daily_cap"
+            warnings.append(f"Needs about {int(total * attempts)} requests but only {daily_left} are left "
+                            f"today under the daily cap of {cap} per account")
+
+    if not accounts:
+        warnings.append("No active accounts")
+    if scraper.proxies and not proxies:
+        warnings.append("Proxies are configured but none is active")
+    if not observed:
+        warnings.append(f"Based on assumed latency ({DEFAULT_LATENCY}s) and success rate "
+                        f"({DEFAULT_SUCCESS_RATE:.0%}); estimates improve once requests have been made")
+    if processes > len(accounts) and accounts:
+        warnings.append(f"Only {len(accounts)} active account(s), so at most {len(accounts)} of "
+                        f"{processes} processes can run")
+
+    if finish_within is not None and (eta is None or eta > finish_within):
+        warnings.append(f"Pool is too small to finish within {_format_duration(finish_within)} "
+                        f"(estimated {_format_duration(eta)})")
+        if per_hour and eta and limited_by == "pacing":
+            # Each worker process needs an account of its own
+            needed = int(workers * eta / finish_within) + 1
+            if needed > len(accounts):
+                warnings.append(f"About {needed} active accounts and worker processes would be needed "
+                                f"(have {len(accounts)} accounts)")
+            else:
+                warnings.append(f"About {needed} worker processes would be needed (planned {workers})")
+        elif per_hour and eta:
+            needed = int(len(accounts) * eta / finish_within) + 1
+            warnings.append(f"About {needed} active accounts would be needed (have {len(accounts)})")
+
+    return {
+        "usernames": total,
+        "active_accounts": len(accounts),
+        "active_proxies": len(proxies),
+        "workers": workers,
+        "latency": round(latency, 3),
+        "success_rate": round(success_rate, 3),
+        "observed": observed,
+        "attempts_per_username": round(attempts, 2),
+        "requests_left_today": daily_left,
+        "usernames_per_hour": round(per_hour, 1),
+        "limited_by": limited_by,
+        "eta_seconds": round(eta) if eta is not None else None,
+        "warnings": warnings,
+    }
+
+
+def format_plan(plan: Dict) -> str:
+    """Render a capacity plan as plain text"""
+    lines = [
+        f"Usernames:          {plan['usernames']}",
+        f"Active accounts:    {plan['active_accounts']} (proxies: {plan['active_proxies']}, workers: {plan['workers']})",
+        f"Latency / success:  {plan['latency']:.2f}s / {plan['success_rate']:.0%}"
+        + ("" if plan["observed"] else " (assumed)"),
+        f"Throughput:         {plan['usernames_per_hour']:.0f} usernames/hour (limited by {plan['limited_by']})",
+        f"Estimated duration: {_format_duration(plan['eta_seconds'])}",
+    ]
+    if plan["requests_left_today"] is not None:
+        lines.insert(2, f"Requests left today: {plan['requests_left_today']}")
+    for warning in plan["warnings"]:
+        lines.append(f"Warning: {warning}")
+    return "\n".join(lines)
+
+
+class ProgressReporter:
+    """
+    Periodic progress lines with a rolling rate and ETA
+
+    Can be passed directly as the `on_result` callback of get_user_ids,
+    ShardedRunner.run or ExtractionPipeline.run; follower crawls report
+    pages through `advance`.
+    """
+
+    def __init__(self, total: Optional[int], label: str = "usernames", interval: float = 30,
+                 window: float = 300, finish_within: Optional[float] = None,
+                 write: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            total: Expected number of items (None if unknown; no ETA is shown)
+            label: What is being counted, used in the progress line
+            interval: Minimum seconds between progress lines
+            window: Seconds of recent progress the rolling rate is computed over
+            finish_within: Seconds the job should finish in; the line warns when the ETA exceeds it
+            write: Output function (default: print to stderr)
+        """
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.window = window
+        self.write = write or (lambda line: print(line, file=sys.stderr))
+        self.started_at = time.time()
+        self.finish_by = self.started_at + finish_within if finish_within else None
+        self.done = 0
+        self.successful = 0
+        self._samples: Deque[Tuple[float, int]] = collections.deque([(self.started_at, 0)])
+        self._last_report = self.started_at
+
+    def __call__(self, username: str, user_id: Optional[str]):
+        self.advance(1, successful=1 if user_id else 0)
+
+    def advance(self, count: int = 1, successful: Optional[int] = None):
+        """Record `count` finished items (all successful unless given) and report if the interval elapsed"""
+        now = time.time()
+        self.done += count
+        self.successful += count if successful is None else successful
+        self._samples.append((now, self.done))
+        while len(self._samples) > 2 and self._samples[1][0] < now - self.window:
+            self._samples.popleft()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.write(self.format_line(now))
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Items per second over the rolling window"""
+        now = now or time.time()
+        start_time, start_done = self._samples[0]
+        elapsed = now - start_time
+        return (self.done - start_done) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now: Optional[float] = None) -> Optional[float]:
+        """Estimated seconds until all items are done (None if unknown)"""
+        rate = self.rate(now)
+        if self.total is None or not rate:
+            return None
+        return max(0, self.total - self.done) / rate
+
+    def format_line(self, now: Optional[float] = None) -> str:
+        now = now or time.time()
+        done = f"{self.done}/{self.total} ({self.done / self.total:.1%})" if self.total else str(self.done)
+        line = (f"Progress: {done} {self.label} | {self.rate(now) * 60:.1f}/min | "
+                f"{self.successful / self.done if self.done else 0:.0%} ok | "
+                f"elapsed {_format_duration(now - self.started_at)}")
+        eta = self.eta(now)
+        if self.total:
+            line += f" | ETA {_format_duration(eta)}"
+        if self.finish_by and eta is not None and now + eta > self.finish_by:
+            line += " | behind schedule"
+        return line
+
+    def finish(self):
+        """Write a final line with the overall rate"""
+        elapsed = time.time() - self.started_at
+        rate = self.done / elapsed * 60 if elapsed > 0 else 0.0
+        self.write(f"Done: {self.done} {self.label} in {_format_duration(elapsed)} ({rate:.1f}/min, "
+                   f"{self.successful} successful)")
@@ -1,8 +1,12 @@
 """Quick script to check if an Instagram account exists and is accessible"""
 from instagram_scraper import InstagramIDScraper
 from config_loader import load_accounts_from_json
+from session_preflight import run_preflight, format_readiness_table
+from logging_setup import configure_logging
 import requests
 
+configure_logging()
+
 username = "fincacieloazul"
 
 # Load accounts
@@ -13,12 +17,13 @@ session = scraper._create_session(account)
 
 # Test 1: Check if account exists
 print(f"Checking @{username}...")
-print("\n1. Testing session validity...")
-test_id = scraper.get_user_id("instagram")
-if test_id:
-    print(f"   ✓ Session is valid (tested with @instagram: {test_id})")
+print("\n1. Testing session validity of all accounts...")
+print(format_readiness_table(run_preflight(scraper)))
+if not any(acc.is_active for acc in accounts):
+    print("   ✗ All sessions may be expired - cookies need refreshing")
 else:
-    print("   ✗ Session may be expired - cookies need refreshing")
+    account = scraper._get_next_account()
+    session = scraper._create_session(account)
 
 # Test 2: Try accessing the account
 print(f"\n2. Attempting to access @{username}...")
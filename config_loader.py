@@ -4,12 +4,99 @@ Supports loading from JSON files or environment variables
 """
 
 import json
+import logging
+import marshal
 import os
-from typing import List, Dict
+import shutil
+import tempfile
+from typing import Callable, List, Dict, Optional
 from instagram_scraper import InstagramAccount, Proxy
 
+logger = logging.getLogger(__name__)
 
-def load_accounts_from_json(file_path: str) -> List[InstagramAccount]:
+# Bump when the cached record layout changes, so old caches are ignored
+CONFIG_CACHE_VERSION = 3
+
+
+def config_cache_path(file_path: str) -> str:
+    """Cache of a parsed config file (accounts.json -> .accounts.json.cache in the same directory)"""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, f".{name}.cache")
+
+
+def _load_records(file_path: str, parse: Callable[[Dict], List[Dict]], use_cache: bool) -> List[Dict]:
+    """
+    Parsed records of a JSON config file, from its cache while the file is unchanged
+    
+    The cache holds the validated records in marshal format, which loads
+    several times faster than JSON. It is keyed on the file's modification
+    time, size and inode, so any edit (by hand, merge_accounts.py or cookie
+    write-back, which replaces the file) invalidates it. A missing, stale or
+    unreadable cache is rebuilt. If the cache can't be written (read-only
+    directory), the file is simply parsed every time.
+    
+    The cache holds the accounts' cookies, so it is created readable by its
+    owner only.
+    """
+    stat = os.stat(file_path)
+    key = [CONFIG_CACHE_VERSION, stat.st_mtime_ns, stat.st_size, stat.st_ino]
+    cache_path = config_cache_path(file_path)
+    if use_cache:
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = marshal.loads(f.read())
+            if cached["key"] == key:
+                return cached["records"]
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            pass
+    
+    with open(file_path, 'r') as f:
+        records = parse(json.load(f))
+    
+    if use_cache:
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(cache_path) + '.',
+                                            dir=os.path.dirname(cache_path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    marshal.dump({"key": key, "records": records}, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+    return records
+
+
+def _session_id(acc_data: Dict) -> str:
+    """Session ID of an accounts file entry: `session_id`, or the `sessionid` cookie if it has none"""
+    return acc_data.get('session_id') or acc_data.get('cookies', {}).get('sessionid', '')
+
+
+def _account_records(data: Dict) -> List[Dict]:
+    records = []
+    for acc_data in data.get('accounts', []):
+        records.append({
+            'name': acc_data['name'],
+            'cookies': acc_data.get('cookies', {}),
+            'session_id': _session_id(acc_data),
+            'user_agent': acc_data.get('user_agent'),
+        })
+    return records
+
+
+def _proxy_records(data: Dict) -> List[Dict]:
+    return [{
+        'host': proxy_data['host'],
+        'port': proxy_data['port'],
+        'username': proxy_data.get('username'),
+        'password': proxy_data.get('password'),
+        'protocol': proxy_data.get('protocol', 'http'),
+    } for proxy_data in data.get('proxies', [])]
+
+
+def load_accounts_from_json(file_path: str, use_cache: bool = False) -> List[InstagramAccount]:
     """
     Load Instagram accounts from a JSON file
     
@@ -29,24 +116,14 @@ def load_accounts_from_json(file_path: str) -> List[InstagramAccount]:
             ...
         ]
     }
-    """
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    accounts = []
-    for acc_data in data.get('accounts', []):
-        account = InstagramAccount(
-            name=acc_data['name'],
-            cookies=acc_data.get('cookies', {}),
-            session_id=acc_data.get('session_id', acc_data.get('cookies', {}).get('sessionid', '')),
-            user_agent=acc_data.get('user_agent')
-        )
-        accounts.append(account)
     
-    return accounts
+    With use_cache=True, the parsed accounts are cached next to the file
+    (see config_cache_path) until the file changes.
+    """
+    return [InstagramAccount(**record) for record in _load_records(file_path, _account_records, use_cache)]
 
 
-def load_proxies_from_json(file_path: str) -> List[Proxy]:
+def load_proxies_from_json(file_path: str, use_cache: bool = False) -> List[Proxy]:
     """
     Load proxies from a JSON file
     
@@ -63,22 +140,10 @@ def load_proxies_from_json(file_path: str) -> List[Proxy]:
             ...
         ]
     }
-    """
-    with open(file_path, 'r') as f:
-        data = json.load(f)
     
-    proxies = []
-    for proxy_data in data.get('proxies', []):
-        proxy = Proxy(
-            host=proxy_data['host'],
-            port=proxy_data['port'],
-            username=proxy_data.get('username'),
-            password=proxy_data.get('password'),
-            protocol=proxy_data.get('protocol', 'http')
-        )
-        proxies.append(proxy)
-    
-    return proxies
+    With use_cache=True, cached like load_accounts_from_json.
+    """
+    return [Proxy(**record) for record in _load_records(file_path, _proxy_records, use_cache)]
 
 
 def load_accounts_from_env() -> List[InstagramAccount]:
@@ -132,6 +197,84 @@ def load_proxies_from_env() -> List[Proxy]:
     return proxies
 
 
+def load_runtime_state(accounts: List[InstagramAccount], proxies: Optional[List[Proxy]] = None,
+                       accounts_file: str = 'accounts.json', state_file: Optional[str] = None):
+    """
+    Restore saved usage counters, cooldowns and daily totals onto accounts and proxies
+    
+    The state lives next to the accounts file (accounts.json -> accounts.state.json)
+    unless state_file is given. Assign the returned store to `scraper.state_store`
+    so it is kept up to date while the scraper runs.
+    
+    Returns:
+        RuntimeStateStore for the state file
+    """
+    from state_store import RuntimeStateStore, default_state_path
+    
+    store = RuntimeStateStore(state_file or default_state_path(accounts_file))
+    store.apply(accounts, proxies)
+    return store
+
 
+def save_account_cookies_to_json(accounts: List[InstagramAccount], file_path: str,
+                                 file_session_ids: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Write the current cookies of accounts back into an accounts JSON file
+    
+    Only the `cookies` and `session_id` of entries whose `name` matches one of
+    the accounts are updated; every other field and entry is kept as is, so
+    the file stays readable by load_accounts_from_json and merge_accounts.py.
+    The file is replaced atomically, so a crash never leaves it half-written,
+    and only if an entry was updated.
+    
+    Args:
+        accounts: Accounts whose cookies are written
+        file_path: Accounts JSON file
+        file_session_ids: Session ID each account had in the file when it was
+            loaded (or last written). An entry whose session ID in the file is
+            different was edited since (e.g. fresh cookies pasted in), so it
+            is left alone instead of being reverted.
+    
+    Returns:
+        Account name -> session ID now in the file, for the next call
+    """
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    
+    by_name = {account.name: account for account in accounts}
+    written = {}
+    updated = False
+    for acc_data in data.get('accounts', []):
+        name = acc_data.get('name')
+        account = by_name.get(name)
+        if account is not None:
+            expected = (file_session_ids or {}).get(name)
+            if expected is not None and _session_id(acc_data) != expected:
+                logger.warning("Not saving cookies of %s: they were changed in %s", name, file_path)
+            else:
+                acc_data['cookies'] = dict(account.cookies)
+                acc_data['session_id'] = account.session_id
+                updated = True
+        written[name] = _session_id(acc_data)
+    
+    if updated:
+        atomic_write_json(data, file_path)
+    return written
 
 
+def atomic_write_json(data: Dict, file_path: str):
+    """Write JSON to a temporary file next to file_path and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,111 @@
+"""
+Hot reload of the accounts and proxies files
+Polls the files and applies edits to a running scraper without restarting it
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from config_loader import load_accounts_from_json, load_proxies_from_json
+
+logger = logging.getLogger(__name__)
+
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class ConfigWatcher:
+    """
+    Watches the accounts and proxies JSON files and applies changes to a scraper
+
+    Files are checked every `interval` seconds by modification time, size and
+    inode, so edits in place and atomic replacements (merge_accounts.py,
+    cookie write-back) are both noticed. A changed file is parsed completely
+    before anything is applied. A file that is missing, half-written or
+    invalid is skipped and read again at the next change, and the running
+    configuration stays as it is. A missing proxies file is not read as
+    "remove all proxies".
+    """
+
+    def __init__(self, scraper, accounts_file: Optional[str] = None, proxies_file: Optional[str] = None,
+                 interval: float = 5):
+        """
+        Args:
+            scraper: InstagramIDScraper to apply the changes to (see InstagramIDScraper.apply_config)
+            accounts_file: Accounts JSON file to watch
+            proxies_file: Proxies JSON file to watch
+            interval: Seconds between checks
+        """
+        self.scraper = scraper
+        self.accounts_file = accounts_file
+        self.proxies_file = proxies_file
+        self.interval = interval
+        self.errors = 0
+        self._signatures = {path: _signature(path) for path in (accounts_file, proxies_file) if path}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Config watcher error: {e}")
+
+    def _changed(self, path: Optional[str]) -> bool:
+        if not path:
+            return False
+        signature = _signature(path)
+        if signature is None or signature == self._signatures.get(path):
+            return False
+        self._signatures[path] = signature
+        return True
+
+    def check(self) -> Optional[Dict[str, int]]:
+        """
+        Reload the files that changed since the last check and apply them
+
+        Returns:
+            The changes applied (see apply_config), or None if nothing was reloaded
+        """
+        accounts = proxies = None
+        if self._changed(self.accounts_file):
+            try:
+                accounts = load_accounts_from_json(self.accounts_file)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.errors += 1
+                logger.warning(f"Not reloading {self.accounts_file}: {e}")
+            else:
+                if not accounts:
+                    # Keep working rather than drain every account because of an emptied file
+                    logger.warning(f"Not reloading {self.accounts_file}: it has no accounts")
+                    accounts = None
+        if self._changed(self.proxies_file):
+            try:
+                proxies = load_proxies_from_json(self.proxies_file)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.errors += 1
+                logger.warning(f"Not reloading {self.proxies_file}: {e}")
+        if accounts is None and proxies is None:
+            return None
+        return self.scraper.apply_config(accounts=accounts, proxies=proxies)
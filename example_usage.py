@@ -4,6 +4,7 @@ Example usage of the Instagram ID Scraper
 
 from instagram_scraper import InstagramIDScraper, InstagramAccount, Proxy
 from config_loader import load_accounts_from_json, load_proxies_from_json
+from job_journal import JobJournal
 import json
 
 
@@ -99,23 +100,20 @@ def example_batch_processing():
     with open("usernames.txt", "r") as f:
         usernames = [line.strip() for line in f if line.strip()]
     
-    # Process in batches
-    batch_size = 10
-    all_results = {}
-    
-    for i in range(0, len(usernames), batch_size):
-        batch = usernames[i:i + batch_size]
-        print(f"\nProcessing batch {i // batch_size + 1} ({len(batch)} usernames)...")
-        
-        batch_results = scraper.get_user_ids(batch)
-        all_results.update(batch_results)
+    # Each result is appended to a journal as soon as it is resolved. If the
+    # run is interrupted, running it again skips the usernames already resolved.
+    with JobJournal("results.journal") as journal:
+        def report(username, user_id):
+            done = len(journal.results)
+            if done % 10 == 0:
+                print(f"Progress: {done}/{len(usernames)} completed")
         
-        # Save progress after each batch
-        with open("results.json", "w") as f:
-            json.dump(all_results, f, indent=2)
+        scraper.get_user_ids(usernames, journal=journal, on_result=report)
         
-        print(f"Progress: {len(all_results)}/{len(usernames)} completed")
-        print(f"Stats: {scraper.get_stats()}")
+        # Write the final output once, from the journal
+        journal.write_output("results.json", usernames)
+    
+    print(f"Stats: {scraper.get_stats()}")
 
 
 if __name__ == "__main__":
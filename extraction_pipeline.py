@@ -0,0 +1,306 @@
+"""
+Two-stage lookup pipeline: network downloads and CPU extraction run separately
+Raw profile pages are parsed in a process pool while the next pages download
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from instagram_scraper import InstagramIDScraper, InstagramAccount, Proxy, extract_user_id_from_body
+from logging_setup import SAMPLED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RawPage:
+    """A downloaded profile page waiting for extraction"""
+    index: int
+    username: str
+    attempt: int
+    body: bytes
+    content_encoding: str
+    account: InstagramAccount
+    proxy: Optional[Proxy]
+
+
+def _extract_batch(items: List[Tuple[bytes, str, str]]) -> List[Optional[str]]:
+    """Runs in a worker process: extract user IDs from a batch of (body, content_encoding, username)"""
+    return [extract_user_id_from_body(body, encoding, username) for body, encoding, username in items]
+
+
+class ExtractionPipeline:
+    """
+    Resolves usernames with separate download and extraction stages
+
+    The download stage only fetches profile pages and keeps their raw bodies.
+    A pool of extraction processes decompresses and parses them in batches.
+    Both stages are connected by a bounded queue, so downloads pause when
+    extraction falls behind, and at most `max_inflight_batches` batches are
+    being parsed at once. Results are reported in input order.
+
+    Pages are kept exactly as they were sent, so decompression happens in the
+    extraction processes too. An unexpected error while handling one username
+    fails that username only. If a stage thread dies or `on_result` raises,
+    the run stops and run() raises the error.
+    """
+
+    def __init__(self, scraper: InstagramIDScraper, extract_workers: Optional[int] = None,
+                 queue_size: int = 64, batch_size: int = 8, max_inflight_batches: Optional[int] = None,
+                 retries: int = 3):
+        """
+        Args:
+            scraper: Scraper providing accounts, proxies, sessions and rate-limit settings
+            extract_workers: Extraction processes (default: CPU count)
+            queue_size: Maximum raw pages waiting for extraction
+            batch_size: Pages sent to an extraction process at once
+            max_inflight_batches: Batches being extracted concurrently (default: 2 per worker)
+            retries: Attempts per username with different accounts/proxies
+        """
+        self.scraper = scraper
+        self.extract_workers = extract_workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_inflight_batches = max_inflight_batches
+        self.retries = retries
+        # Serializes scraper bookkeeping between the download thread and extraction callbacks
+        self._lock = threading.Lock()
+
+    def run(self, usernames: List[str],
+            on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Resolve usernames through the pipeline
+
+        Args:
+            usernames: Instagram usernames
+            on_result: Optional callback called with (username, user_id), in input order
+
+        Returns:
+            Dictionary mapping usernames to their IDs (or None if failed)
+        """
+        usernames = [u.lstrip('@').strip() for u in usernames]
+        if not usernames:
+            return {}
+
+        self._raw_pages: "queue.Queue[Optional[RawPage]]" = queue.Queue(maxsize=self.queue_size)
+        self._retry_queue: "queue.Queue[Tuple[int, str, int]]" = queue.Queue()
+        self._results: Dict[int, Optional[str]] = {}
+        self._finished = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._next_emit = 0
+        self._usernames = usernames
+        self._on_result = on_result
+
+        workers = self.extract_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+        inflight = threading.Semaphore(self.max_inflight_batches or workers * 2)
+
+        downloader = threading.Thread(target=self._run_stage, args=(self._download_stage,),
+                                      name="pipeline-download", daemon=True)
+        dispatcher = threading.Thread(target=self._run_stage, args=(self._dispatch_stage, executor, inflight),
+                                      name="pipeline-dispatch", daemon=True)
+        downloader.start()
+        dispatcher.start()
+        try:
+            while not self._finished.wait(timeout=1):
+                pass
+        finally:
+            self._finished.set()
+            self._raw_pages.put(None)
+            downloader.join(timeout=5)
+            dispatcher.join(timeout=5)
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if self._error is not None:
+            raise self._error
+        return {username: self._results.get(i) for i, username in enumerate(usernames)}
+
+    def _fail(self, error: BaseException):
+        """Stop the run because of an unexpected error; run() raises it"""
+        if self._error is None:
+            self._error = error
+        self._finished.set()
+
+    def _run_stage(self, stage: Callable, *args):
+        try:
+            stage(*args)
+        except Exception as e:
+            logger.exception(f"Pipeline stage {threading.current_thread().name} failed")
+            self._fail(e)
+
+    def _finalize(self, index: int, user_id: Optional[str]):
+        """Record a final result and emit all results that are now contiguous (call with _lock held)"""
+        self._results[index] = user_id
+        while self._next_emit in self._results:
+            if self._on_result:
+                try:
+                    self._on_result(self._usernames[self._next_emit], self._results[self._next_emit])
+                except Exception as e:
+                    # e.g. the output sink cannot be written; later results would be lost too
+                    logger.error(f"Result callback failed for @{self._usernames[self._next_emit]}: {e}")
+                    self._fail(e)
+                    return
+            self._next_emit += 1
+        if self._next_emit == len(self._usernames):
+            self._finished.set()
+
+    def _retry_or_fail(self, index: int, username: str, attempt: int):
+        if attempt + 1 < self.retries:
+            self._retry_queue.put((index, username, attempt + 1))
+        else:
+            logger.error(f"Failed to fetch ID for @{username} after {self.retries} attempts")
+            self._finalize(index, None)
+
+    def _next_work(self, pending) -> Optional[Tuple[int, str, int]]:
+        """Retries first, then new usernames; waits for retries once the input is exhausted"""
+        try:
+            return self._retry_queue.get_nowait()
+        except queue.Empty:
+            pass
+        item = next(pending, None)
+        if item is not None:
+            return item
+        while not self._finished.is_set():
+            try:
+                return self._retry_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def _download_stage(self):
+        scraper = self.scraper
+        pending = ((i, username, 0) for i, username in enumerate(self._usernames))
+        first = True
+
+        while not self._finished.is_set():
+            work = self._next_work(pending)
+            if work is None:
+                break
+            index, username, attempt = work
+
+            user_id = scraper._lookup_index(username)
+            if user_id:
+                with self._lock:
+                    self._finalize(index, user_id)
+                continue
+
+            if not first:
+                time.sleep(random.uniform(scraper.min_delay, scraper.max_delay))
+            first = False
+
+            try:
+                self._download(index, username, attempt)
+            except Exception as e:
+                logger.error(f"Unexpected error for @{username}: {e}")
+                with self._lock:
+                    scraper.stats["failed_requests"] += 1
+                    if index not in self._results:
+                        self._finalize(index, None)
+
+    def _download(self, index: int, username: str, attempt: int):
+        """Download one profile page and queue it for extraction, or retry/fail the username"""
+        scraper = self.scraper
+        # May wait for an account to finish cooling down, so it is not done under the lock
+        account = scraper._get_next_account()
+        with self._lock:
+            proxy = scraper._proxy_for(account)
+
+        logger.info("Attempt %d/%d for @%s using account %s", attempt + 1, self.retries, username, account.name,
+                    extra=SAMPLED if attempt == 0 else None)
+        session = scraper._get_session(account, proxy)
+        downloaded = None
+        try:
+            downloaded = scraper._download_profile(session, username)
+        except requests.exceptions.RequestException as e:
+            logger.error("Request error for @%s: %s", username, e)
+            with self._lock:
+                account.error_count += 1
+                if proxy:
+                    proxy.error_count += 1
+        finally:
+            scraper._sync_cookies(account, session)
+
+        response = downloaded[0] if downloaded else None
+        if response is not None and response.status_code == 200:
+            page = RawPage(index, username, attempt, downloaded[1],
+                           response.headers.get('Content-Encoding', ''), account, proxy)
+            # Blocks while extraction is behind (backpressure)
+            while not self._finished.is_set():
+                try:
+                    self._raw_pages.put(page, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            return
+
+        with self._lock:
+            if response is not None:
+                scraper._record_failed_status(username, account, response.status_code)
+            scraper._record_attempt(account, proxy, False)
+            self._retry_or_fail(index, username, attempt)
+
+    def _dispatch_stage(self, executor: ProcessPoolExecutor, inflight: threading.Semaphore):
+        while not self._finished.is_set():
+            page = self._raw_pages.get()
+            if page is None:
+                break
+            batch = [page]
+            while len(batch) < self.batch_size:
+                try:
+                    page = self._raw_pages.get_nowait()
+                except queue.Empty:
+                    break
+                if page is None:
+                    self._raw_pages.put(None)
+                    break
+                batch.append(page)
+
+            while not inflight.acquire(timeout=0.5):
+                if self._finished.is_set():
+                    return
+            try:
+                future = executor.submit(_extract_batch, [(p.body, p.content_encoding, p.username) for p in batch])
+            except RuntimeError:
+                inflight.release()
+                break
+            future.add_done_callback(lambda f, batch=batch: self._on_batch_done(f, batch, inflight))
+
+    def _on_batch_done(self, future, batch: List[RawPage], inflight: threading.Semaphore):
+        inflight.release()
+        if future.cancelled():
+            return
+        try:
+            user_ids = future.result()
+        except Exception as e:
+            logger.error(f"Extraction batch failed: {e}")
+            user_ids = [None] * len(batch)
+
+        # Runs on an executor thread, which would swallow the error and leave run() waiting
+        try:
+            self._record_batch(batch, user_ids)
+        except Exception as e:
+            logger.exception("Recording an extraction batch failed")
+            self._fail(e)
+
+    def _record_batch(self, batch: List[RawPage], user_ids: List[Optional[str]]):
+        with self._lock:
+            for page, user_id in zip(batch, user_ids):
+                if self._finished.is_set():
+                    return
+                if user_id:
+                    self.scraper._record_attempt(page.account, page.proxy, True)
+                    self._finalize(page.index, user_id)
+                else:
+                    # Same accounting as the inline path: a 200 page without an ID counts as a failure
+                    self.scraper._record_failed_status(page.username, page.account, 200)
+                    self.scraper._record_attempt(page.account, page.proxy, False)
+                    self._retry_or_fail(page.index, page.username, page.attempt)
@@ -0,0 +1,303 @@
+"""
+Concurrent follower crawls for many targets
+Each target is crawled on its own account lane; throttled crawls move to another lane
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from graphql_paginator import (FOLLOWERS, ConnectionQuery, GraphQLPaginator, PageBudget, PageStatusError, RequestPacer,
+                               user_record)
+from instagram_scraper import AccountsUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CrawlTask:
+    """Progress of one target's crawl; moves between lanes when one is throttled"""
+    target: str
+    user_id: Optional[str] = None
+    users: List[Dict] = field(default_factory=list)
+    cursor: Optional[str] = None
+    next_page: int = 1
+    lanes: List[str] = field(default_factory=list)
+    status: str = "pending"  # pending, done, partial, failed
+    budget: Optional[PageBudget] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def summary(self) -> Dict:
+        return {
+            "status": self.status,
+            "count": len(self.users),
+            "pages": self.next_page - 1,
+            "requests": self.budget.requests if self.budget else 0,
+            "lanes": self.lanes,
+            "seconds": round((self.finished_at or time.time()) - (self.started_at or time.time()), 1),
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class LanePool:
+    """
+    Hands out accounts (lanes) to crawl workers, one worker per account
+
+    An account is ready when it is active, not cooling down and under its
+    daily limit. acquire() waits for the next ready account that no other
+    worker holds.
+    """
+
+    def __init__(self, scraper, min_delay: float, max_delay: float):
+        self.scraper = scraper
+        self._held = set()
+        self._pacers: Dict[str, RequestPacer] = {}
+        self._condition = threading.Condition()
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def _ready(self, account, now: datetime) -> bool:
+        limit = self.scraper.max_requests_per_account_per_day
+        return (account.is_active and account.name not in self._held
+                and (account.cooldown_until is None or account.cooldown_until <= now)
+                and (limit is None or account.daily_requests.get(now.date().isoformat(), 0) < limit))
+
+    def acquire(self, stop: threading.Event):
+        """The least used ready account, or None if no account can become ready (or stop is set)"""
+        with self._condition:
+            while not stop.is_set():
+                now = datetime.now()
+                ready = [acc for acc in self.scraper.accounts if self._ready(acc, now)]
+                if ready:
+                    account = min(ready, key=lambda a: a.request_count)
+                    self._held.add(account.name)
+                    return account
+                cooling = [(acc.cooldown_until - now).total_seconds() for acc in self.scraper.accounts
+                           if acc.is_active and acc.name not in self._held
+                           and acc.cooldown_until and acc.cooldown_until > now]
+                if not cooling and not self._held:
+                    return None
+                # Wake up when the next cooldown ends or a lane is released
+                self._condition.wait(timeout=min(cooling + [5.0]))
+            return None
+
+    def release(self, account):
+        """Return an account to the pool"""
+        with self._condition:
+            self._held.discard(account.name)
+            self._condition.notify_all()
+
+    def pacer(self, account) -> RequestPacer:
+        """The request pacer of an account, shared by every crawl that runs on it"""
+        with self._condition:
+            if account.name not in self._pacers:
+                self._pacers[account.name] = RequestPacer(self.min_delay, self.max_delay)
+            return self._pacers[account.name]
+
+
+class MultiTargetCrawler:
+    """
+    Crawls the followers (or following) of many targets concurrently
+
+    One worker thread runs per lane, up to the number of ready accounts.
+    Each worker holds one account (with its proxy) and crawls one target
+    at a time on it. When a lane is rate limited, the account goes into
+    cooldown and the target is queued again with its cursor. Another lane
+    then continues the crawl where it stopped. Throughput grows with the
+    number of accounts, because every account paces its own requests.
+    """
+
+    def __init__(self, scraper, workers: Optional[int] = None, max_items: Optional[int] = None,
+                 query: ConnectionQuery = FOLLOWERS, max_lane_switches: int = 5,
+                 on_page: Optional[Callable[[str, List[Dict]], None]] = None,
+                 on_target: Optional[Callable[[str, List[Dict], Dict], None]] = None):
+        """
+        Args:
+            scraper: InstagramFollowersScraper with the account/proxy pool
+            workers: Maximum concurrent crawls (default: one per active account)
+            max_items: Maximum users per target (None = all)
+            query: Connection to crawl (FOLLOWERS or FOLLOWING)
+            max_lane_switches: Give up on a target after it was throttled this many times
+            on_page: Optional callback called with (target, users) for every page
+            on_target: Optional callback called with (target, users, summary) when a target finishes
+        """
+        self.scraper = scraper
+        self.workers = workers
+        self.max_items = max_items
+        self.query = query
+        self.max_lane_switches = max_lane_switches
+        self.on_page = on_page
+        self.on_target = on_target
+        self.lanes = LanePool(scraper, scraper.page_min_delay, scraper.page_max_delay)
+        self.tasks: Dict[str, CrawlTask] = {}
+        self._queue: deque = deque()
+        self._queue_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._finished = 0
+
+    def run(self, targets: List[str]) -> Dict[str, Dict]:
+        """
+        Crawl all targets
+
+        Ctrl+C stops the workers after their current page; unfinished targets are reported as partial.
+
+        Returns:
+            Per-target summary: status, count, pages, lanes used, seconds (and error)
+        """
+        targets = list(dict.fromkeys(t.lstrip('@').strip() for t in targets if t.strip()))
+        self.tasks = {target: CrawlTask(target, budget=self.scraper._crawl_budget()) for target in targets}
+        self._queue = deque(self.tasks.values())
+        self._finished = 0
+
+        active = sum(1 for acc in self.scraper.accounts if acc.is_active)
+        workers = max(1, min(self.workers or active, active, len(targets)))
+        logger.info("Crawling %s of %d target(s) on %d lane(s)", self.query.name, len(targets), workers)
+        threads = [threading.Thread(target=self._worker, name=f"crawl-{i + 1}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, stopping after the current pages...")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            for task in self.tasks.values():
+                if task.status == "pending":
+                    task.status = "partial" if task.users else "failed"
+                    task.error = task.error or "not finished"
+            self.scraper.persist_cookies()
+        return {target: task.summary() for target, task in self.tasks.items()}
+
+    def _next_task(self) -> Optional[CrawlTask]:
+        with self._queue_lock:
+            return self._queue.popleft() if self._queue else None
+
+    def _requeue(self, task: CrawlTask):
+        # Throttled targets go first, so partly crawled targets finish before new ones start
+        with self._queue_lock:
+            self._queue.appendleft(task)
+
+    def _worker(self):
+        account = None
+        try:
+            while not self._stop.is_set():
+                task = self._next_task()
+                if task is None:
+                    return
+                if account is not None and not account.is_active:
+                    self.lanes.release(account)
+                    account = None
+                if account is None:
+                    account = self.lanes.acquire(self._stop)
+                    if account is None:
+                        self._requeue(task)
+                        self._fail_remaining("no usable accounts left")
+                        return
+                tracer = self.scraper.tracer
+                with tracer.trace(self.query.name, username=task.target) if tracer else nullcontext():
+                    crawled = self._crawl(task, account)
+                if not crawled:
+                    # Throttled: the account is cooling down, continue the target on another lane
+                    self.lanes.release(account)
+                    account = None
+        finally:
+            if account is not None:
+                self.lanes.release(account)
+
+    def _fail_remaining(self, reason: str):
+        with self._queue_lock:
+            remaining, self._queue = list(self._queue), deque()
+        for task in remaining:
+            task.error = reason
+            self._finish(task, "partial" if task.users else "failed")
+
+    def _crawl(self, task: CrawlTask, account) -> bool:
+        """Crawl task on one lane; returns False if the lane was throttled and the task was queued again"""
+        if task.started_at is None:
+            task.started_at = time.time()
+        task.lanes.append(account.name)
+        if task.user_id is None:
+            try:
+                task.user_id = self.scraper.get_user_id(task.target)
+            except AccountsUnavailable as e:
+                task.error = str(e)
+                self._finish(task, "failed")
+                return True
+            if not task.user_id:
+                task.error = "user ID not found"
+                self._finish(task, "failed")
+                return True
+
+        proxy = self.scraper._proxy_for(account)
+        session = self.scraper._create_session(account, proxy)
+        paginator = GraphQLPaginator(
+            self.scraper, account, session, self.query, task.user_id, task.target,
+            page_size=self.scraper.page_size, sizer=self.scraper._page_sizer(self.query),
+            max_items=self.max_items - len(task.users) if self.max_items else None, budget=task.budget,
+            pacer=self.lanes.pacer(account), start_cursor=task.cursor, start_page=task.next_page,
+        )
+        throttled = False
+        try:
+            for page in paginator.pages():
+                page_users = [user_record(node) for node in page.nodes if node.get('username')]
+                if self.max_items:
+                    page_users = page_users[:self.max_items - len(task.users)]
+                task.users.extend(page_users)
+                task.cursor, task.next_page = page.end_cursor, page.number + 1
+                if self.on_page:
+                    self.on_page(task.target, page_users)
+                if self._stop.is_set():
+                    task.error = "interrupted"
+                    self._finish(task, "partial")
+                    return True
+                if self.max_items and len(task.users) >= self.max_items:
+                    break
+        except PageStatusError as e:
+            throttled = e.status_code == 429
+            if throttled:
+                account.error_count += 1
+            if throttled and len(task.lanes) <= self.max_lane_switches:
+                logger.warning("Lane %s throttled on @%s after %d %s, moving the target to another lane",
+                               account.name, task.target, len(task.users), self.query.name)
+                self._requeue(task)
+                return False
+            task.error = f"status {e.status_code}"
+        except (ValueError, requests.exceptions.RequestException) as e:
+            account.error_count += 1
+            task.error = str(e)
+        finally:
+            # Count every request sent on this lane towards the account's usage (one failed on an error or 429)
+            failed = 1 if task.error or throttled else 0
+            with self.scraper._lock:
+                for i in range(max(paginator.requests, failed)):
+                    self.scraper._update_counters(account, proxy, i >= failed)
+
+        if paginator.exhausted and task.error is None:
+            task.error = f"{paginator.exhausted} budget spent"
+        self._finish(task, "done" if task.error is None else ("partial" if task.users else "failed"))
+        return True
+
+    def _finish(self, task: CrawlTask, status: str):
+        task.status = status
+        task.finished_at = time.time()
+        with self._queue_lock:
+            self._finished += 1
+            finished = self._finished
+        summary = task.summary()
+        logger.info("[%d/%d] @%s: %s, %d %s in %ss on %d lane(s)", finished, len(self.tasks), task.target,
+                    status, summary["count"], self.query.name, summary["seconds"], len(set(task.lanes)))
+        if self.on_target:
+            self.on_target(task.target, task.users, summary)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Follower-set store and audience-overlap queries
+Keeps each target's follower IDs as a sorted integer array on disk, so overlaps
+across many targets are computed without loading the crawled JSON files
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional
+
+from config_loader import atomic_write_json
+
+MANIFEST_FILE = "manifest.json"
+USERNAME_PATTERN = re.compile(r'^[a-z0-9._]{1,30}$')
+
+
+def _write_array(values: array, file_path: str):
+    """Write an array to a temporary file next to file_path and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            values.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _use_search(small: array, large: array) -> bool:
+    """Binary-search the small array's values in the large one instead of walking both"""
+    return len(small) * math.log2(len(large) + 1) < len(small) + len(large)
+
+
+def _intersect(a: array, b: array) -> array:
+    """Values in both of two sorted arrays, sorted"""
+    small, large = (a, b) if len(a) <= len(b) else (b, a)
+    shared = array('Q')
+    if not small:
+        return shared
+    if _use_search(small, large):
+        lo = 0
+        for value in small:
+            lo = bisect_left(large, value, lo)
+            if lo == len(large):
+                break
+            if large[lo] == value:
+                shared.append(value)
+        return shared
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            shared.append(a[i])
+            i += 1
+            j += 1
+    return shared
+
+
+def _difference(a: array, b: array) -> array:
+    """Values of sorted array `a` that are not in sorted array `b`, sorted"""
+    result = array('Q')
+    j = 0
+    for value in a:
+        while j < len(b) and b[j] < value:
+            j += 1
+        if j == len(b) or b[j] != value:
+            result.append(value)
+    return result
+
+
+def _union(arrays: List[array]) -> array:
+    """Values in any of the sorted arrays, sorted and without duplicates"""
+    result = array('Q')
+    last = None
+    for value in heapq.merge(*arrays):
+        if value != last:
+            result.append(value)
+            last = value
+    return result
+
+
+class FollowerSetStore:
+    """
+    Directory of follower sets, one per crawled target
+
+    Each target's follower user IDs are stored as a sorted array of unsigned
+    64-bit integers (`<target>.u64`, native byte order). A manifest keeps the
+    count and update time per target. Arrays are loaded lazily and kept in
+    memory between queries, so repeated overlap queries only pay for the set
+    operations. These walk the sorted arrays (or binary-search the larger one
+    when the sizes are very different), so no hash sets are built.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Store directory (created if missing)
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._manifest_path = os.path.join(path, MANIFEST_FILE)
+        self._manifest = self._load_manifest()
+        self._arrays: Dict[str, array] = {}
+
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self._manifest_path):
+            return {"byteorder": sys.byteorder, "targets": {}}
+        with open(self._manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _file(self, target: str) -> str:
+        return os.path.join(self.path, f"{target}.u64")
+
+    @staticmethod
+    def _normalize(target: str) -> str:
+        target = target.lstrip('@').strip().lower()
+        if not USERNAME_PATTERN.match(target):
+            raise ValueError(f"Invalid target username: {target!r}")
+        return target
+
+    def targets(self) -> List[str]:
+        """Names of all stored targets"""
+        return sorted(self._manifest["targets"])
+
+    def info(self, target: str) -> Optional[Dict]:
+        """Manifest entry of a target ('count', 'updated_at'), or None if it is not stored"""
+        return self._manifest["targets"].get(self._normalize(target))
+
+    def get(self, target: str) -> array:
+        """Sorted follower IDs of a target"""
+        target = self._normalize(target)
+        if target not in self._manifest["targets"]:
+            raise KeyError(f"No follower set stored for @{target}")
+        values = array('Q')
+        with open(self._file(target), 'rb') as f:
+            values.frombytes(f.read())
+        if self._manifest.get("byteorder", sys.byteorder) != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def _array(self, target: str) -> array:
+        target = self._normalize(target)
+        if target not in self._arrays:
+            self._arrays[target] = self.get(target)
+        return self._arrays[target]
+
+    def add(self, target: str, follower_ids: Iterable, replace: bool = False) -> Dict[str, int]:
+        """
+        Store follower IDs of a target
+
+        By default the IDs are merged into the existing set, which suits
+        partial crawls. With `replace`, the set becomes exactly these IDs
+        (a complete crawl, so unfollows are dropped).
+
+        Args:
+            target: Target username
+            follower_ids: Follower user IDs (ints or numeric strings; others are skipped)
+            replace: Replace the stored set instead of merging into it
+
+        Returns:
+            Dictionary with 'added', 'removed' and 'total' counts
+        """
+        target = self._normalize(target)
+        new_ids = array('Q', sorted({int(i) for i in follower_ids if str(i).isdigit()}))
+        old_ids = self._array(target) if target in self._manifest["targets"] else array('Q')
+
+        merged = new_ids if replace else _union([old_ids, new_ids])
+        shared = len(_intersect(old_ids, merged))
+        result = {"added": len(merged) - shared, "removed": len(old_ids) - shared, "total": len(merged)}
+        _write_array(merged, self._file(target))
+
+        self._arrays[target] = merged
+        self._manifest["byteorder"] = sys.byteorder
+        self._manifest["targets"][target] = {"count": len(merged), "updated_at": time.time()}
+        atomic_write_json(self._manifest, self._manifest_path)
+        return result
+
+    def add_followers(self, target: str, followers: List[Dict], replace: bool = False) -> Dict[str, int]:
+        """Store the result of get_followers (dictionaries with 'user_id')"""
+        return self.add(target, (f.get('user_id') for f in followers), replace=replace)
+
+    def import_json(self, file_path: str, replace: bool = False) -> Dict[str, int]:
+        """Store a followers JSON file written by instagram_followers_scraper.py"""
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        return self.add_followers(data["username"], data.get("followers", []), replace=replace)
+
+    def remove(self, target: str):
+        """Delete a target's follower set"""
+        target = self._normalize(target)
+        if self._manifest["targets"].pop(target, None) is None:
+            return
+        self._arrays.pop(target, None)
+        atomic_write_json(self._manifest, self._manifest_path)
+        if os.path.exists(self._file(target)):
+            os.unlink(self._file(target))
+
+    def intersection(self, targets: List[str]) -> array:
+        """Followers shared by all targets, sorted"""
+        arrays = sorted((self._array(t) for t in targets), key=len)
+        if not arrays:
+            return array('Q')
+        shared = arrays[0]
+        for other in arrays[1:]:
+            if not shared:
+                break
+            shared = _intersect(shared, other)
+        return shared
+
+    def union(self, targets: List[str]) -> array:
+        """Followers of any of the targets, sorted"""
+        return _union([self._array(t) for t in targets])
+
+    def intersection_size(self, targets: List[str]) -> int:
+        """Number of followers shared by all targets"""
+        return len(self.intersection(targets))
+
+    def union_size(self, targets: List[str]) -> int:
+        """Unique reach of the targets combined"""
+        if len(targets) == 2:
+            a, b = self._array(targets[0]), self._array(targets[1])
+            return len(a) + len(b) - len(_intersect(a, b))
+        return len(self.union(targets))
+
+    def jaccard(self, a: str, b: str) -> float:
+        """Jaccard similarity of two follower sets (0.0 when both are empty)"""
+        array_a, array_b = self._array(a), self._array(b)
+        shared = len(_intersect(array_a, array_b))
+        total = len(array_a) + len(array_b) - shared
+        return shared / total if total else 0.0
+
+    def exclusive(self, target: str, others: List[str]) -> array:
+        """Followers of `target` that follow none of the other targets, sorted"""
+        result = array('Q', self._array(target))
+        for other in others:
+            result = _difference(result, self._array(other))
+        return result
+
+    def overlap_matrix(self, targets: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Pairwise overlap of all (or the given) targets
+
+        Returns:
+            One dictionary per pair with 'a', 'b', 'shared' and 'jaccard',
+            sorted by Jaccard similarity, highest first
+        """
+        targets = [self._normalize(t) for t in targets] if targets else self.targets()
+        rows = []
+        for a, b in combinations(targets, 2):
+            array_a, array_b = self._array(a), self._array(b)
+            shared = len(_intersect(array_a, array_b))
+            total = len(array_a) + len(array_b) - shared
+            rows.append({"a": a, "b": b, "shared": shared, "jaccard": shared / total if total else 0.0})
+        rows.sort(key=lambda row: row["jaccard"], reverse=True)
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store follower sets and compute audience overlaps")
+    parser.add_argument("--store", default="follower_sets", help="Store directory (default: follower_sets)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Add followers JSON files written by instagram_followers_scraper.py")
+    import_parser.add_argument("files", nargs="+", help="Followers JSON files")
+    import_parser.add_argument("--replace", action="store_true", help="Replace stored sets instead of merging")
+
+    subparsers.add_parser("list", help="List stored targets")
+
+    overlap_parser = subparsers.add_parser("overlap", help="Shared followers, unique reach and Jaccard of targets")
+    overlap_parser.add_argument("targets", nargs="+", help="Target usernames")
+
+    matrix_parser = subparsers.add_parser("matrix", help="Pairwise overlap of all (or the given) targets")
+    matrix_parser.add_argument("targets", nargs="*", help="Target usernames (default: all)")
+    matrix_parser.add_argument("--top", type=int, help="Only show the most similar pairs")
+    matrix_parser.add_argument("--output", "-o", help="Write the pairs as JSON to this file")
+
+    args = parser.parse_args()
+    store = FollowerSetStore(args.store)
+
+    try:
+        if args.command == "import":
+            for file_path in args.files:
+                result = store.import_json(file_path, replace=args.replace)
+                print(f"{file_path}: +{result['added']} -{result['removed']} ({result['total']} total)")
+
+        elif args.command == "list":
+            for target in store.targets():
+                print(f"{target:<32} {store.info(target)['count']:>10}")
+
+        elif args.command == "overlap":
+            start = time.time()
+            for target in args.targets:
+                info = store.info(target)
+                if info is None:
+                    raise KeyError(f"No follower set stored for @{target}")
+                print(f"@{target}: {info['count']} followers")
+            print(f"Shared by all: {store.intersection_size(args.targets)}")
+            print(f"Unique reach:  {store.union_size(args.targets)}")
+            if len(args.targets) == 2:
+                print(f"Jaccard:       {store.jaccard(*args.targets):.4f}")
+            print(f"({time.time() - start:.2f}s)")
+
+        elif args.command == "matrix":
+            rows = store.overlap_matrix(args.targets or None)
+            if args.top:
+                rows = rows[:args.top]
+            if args.output:
+                with open(args.output, 'w') as f:
+                    json.dump(rows, f, indent=2)
+                print(f"Saved {len(rows)} pairs to {args.output}")
+            else:
+                for row in rows:
+                    print(f"{row['a']:<24} {row['b']:<24} {row['shared']:>10} {row['jaccard']:.4f}")
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e.args[0] if e.args else e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Breadth-first follower-graph crawler
+Crawls followers-of-followers to a fixed depth with an on-disk frontier, so crawls of
+millions of nodes run in bounded memory and resume where they stopped
+"""
+
+import argparse
+import csv
+import hashlib
+import logging
+import math
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from graphql_paginator import FOLLOWERS, GraphQLPaginator, PageStatusError
+from instagram_scraper import AccountsUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Node states
+QUEUED, CRAWLING, DONE, FAILED, LEAF = range(5)
+STATE_NAMES = {QUEUED: "queued", CRAWLING: "crawling", DONE: "done", FAILED: "failed", LEAF: "leaf"}
+
+# Order in which queued nodes are crawled, per policy
+POLICIES = {
+    "depth": "depth, discovered_at",                 # plain breadth-first
+    "degree": "depth, priority DESC, discovered_at",  # within a level, nodes followed by the most crawled accounts first
+    "verified": "priority DESC, depth, discovered_at",  # verified accounts first, at any depth
+}
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of integers
+
+    Answers "definitely not added" or "probably added". At the configured
+    capacity about `error_rate` of the never-added values are reported as
+    added. 10 million IDs at 0.1% take about 18 MB.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, value: int) -> Iterable[int]:
+        digest = hashlib.blake2b(value.to_bytes(8, 'little'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, value: int) -> bool:
+        """Add a value; returns True if it was (probably) added before"""
+        positions = list(self._positions(value))
+        present = True
+        with self._lock:
+            for position in positions:
+                byte, bit = divmod(position, 8)
+                if not self._array[byte] & (1 << bit):
+                    present = False
+                    self._array[byte] |= 1 << bit
+            if not present:
+                self.count += 1
+        return present
+
+    def __contains__(self, value: int) -> bool:
+        return all(self._array[p // 8] & (1 << (p % 8)) for p in self._positions(value))
+
+
+class GraphStore:
+    """
+    SQLite storage for a graph crawl: nodes (the frontier and its state) and follower edges
+
+    Every page is written in one transaction together with the crawled node's
+    cursor. After a crash, nodes that were being crawled continue from their
+    last stored page. Edges are (target, follower) pairs of user IDs.
+    """
+
+    def __init__(self, path: str, policy: str = "depth"):
+        """
+        Args:
+            path: SQLite database path
+            policy: Crawl order, a key of POLICIES
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.path = path
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nodes ("
+            " user_id INTEGER PRIMARY KEY,"
+            " username TEXT,"
+            " depth INTEGER NOT NULL,"
+            " state INTEGER NOT NULL,"
+            " priority REAL NOT NULL DEFAULT 0,"
+            " cursor TEXT,"
+            " pages INTEGER NOT NULL DEFAULT 0,"
+            " followers INTEGER NOT NULL DEFAULT 0,"
+            " discovered_at REAL NOT NULL,"
+            " crawled_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS edges ("
+            " target_id INTEGER NOT NULL,"
+            " follower_id INTEGER NOT NULL,"
+            " PRIMARY KEY (target_id, follower_id)) WITHOUT ROWID"
+        )
+        # Only queued nodes are indexed, so the index stays as small as the frontier
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_frontier_{policy} ON nodes ({POLICIES[policy]}) WHERE state = {QUEUED}"
+        )
+        self._conn.commit()
+
+    def requeue(self, max_depth: int) -> int:
+        """
+        Prepare a (re)started crawl: queue nodes that were being crawled when
+        the last run stopped, and leaves that are now inside max_depth
+
+        Returns:
+            Number of nodes queued again
+        """
+        with self._lock, self._conn:
+            interrupted = self._conn.execute("UPDATE nodes SET state = ? WHERE state = ?", (QUEUED, CRAWLING))
+            leaves = self._conn.execute("UPDATE nodes SET state = ? WHERE state = ? AND depth < ?",
+                                        (QUEUED, LEAF, max_depth))
+            return interrupted.rowcount + leaves.rowcount
+
+    def add_seed(self, user_id: int, username: str, max_depth: int):
+        """Queue a node at depth 0 (a known node is moved up to depth 0, see add_page)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO nodes (user_id, username, depth, state, discovered_at) VALUES (?, ?, 0, ?, ?)",
+                (user_id, username, QUEUED, time.time())
+            )
+            self._relevel([user_id], 0, max_depth)
+
+    def _relevel(self, user_ids: List[int], depth: int, max_depth: int):
+        """
+        Move known nodes up to `depth` if they were stored deeper (call inside a transaction)
+
+        A node is stored at the depth it was first found at, which may be deeper
+        than its shortest path from a seed. Moved leaves that are now inside
+        max_depth are queued, and the stored followers of moved nodes move up
+        with them, level by level.
+        """
+        level = user_ids
+        while level and depth <= max_depth:
+            moved = []
+            for user_id in level:
+                cursor = self._conn.execute(
+                    "UPDATE nodes SET depth = ?, state = CASE WHEN state = ? AND ? < ? THEN ? ELSE state END "
+                    "WHERE user_id = ? AND depth > ?",
+                    (depth, LEAF, depth, max_depth, QUEUED, user_id, depth)
+                )
+                if cursor.rowcount:
+                    moved.append(user_id)
+            level = [follower_id for user_id in moved for (follower_id,) in self._conn.execute(
+                "SELECT follower_id FROM edges WHERE target_id = ?", (user_id,))]
+            depth += 1
+
+    def claim(self) -> Optional[Tuple[int, str, int, Optional[str], int, int]]:
+        """
+        Take the next queued node according to the policy
+
+        Returns:
+            (user_id, username, depth, cursor, pages, followers stored so far) or None if nothing is queued
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT user_id, username, depth, cursor, pages, followers FROM nodes WHERE state = ? "
+                f"ORDER BY {POLICIES[self.policy]} LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE nodes SET state = ? WHERE user_id = ?", (CRAWLING, row[0]))
+            return row
+
+    def add_page(self, target_id: int, followers: List[Dict], child_depth: int, max_depth: int,
+                 new_ids: List[int], seen_ids: List[int], cursor: Optional[str]):
+        """
+        Store one page of a node's followers
+
+        Args:
+            target_id: Crawled node
+            followers: Follower dictionaries of the page
+            child_depth: Depth of the followers
+            max_depth: Depth of the outermost level; followers there are stored as leaves
+            new_ids: Followers not seen before (inserted)
+            seen_ids: Followers seen before (moved up to child_depth if they were deeper; their
+                priority is raised under the degree policy)
+            cursor: Cursor after this page, to resume the node from
+        """
+        now = time.time()
+        state = QUEUED if child_depth < max_depth else LEAF
+        new = set(new_ids)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO edges (target_id, follower_id) VALUES (?, ?)",
+                ((target_id, int(f['user_id'])) for f in followers)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO nodes (user_id, username, depth, state, priority, discovered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((int(f['user_id']), f['username'], child_depth, state,
+                  1.0 if self.policy == "verified" and f.get('is_verified') else 0.0, now)
+                 for f in followers if int(f['user_id']) in new)
+            )
+            self._relevel(seen_ids, child_depth, max_depth)
+            if self.policy == "degree" and seen_ids:
+                self._conn.executemany(
+                    "UPDATE nodes SET priority = priority + 1 WHERE user_id = ? AND state = ?",
+                    ((user_id, QUEUED) for user_id in seen_ids)
+                )
+            self._conn.execute(
+                "UPDATE nodes SET cursor = ?, pages = pages + 1, followers = followers + ? WHERE user_id = ?",
+                (cursor, len(followers), target_id)
+            )
+
+    def finish(self, user_id: int, state: int):
+        """Mark a claimed node DONE, FAILED or QUEUED again (throttled; it resumes from its cursor)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE nodes SET state = ?, crawled_at = ? WHERE user_id = ?",
+                (state, time.time() if state != QUEUED else None, user_id)
+            )
+
+    def iter_node_ids(self) -> Iterable[int]:
+        """All known node IDs (to rebuild the visited set)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id FROM nodes").fetchall()
+        for (user_id,) in rows:
+            yield user_id
+
+    def node_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def status(self) -> Dict:
+        """Node counts per depth and state, and the number of edges"""
+        with self._lock:
+            rows = self._conn.execute("SELECT depth, state, COUNT(*) FROM nodes GROUP BY depth, state").fetchall()
+            edges = self._conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        depths: Dict[int, Dict[str, int]] = {}
+        for depth, state, count in rows:
+            depths.setdefault(depth, {})[STATE_NAMES[state]] = count
+        return {"depths": depths, "edges": edges}
+
+    def export_edges(self, path: str) -> int:
+        """Write all edges as CSV (target_id, follower_id) without loading them into memory"""
+        count = 0
+        with self._lock:
+            cursor = self._conn.execute("SELECT target_id, follower_id FROM edges")
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["target_id", "follower_id"])
+                while True:
+                    rows = cursor.fetchmany(10000)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    count += len(rows)
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class GraphCrawler:
+    """
+    Crawls the follower graph breadth-first from seed accounts
+
+    Seeds are at depth 0. Their followers are at depth 1, and so on. Nodes
+    below max_depth are queued and crawled. Nodes at max_depth are stored as
+    leaves with their edges, but are not crawled. The frontier lives in
+    SQLite, and every page is committed as it arrives. Memory use therefore
+    stays flat no matter how large the crawl grows, and a restarted crawl
+    picks up at the page where it stopped. A node found again on a shorter
+    path is moved up to the shallower depth (and queued if it was a leaf).
+    Duplicate discoveries are filtered
+    by an in-memory Bloom filter of seen user IDs, rebuilt from the database
+    on start. At its 0.1% false positive rate, a few never-seen accounts may be
+    skipped. Workers hold one account lane each, as in follower_crawler.
+    """
+
+    def __init__(self, scraper, store: GraphStore, max_depth: int = 2, workers: Optional[int] = None,
+                 max_followers_per_node: Optional[int] = None, bloom_capacity: int = 10_000_000,
+                 max_lane_switches: int = 5):
+        """
+        Args:
+            scraper: InstagramFollowersScraper with the account/proxy pool
+            store: GraphStore of this crawl
+            max_depth: Depth of the outermost (uncrawled) level; 2 = followers of the seeds' followers
+            workers: Concurrent crawls (default: one per active account)
+            max_followers_per_node: Followers fetched per node (None = all)
+            bloom_capacity: Expected number of nodes; the visited set is sized for it
+            max_lane_switches: Mark a node failed after it was throttled this many times
+        """
+        from follower_crawler import LanePool
+        self.scraper = scraper
+        self.store = store
+        self.max_depth = max_depth
+        self.workers = workers
+        self.max_followers_per_node = max_followers_per_node
+        self.max_lane_switches = max_lane_switches
+        self.lanes = LanePool(scraper, scraper.page_min_delay, scraper.page_max_delay)
+        requeued = store.requeue(max_depth)
+        if requeued:
+            logger.info("Continuing %d node(s) from the previous run", requeued)
+        self.visited = BloomFilter(max(bloom_capacity, store.node_count() * 2))
+        for user_id in store.iter_node_ids():
+            self.visited.add(user_id)
+        self.stats = {"nodes_crawled": 0, "nodes_failed": 0, "pages": 0, "edges": 0, "nodes_discovered": 0}
+        self._stats_lock = threading.Lock()
+        self._in_progress = 0
+        self._throttles: Dict[int, int] = {}
+        self._stop = threading.Event()
+
+    def add_seeds(self, usernames: List[str]) -> int:
+        """Resolve and queue seed usernames; returns the number queued (stops early if no account is usable)"""
+        added = 0
+        for username in usernames:
+            username = username.lstrip('@').strip()
+            try:
+                user_id = self.scraper.get_user_id(username)
+            except AccountsUnavailable as e:
+                logger.error("Not resolving seed @%s and the rest: %s", username, e)
+                break
+            if not user_id:
+                logger.error("Could not get user ID for seed @%s", username)
+                continue
+            self.store.add_seed(int(user_id), username, self.max_depth)
+            self.visited.add(int(user_id))
+            added += 1
+        return added
+
+    def run(self, max_nodes: Optional[int] = None) -> Dict:
+        """
+        Crawl until the frontier is empty (or max_nodes nodes were crawled in this run)
+
+        Ctrl+C stops after the current pages; the next run continues from there.
+
+        Returns:
+            Crawl statistics of this run
+        """
+        self.max_nodes = max_nodes
+        active = sum(1 for acc in self.scraper.accounts if acc.is_active)
+        workers = max(1, min(self.workers or active, active))
+        threads = [threading.Thread(target=self._worker, name=f"graph-{i + 1}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, stopping after the current pages...")
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        self.scraper.persist_cookies()
+        return dict(self.stats)
+
+    def _claim(self):
+        with self._stats_lock:
+            if self.max_nodes is not None and self.stats["nodes_crawled"] + self._in_progress >= self.max_nodes:
+                return None, False
+            node = self.store.claim()
+            if node:
+                self._in_progress += 1
+            return node, self._in_progress > 0
+
+    def _worker(self):
+        account = None
+        try:
+            while not self._stop.is_set():
+                node, busy = self._claim()
+                if node is None:
+                    if not busy:
+                        return
+                    # Other workers may still queue new nodes
+                    time.sleep(1)
+                    continue
+                if account is not None and not account.is_active:
+                    self.lanes.release(account)
+                    account = None
+                if account is None:
+                    account = self.lanes.acquire(self._stop)
+                    if account is None:
+                        self.store.finish(node[0], QUEUED)
+                        self._done()
+                        logger.error("No usable accounts left, stopping")
+                        self._stop.set()
+                        return
+                tracer = self.scraper.tracer
+                with tracer.trace("graph_node", user_id=node[0]) if tracer else nullcontext():
+                    throttled = self._crawl(node, account)
+                self._done()
+                if throttled:
+                    self.lanes.release(account)
+                    account = None
+        finally:
+            if account is not None:
+                self.lanes.release(account)
+
+    def _done(self):
+        with self._stats_lock:
+            self._in_progress -= 1
+
+    def _crawl(self, node: Tuple[int, str, int, Optional[str], int, int], account) -> bool:
+        """Crawl one node's followers; returns True if the lane was throttled"""
+        user_id, username, depth, cursor, pages, fetched = node
+        child_depth = depth + 1
+        limit = self.max_followers_per_node
+
+        proxy = self.scraper._proxy_for(account)
+        session = self.scraper._create_session(account, proxy)
+        paginator = GraphQLPaginator(
+            self.scraper, account, session, FOLLOWERS, str(user_id), username or str(user_id),
+            page_size=self.scraper.page_size, sizer=self.scraper._page_sizer(FOLLOWERS),
+            max_items=limit - fetched if limit else None,
+            pacer=self.lanes.pacer(account), start_cursor=cursor, start_page=pages + 1,
+        )
+        error = None
+        throttled = False
+        try:
+            if limit and fetched >= limit:
+                self.store.finish(user_id, DONE)
+                return False
+            for page in paginator.pages():
+                followers = [f for f in (_follower(n) for n in page.nodes) if f]
+                if limit:
+                    followers = followers[:limit - fetched]
+                fetched += len(followers)
+                new_ids, seen_ids = [], []
+                for follower in followers:
+                    (seen_ids if self.visited.add(int(follower['user_id'])) else new_ids).append(
+                        int(follower['user_id']))
+                self.store.add_page(user_id, followers, child_depth, self.max_depth, new_ids, seen_ids,
+                                    page.end_cursor)
+                with self._stats_lock:
+                    self.stats["pages"] += 1
+                    self.stats["edges"] += len(followers)
+                    self.stats["nodes_discovered"] += len(new_ids)
+                if self._stop.is_set():
+                    self.store.finish(user_id, QUEUED)
+                    return False
+                if limit and fetched >= limit:
+                    break
+        except PageStatusError as e:
+            if e.status_code == 429:
+                throttles = self._throttles.get(user_id, 0) + 1
+                self._throttles[user_id] = throttles
+                throttled = True
+                account.error_count += 1
+                if throttles <= self.max_lane_switches:
+                    logger.warning("Lane %s throttled on %s, requeueing it", account.name, username or user_id)
+                    self.store.finish(user_id, QUEUED)
+                    return True
+            error = f"status {e.status_code}"
+        except (ValueError, requests.exceptions.RequestException) as e:
+            account.error_count += 1
+            error = str(e)
+        finally:
+            # Count every request sent on this lane towards the account's usage (one failed on an error or 429)
+            failed = 1 if error or throttled else 0
+            with self.scraper._lock:
+                for i in range(max(paginator.requests, failed)):
+                    self.scraper._update_counters(account, proxy, i >= failed)
+
+        if error:
+            logger.warning("Failed to crawl %s: %s", username or user_id, error)
+        self.store.finish(user_id, FAILED if error else DONE)
+        with self._stats_lock:
+            self.stats["nodes_failed" if error else "nodes_crawled"] += 1
+            crawled = self.stats["nodes_crawled"]
+        if not error:
+            logger.info("Crawled %s (depth %d): %d followers (%d nodes crawled)",
+                        username or user_id, depth, fetched, crawled)
+        return throttled
+
+
+def _follower(node: Dict) -> Optional[Dict]:
+    user_id = node.get('id')
+    if not node.get('username') or not str(user_id or "").isdigit():
+        return None
+    return {'user_id': user_id, 'username': node['username'], 'is_verified': node.get('is_verified', False)}
+
+
+def main():
+    from config_loader import load_accounts_from_json, load_proxies_from_json
+    from instagram_followers_scraper import InstagramFollowersScraper
+    from logging_setup import add_logging_arguments, configure_logging_from_args
+
+    parser = argparse.ArgumentParser(description="Crawl the follower graph breadth-first")
+    parser.add_argument("--db", default="graph.db", help="Crawl database (default: graph.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    crawl_parser = subparsers.add_parser("crawl", help="Crawl from the seeds (or continue the stored crawl)")
+    crawl_parser.add_argument("seeds", nargs="*", help="Seed usernames (optional when continuing)")
+    crawl_parser.add_argument("--depth", type=int, default=2,
+                              help="Outermost level; 2 = followers of the seeds' followers (default: 2)")
+    crawl_parser.add_argument("--policy", choices=sorted(POLICIES), default="depth",
+                              help="Crawl order: depth (breadth-first), degree (most-followed nodes of a "
+                                   "level first) or verified (verified accounts first)")
+    crawl_parser.add_argument("--max-followers", type=int, help="Followers fetched per node (default: all)")
+    crawl_parser.add_argument("--max-nodes", type=int, help="Stop after crawling this many nodes")
+    crawl_parser.add_argument("--workers", type=int, help="Concurrent crawls (default: one per account)")
+    crawl_parser.add_argument("--capacity", type=int, default=10_000_000,
+                              help="Expected number of nodes, sizes the visited set (default: 10000000)")
+    crawl_parser.add_argument("--accounts-file", default="accounts.json", help="Accounts JSON file")
+    crawl_parser.add_argument("--proxies-file", help="Proxies JSON file (optional)")
+    add_logging_arguments(crawl_parser)
+
+    subparsers.add_parser("status", help="Nodes per depth and state, and the number of edges")
+
+    export_parser = subparsers.add_parser("export", help="Write the edges as CSV")
+    export_parser.add_argument("--output", "-o", default="edges.csv", help="CSV file (default: edges.csv)")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status = GraphStore(args.db).status()
+        for depth, states in sorted(status["depths"].items()):
+            print(f"depth {depth}: " + ", ".join(f"{count} {state}" for state, count in sorted(states.items())))
+        print(f"{status['edges']} edges")
+        return
+
+    if args.command == "export":
+        count = GraphStore(args.db).export_edges(args.output)
+        print(f"Wrote {count} edges to {args.output}")
+        return
+
+    configure_logging_from_args(args)
+    try:
+        accounts = load_accounts_from_json(args.accounts_file)
+        proxies = load_proxies_from_json(args.proxies_file) if args.proxies_file else None
+    except Exception as e:
+        print(f"Error loading configuration: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not accounts:
+        print("Error: No accounts found", file=sys.stderr)
+        sys.exit(1)
+
+    scraper = InstagramFollowersScraper(accounts=accounts, proxies=proxies)
+    store = GraphStore(args.db, policy=args.policy)
+    crawler = GraphCrawler(scraper, store, max_depth=args.depth, workers=args.workers,
+                           max_followers_per_node=args.max_followers, bloom_capacity=args.capacity)
+    if args.seeds:
+        print(f"Queued {crawler.add_seeds(args.seeds)} seed(s)")
+    start = time.time()
+    stats = crawler.run(max_nodes=args.max_nodes)
+    scraper.persist_cookies(force=True)
+    store.close()
+    print(f"Crawled {stats['nodes_crawled']} node(s) ({stats['nodes_failed']} failed), "
+          f"{stats['edges']} edges, {stats['nodes_discovered']} new node(s) in {time.time() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
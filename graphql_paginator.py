@@ -0,0 +1,413 @@
+"""
+Paginated GraphQL connections (followers, following, ...)
+Walks an edge connection page by page and fetches the next page while the current one is processed
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_URL = "https://www.instagram.com/graphql/query/"
+
+
+@dataclass(frozen=True)
+class ConnectionQuery:
+    """A GraphQL query that returns one paginated edge connection of a user"""
+    name: str
+    query_hash: str
+    edge_path: Tuple[str, ...]  # Keys leading to the connection in the response
+    referer_path: str  # Profile sub-page sent as Referer, e.g. "followers"
+    span_name: str  # Prefix of the tracing spans, e.g. "follower_page"
+
+
+FOLLOWERS = ConnectionQuery("followers", "c76146de99bb02f6415203be841dd25a",
+                            ("data", "user", "edge_followed_by"), "followers", "follower_page")
+FOLLOWING = ConnectionQuery("following", "d04b0a864b4b54837c0d870b0e77e076",
+                            ("data", "user", "edge_follow"), "following", "following_page")
+
+
+def user_record(node: Dict) -> Dict:
+    """Follower/following dictionary from a GraphQL user node"""
+    return {
+        'username': node.get('username', ''),
+        'user_id': node.get('id', ''),
+        'full_name': node.get('full_name', ''),
+        'is_verified': node.get('is_verified', False),
+        'profile_pic_url': node.get('profile_pic_url', '')
+    }
+
+
+class PageStatusError(Exception):
+    """A page request was answered with an unexpected HTTP status"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Status {status_code}")
+        self.status_code = status_code
+
+
+@dataclass
+class Page:
+    """One page of a connection"""
+    number: int
+    nodes: List[Dict]
+    has_next_page: bool
+    end_cursor: Optional[str]
+
+
+class RequestPacer:
+    """
+    Spaces the start of consecutive requests by a random delay
+
+    Unlike sleeping after each page, the time spent downloading and
+    processing a page counts towards the delay.
+    """
+
+    def __init__(self, min_delay: float = 3, max_delay: float = 6):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request may start"""
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_start)
+            self._next_start = start + random.uniform(self.min_delay, self.max_delay)
+        if start > now:
+            time.sleep(start - now)
+
+
+class PageSizer:
+    """
+    Chooses how many edges to request per page of a connection
+
+    Every page is one rate-limited request, so larger pages fetch more users
+    per request. The size starts at `initial` and doubles after
+    `grow_after` consecutive full pages, up to `maximum`. If consecutive
+    pages requested at the same size come back with the same smaller number
+    of edges while more pages follow, the server has a cap. The size is set
+    to that cap, and it is not probed above it for `cap_ttl` seconds. A
+    single short page (e.g. edges filtered out server-side) only stops the
+    size from growing. A failed page (5xx, timeout) or one that is `slow_factor` times
+    slower per edge than usual halves the size, down to `minimum`. One
+    sizer is shared by all crawls of a query, so what it learns carries
+    over between targets.
+    """
+
+    def __init__(self, initial: int = 50, minimum: int = 12, maximum: int = 200, grow_after: int = 2,
+                 slow_factor: float = 2.0, cap_ttl: float = 3600):
+        """
+        Args:
+            initial: First page size
+            minimum: Smallest page size after backing off
+            maximum: Largest page size probed
+            grow_after: Full pages in a row before the size is doubled
+            slow_factor: A page slower per edge than this many times the average counts as slow
+            cap_ttl: Seconds a detected server cap is kept before larger pages are tried again
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.grow_after = grow_after
+        self.slow_factor = slow_factor
+        self.cap_ttl = cap_ttl
+        self.cap: Optional[int] = None  # Largest page the server returned when asked for more
+        self._cap_expires = 0.0
+        self._short_page: Optional[Tuple[int, int]] = None  # (requested, returned) of the last short page
+        self._size = max(minimum, min(initial, maximum))
+        self._largest_full = 0
+        self._full_pages = 0
+        self._seconds_per_edge: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of edges to request for the next page"""
+        return self._size
+
+    def _limit(self) -> int:
+        if self.cap and time.time() >= self._cap_expires:
+            logger.debug("Page size cap of %d expired", self.cap)
+            self.cap = None
+        return min(self.maximum, self.cap) if self.cap else self.maximum
+
+    def _back_off(self, reason: str):
+        self._full_pages = 0
+        if self._size > self.minimum:
+            self._size = max(self.minimum, self._size // 2)
+            logger.info("Page size lowered to %d (%s)", self._size, reason)
+
+    def record(self, requested: int, returned: int, has_next_page: bool, seconds: float):
+        """Learn from a page that was answered"""
+        with self._lock:
+            if returned and has_next_page and returned < requested:
+                self._full_pages = 0
+                if self._short_page != (requested, returned):
+                    # Could be a one-off (filtered edges); a cap repeats on the next page
+                    self._short_page = (requested, returned)
+                    return
+                # The server returns at most this many, however many are asked for
+                self.cap = max(returned, self._largest_full)
+                self._cap_expires = time.time() + self.cap_ttl
+                if self._size > self.cap:
+                    self._size = max(self.minimum, self.cap)
+                    logger.info("Endpoint returns at most %d edges per page, page size set to %d",
+                                self.cap, self._size)
+                return
+            if not returned or not has_next_page:
+                return
+            self._short_page = None
+
+            per_edge = seconds / returned
+            average = self._seconds_per_edge
+            self._seconds_per_edge = per_edge if average is None else 0.8 * average + 0.2 * per_edge
+            if average is not None and per_edge > self.slow_factor * average:
+                self._back_off(f"page took {seconds:.1f}s")
+                return
+
+            self._largest_full = max(self._largest_full, returned)
+            self._full_pages += 1
+            if requested == self._size and self._full_pages >= self.grow_after and self._size < self._limit():
+                self._size = min(self._size * 2, self._limit())
+                self._full_pages = 0
+                logger.debug("Page size raised to %d", self._size)
+
+    def failed(self, requested: int, reason: str):
+        """Learn from a page request that failed (5xx, timeout); returns whether a smaller page can be tried"""
+        with self._lock:
+            if requested > self.minimum:
+                if requested == self._size:
+                    self._back_off(reason)
+                return True
+            return False
+
+
+@dataclass
+class PageBudget:
+    """
+    What one crawl may spend before it stops, and what it has spent so far
+
+    None means unlimited. The budget is spent across every paginator it is
+    given to, so a crawl that moves to another account keeps its budget.
+    """
+    max_requests: Optional[int] = None
+    max_seconds: Optional[float] = None
+    requests: int = 0
+    started_at: Optional[float] = None
+
+    def copy(self) -> 'PageBudget':
+        """An unspent budget with the same limits"""
+        return PageBudget(self.max_requests, self.max_seconds)
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.time()
+
+    def exhausted(self) -> Optional[str]:
+        """Which limit was reached ("request" or "time"), or None"""
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            return "request"
+        if self.max_seconds is not None and self.started_at is not None \
+                and time.time() - self.started_at >= self.max_seconds:
+            return "time"
+        return None
+
+
+class GraphQLPaginator:
+    """
+    Iterates over the pages of a GraphQL edge connection
+
+    As soon as a page's cursor is known, the request for the next page is
+    started on a background thread. The caller processes page N (parsing,
+    writing output) while page N+1 is in flight. The pacer still spaces the
+    request starts, so prefetching never sends faster than the configured
+    delays. With `max_items`, no page is prefetched once enough nodes have
+    been returned. The page size comes from a PageSizer unless a fixed
+    `page_size` is given. A page that fails with a 5xx or a timeout is
+    retried with a smaller size. The walk runs until the connection ends,
+    `max_items` is reached or the budget is spent. When the budget stops it
+    early, `exhausted` says which limit was hit. A 429 puts the account in
+    cooldown and raises PageStatusError, so the caller continues from the
+    last cursor on another account (an account in cooldown is never used).
+    Any other non-200 status raises PageStatusError too.
+    """
+
+    def __init__(self, scraper, account, session: "requests.Session", query: ConnectionQuery, user_id: str,
+                 username: str, page_size: Optional[int] = None, sizer: Optional[PageSizer] = None,
+                 max_items: Optional[int] = None, budget: Optional[PageBudget] = None,
+                 pacer: Optional[RequestPacer] = None, prefetch: bool = True, start_cursor: Optional[str] = None,
+                 start_page: int = 1):
+        """
+        Args:
+            scraper: InstagramIDScraper the session belongs to (timeouts, cookies, tracing)
+            account: InstagramAccount of the session
+            session: Session to send the requests with
+            query: Connection to walk
+            user_id: User whose connection is fetched
+            username: Username of user_id (for the Referer header and logs)
+            page_size: Fixed number of nodes requested per page (None = adaptive)
+            sizer: Adaptive page size shared with other crawls (default: a new PageSizer)
+            max_items: Stop after this many nodes (None = all)
+            budget: Requests and time the walk may spend (None = unlimited)
+            pacer: Spacing of requests (default: random 3-6s)
+            prefetch: Fetch the next page while the current one is processed
+            start_cursor: Resume after this cursor (the end_cursor of the last page received)
+            start_page: Number of the first page (when resuming)
+        """
+        self.scraper = scraper
+        self.account = account
+        self.session = session
+        self.query = query
+        self.user_id = user_id
+        self.username = username
+        self.page_size = page_size
+        self.sizer = sizer or PageSizer()
+        self.max_items = max_items
+        self.budget = budget or PageBudget()
+        self.pacer = pacer or RequestPacer()
+        self.prefetch = prefetch
+        self.start_cursor = start_cursor
+        self.start_page = start_page
+        self.max_page_retries = 3
+        self.requests = 0
+        self.exhausted: Optional[str] = None
+
+    def _url(self, cursor: Optional[str], size: int) -> str:
+        variables = {
+            "id": self.user_id,
+            "include_reel": False,
+            "fetch_mutual": False,
+            "first": size,
+        }
+        if cursor:
+            variables["after"] = cursor
+        return f"{GRAPHQL_URL}?query_hash={self.query.query_hash}&variables={json.dumps(variables)}"
+
+    def _fetch(self, cursor: Optional[str], number: int) -> Tuple[Optional["requests.Response"], int, float]:
+        """(response or None on a timeout/connection error, page size requested, seconds taken)"""
+        import requests
+        self.pacer.wait()
+        size = self.page_size or self.sizer.size
+        started = time.perf_counter()
+        with self.scraper._span(f"{self.query.span_name}_fetch", page=number, size=size) as span:
+            try:
+                response = self.session.get(self._url(cursor, size), timeout=self.scraper._request_timeout())
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if self.page_size or not self.sizer.failed(size, type(e).__name__):
+                    raise
+                logger.warning("%s page %d of %d failed (%s), retrying with a smaller page",
+                               self.query.name, number, size, e)
+                return None, size, time.perf_counter() - started
+            if span:
+                span.set(status=response.status_code, bytes=len(response.content))
+        self.scraper._sync_cookies(self.account, self.session)
+        return response, size, time.perf_counter() - started
+
+    def _budget_spent(self) -> bool:
+        self.exhausted = self.budget.exhausted()
+        if self.exhausted:
+            logger.warning("Stopping %s of @%s after %d requests: %s budget spent (more pages remain)",
+                           self.query.name, self.username, self.budget.requests, self.exhausted)
+        return self.exhausted is not None
+
+    def pages(self) -> Iterator[Page]:
+        """
+        Yield the pages in order
+
+        Raises:
+            PageStatusError: A page was answered with a status other than 200 (after
+                retries for 5xx; a 429 puts the account in cooldown first)
+            requests.exceptions.RequestException: A page request failed
+            ValueError: A page was not valid JSON
+        """
+        import requests
+        self.session.headers.update({
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-IG-App-ID': '936619743392459',
+            'X-IG-WWW-Claim': '0',
+            'Referer': f'https://www.instagram.com/{self.username}/{self.query.referer_path}/',
+        })
+        fetch = self.scraper.tracer.propagate(self._fetch) if self.scraper.tracer else self._fetch
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.query.name}-prefetch")
+        self.budget.start()
+
+        def submit(cursor: Optional[str], number: int):
+            self.requests += 1
+            self.budget.requests += 1
+            return executor.submit(fetch, cursor, number)
+
+        try:
+            number, cursor, returned, retries = self.start_page, self.start_cursor, 0, 0
+            if self._budget_spent():
+                return
+            pending = submit(cursor, number)
+            while pending is not None:
+                response, size, seconds = pending.result()
+                pending = None
+
+                if response is None or response.status_code >= 500:
+                    status = response.status_code if response is not None else None
+                    if status is not None and (self.page_size or not self.sizer.failed(size, f"status {status}")):
+                        raise PageStatusError(status)
+                    retries += 1
+                    if retries > self.max_page_retries:
+                        if status is None:
+                            raise requests.exceptions.ConnectionError(f"{self.query.name} page {number} kept failing")
+                        raise PageStatusError(status)
+                    if self._budget_spent():
+                        break
+                    pending = submit(cursor, number)
+                    continue
+                if response.status_code == 429:
+                    self.account.cooldown_until = self.scraper._now() + timedelta(
+                        seconds=self.scraper.rate_limit_cooldown)
+                    raise PageStatusError(429)
+                if response.status_code != 200:
+                    raise PageStatusError(response.status_code)
+                retries = 0
+
+                with self.scraper._span(f"{self.query.span_name}_parse", page=number):
+                    data = response.json()
+                    connection = data
+                    for key in self.query.edge_path:
+                        connection = (connection or {}).get(key) or {}
+                    page_info = connection.get('page_info', {})
+                    has_next_page = page_info.get('has_next_page', False)
+                    end_cursor = page_info.get('end_cursor')
+                    nodes = [edge.get('node', {}) for edge in connection.get('edges', [])]
+                returned += len(nodes)
+                if not self.page_size:
+                    self.sizer.record(size, len(nodes), has_next_page, seconds)
+                if has_next_page and end_cursor == cursor:
+                    # The same page would be requested again, forever
+                    logger.warning("Stopping %s of @%s: page %d did not advance the cursor",
+                                   self.query.name, self.username, number)
+                    has_next_page = False
+
+                # Start the next request before handing this page to the caller
+                more_wanted = self.max_items is None or returned < self.max_items
+                if has_next_page and end_cursor and more_wanted:
+                    if self._budget_spent():
+                        has_next_page = False
+                    elif self.prefetch:
+                        pending = submit(end_cursor, number + 1)
+
+                yield Page(number, nodes, has_next_page, end_cursor)
+
+                if pending is None and has_next_page and end_cursor and more_wanted:
+                    pending = submit(end_cursor, number + 1)
+                number, cursor = number + 1, end_cursor
+        finally:
+            # A prefetched page the caller no longer wants finishes in the background
+            executor.shutdown(wait=False)
@@ -0,0 +1,216 @@
+"""
+Persistent username -> user ID cache
+Backed by SQLite so resolved IDs survive restarts and can be shared by tools
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IDCache:
+    """
+    Thread-safe username -> user ID cache stored in SQLite
+
+    Usernames are stored lower-cased. Entries older than `ttl` seconds are
+    treated as missing by `get`, but stay on disk until overwritten. Every
+    stored mapping is also kept in a user ID -> username history, and a
+    username that comes back with a different ID is recorded as an owner change.
+    """
+
+    def __init__(self, path: str = ":memory:", ttl: Optional[float] = None):
+        """
+        Args:
+            path: SQLite database path (":memory:" keeps the cache in-process only)
+            ttl: Optional maximum age of an entry in seconds
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS id_cache ("
+            " username TEXT PRIMARY KEY,"
+            " user_id TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_id_cache_user_id ON id_cache (user_id)")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(id_cache)")]
+        if "checked_at" not in columns:
+            # Caches created before re-validation existed
+            self._conn.execute("ALTER TABLE id_cache ADD COLUMN checked_at REAL")
+        if "not_found" not in columns:
+            # Consecutive re-validations that found no ID
+            self._conn.execute("ALTER TABLE id_cache ADD COLUMN not_found INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_id_cache_checked ON id_cache (COALESCE(checked_at, fetched_at))"
+        )
+        # Reverse index: every username a user ID has been seen with
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS id_history ("
+            " user_id TEXT NOT NULL,"
+            " username TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " PRIMARY KEY (user_id, username))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS owner_changes ("
+            " username TEXT NOT NULL,"
+            " old_user_id TEXT NOT NULL,"
+            " new_user_id TEXT NOT NULL,"
+            " changed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_owner_changes_username ON owner_changes (username)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[str]:
+        """Return the cached user ID for a username, or None if missing or expired"""
+        username = username.lstrip('@').strip().lower()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, fetched_at FROM id_cache WHERE username = ?", (username,)
+            ).fetchone()
+            if row and (self.ttl is None or time.time() - row[1] <= self.ttl):
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, username: str, user_id: str) -> Optional[str]:
+        """
+        Store a resolved user ID
+
+        If the username was cached with a different ID, the change of owner is
+        recorded (see owner_changes).
+
+        Returns:
+            The previous user ID if the username changed owner, else None
+        """
+        username = username.lstrip('@').strip().lower()
+        user_id = str(user_id)
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT user_id FROM id_cache WHERE username = ?", (username,)
+                ).fetchone()
+                previous = row[0] if row and row[0] != user_id else None
+                if previous:
+                    logger.info(f"@{username} changed owner: {previous} -> {user_id}")
+                    self._conn.execute(
+                        "INSERT INTO owner_changes (username, old_user_id, new_user_id, changed_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (username, previous, user_id, now)
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO id_cache (username, user_id, fetched_at, checked_at) VALUES (?, ?, ?, ?)",
+                    (username, user_id, now, now)
+                )
+                self._conn.execute(
+                    "INSERT INTO id_history (user_id, username, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, username) DO UPDATE SET last_seen = excluded.last_seen",
+                    (user_id, username, now, now)
+                )
+        return previous
+
+    def mark_checked(self, username: str):
+        """Record a re-validation attempt that did not produce an ID, so the entry moves to the back"""
+        username = username.lstrip('@').strip().lower()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("UPDATE id_cache SET checked_at = ? WHERE username = ?", (time.time(), username))
+
+    def record_not_found(self, username: str) -> int:
+        """
+        Record a re-validation that found no ID; the entry moves to the back
+
+        Returns:
+            Number of consecutive re-validations without an ID (reset by put)
+        """
+        username = username.lstrip('@').strip().lower()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE id_cache SET checked_at = ?, not_found = not_found + 1 WHERE username = ?",
+                    (time.time(), username)
+                )
+                row = self._conn.execute("SELECT not_found FROM id_cache WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, username: str) -> bool:
+        """Remove a mapping (its history is kept); returns True if it was cached"""
+        username = username.lstrip('@').strip().lower()
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute("DELETE FROM id_cache WHERE username = ?", (username,))
+        return cursor.rowcount > 0
+
+    def oldest(self, limit: int = 100) -> List[Tuple[str, str, float]]:
+        """Entries least recently validated first, as (username, user_id, last checked time)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT username, user_id, COALESCE(checked_at, fetched_at) FROM id_cache "
+                "ORDER BY COALESCE(checked_at, fetched_at) LIMIT ?", (limit,)
+            ).fetchall()
+
+    def history(self, user_id: str) -> List[Dict]:
+        """Usernames a user ID has been seen with, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT username, first_seen, last_seen FROM id_history WHERE user_id = ? ORDER BY first_seen",
+                (str(user_id),)
+            ).fetchall()
+        return [{"username": u, "first_seen": first, "last_seen": last} for u, first, last in rows]
+
+    def owner_changes(self, username: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Recorded changes of owner, newest first (optionally for one username)"""
+        query = "SELECT username, old_user_id, new_user_id, changed_at FROM owner_changes"
+        params: Tuple = ()
+        if username:
+            query += " WHERE username = ?"
+            params = (username.lstrip('@').strip().lower(),)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY changed_at DESC LIMIT ?", params + (limit,)).fetchall()
+        return [{"username": u, "old_user_id": old, "new_user_id": new, "changed_at": at}
+                for u, old, new, at in rows]
+
+    def get_many(self, usernames) -> Dict[str, str]:
+        """Return the cached IDs for the usernames that are present"""
+        results = {}
+        for username in usernames:
+            user_id = self.get(username)
+            if user_id:
+                results[username] = user_id
+        return results
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over all (username, user_id) pairs in chunks, without loading the whole table"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, username, user_id FROM id_cache WHERE rowid > ? ORDER BY rowid LIMIT 10000",
+                    (last_rowid,)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, username, user_id in rows:
+                yield username, user_id
+            last_rowid = rows[-1][0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM id_cache").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped, read-only username -> user ID index
+A fixed-size hash table plus a string heap in one file, shared by all processes through the page cache
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from typing import Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IGIDIDX1"
+# magic, slot count, entry count, heap offset, heap size
+HEADER = struct.Struct("<8sQQQQ")
+# username hash (0 = empty slot), user ID, heap offset << 8 | username length
+RECORD = struct.Struct("<QQQ")
+LOAD_FACTOR = 0.7
+
+
+def _hash(username: bytes) -> int:
+    value = int.from_bytes(hashlib.blake2b(username, digest_size=8).digest(), 'little')
+    return value or 1
+
+
+def _normalize(username: str) -> bytes:
+    return username.lstrip('@').strip().lower().encode('utf-8')
+
+
+class IDIndex:
+    """
+    Read-only username -> user ID lookups from an index file built by IDIndexBuilder
+
+    The file is memory-mapped, so opening it is instant, nothing is copied
+    into the process, and every process that opens the same file shares one
+    copy in the OS page cache. A lookup hashes the username and probes the
+    record table linearly, comparing against the string heap to rule out
+    hash collisions.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Index file written by IDIndexBuilder
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slots, self.entries, self._heap_offset, self._heap_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an ID index file")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[str]:
+        """Return the indexed user ID of a username, or None"""
+        if not self.slots:
+            return None
+        name = _normalize(username)
+        key = _hash(name)
+        slot = key % self.slots
+        while True:
+            stored_key, user_id, name_ref = RECORD.unpack_from(self._mmap, HEADER.size + slot * RECORD.size)
+            if stored_key == 0:
+                self.misses += 1
+                return None
+            if stored_key == key:
+                start = self._heap_offset + (name_ref >> 8)
+                if self._mmap[start:start + (name_ref & 0xFF)] == name:
+                    self.hits += 1
+                    return str(user_id)
+            slot = (slot + 1) % self.slots
+
+    def __contains__(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def close(self):
+        """Unmap the index file"""
+        self._mmap.close()
+
+
+class IDIndexBuilder:
+    """
+    Builds an IDIndex file from (username, user_id) pairs
+
+    Pairs are collected into compact arrays and a string heap (about 24
+    bytes plus the username per entry), then written to a temporary file and
+    renamed into place, so readers never see a half-written index. When a
+    username is added twice, the last pair wins.
+    """
+
+    def __init__(self):
+        self._keys = array('Q')
+        self._ids = array('Q')
+        self._refs = array('Q')
+        self._heap = bytearray()
+        self.skipped = 0
+
+    def add(self, username: str, user_id) -> bool:
+        """Add one pair; returns False if the username or ID cannot be indexed"""
+        name = _normalize(username or "")
+        user_id = str(user_id or "")
+        if not name or len(name) > 0xFF or not user_id.isdigit() or int(user_id) >= 2 ** 64:
+            self.skipped += 1
+            return False
+        self._keys.append(_hash(name))
+        self._ids.append(int(user_id))
+        self._refs.append(len(self._heap) << 8 | len(name))
+        self._heap += name
+        return True
+
+    def add_many(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Add (username, user_id) pairs; returns the number added"""
+        return sum(1 for username, user_id in pairs if self.add(username, user_id))
+
+    def _same_name(self, ref_a: int, ref_b: int) -> bool:
+        len_a, len_b = ref_a & 0xFF, ref_b & 0xFF
+        return len_a == len_b and self._heap[ref_a >> 8:(ref_a >> 8) + len_a] == self._heap[ref_b >> 8:(ref_b >> 8) + len_b]
+
+    def write(self, path: str) -> int:
+        """
+        Write the index file
+
+        Returns:
+            Number of distinct usernames in the index
+        """
+        slots = int(len(self._keys) / LOAD_FACTOR) + 1
+        heap_offset = HEADER.size + slots * RECORD.size
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=directory)
+        try:
+            with os.fdopen(fd, 'w+b') as f:
+                f.truncate(heap_offset + len(self._heap))
+                with mmap.mmap(f.fileno(), 0) as out:
+                    entries = 0
+                    for key, user_id, ref in zip(self._keys, self._ids, self._refs):
+                        slot = key % slots
+                        while True:
+                            position = HEADER.size + slot * RECORD.size
+                            stored_key, _, stored_ref = RECORD.unpack_from(out, position)
+                            if stored_key == 0:
+                                entries += 1
+                                break
+                            if stored_key == key and self._same_name(stored_ref, ref):
+                                break
+                            slot = (slot + 1) % slots
+                        RECORD.pack_into(out, position, key, user_id, ref)
+                    out[heap_offset:heap_offset + len(self._heap)] = self._heap
+                    HEADER.pack_into(out, 0, MAGIC, slots, entries, heap_offset, len(self._heap))
+                    out.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return entries
+
+
+def iter_pairs(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Read (username, user_id) pairs from a file produced by this project
+
+    Supported: ID cache databases, SQLite/CSV/NDJSON.gz output sinks, scraper_cli.py
+    JSON output ({"results": {...}}) and followers/following JSON ({"followers": [...]}).
+    """
+    if path.endswith(".ndjson.gz"):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                yield record.get("username"), record.get("user_id")
+    elif path.endswith(".csv"):
+        with open(path, newline='', encoding='utf-8') as f:
+            for record in csv.DictReader(f):
+                yield record.get("username"), record.get("user_id")
+    elif path.endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data.get("results"), dict):
+            yield from data["results"].items()
+        for user in data.get("followers", []) + data.get("following", []):
+            yield user.get("username"), user.get("user_id")
+    else:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            table = "id_cache" if "id_cache" in tables else "results"
+            yield from conn.execute(f"SELECT username, user_id FROM {table}")
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a memory-mapped username -> user ID index")
+    parser.add_argument("sources", nargs="+",
+                        help="ID cache databases and result/follower files (.db, .sqlite, .csv, .ndjson.gz, .json); "
+                             "later sources win for the same username")
+    parser.add_argument("--output", "-o", default="id_index.bin", help="Index file (default: id_index.bin)")
+    args = parser.parse_args()
+
+    builder = IDIndexBuilder()
+    start = time.time()
+    for source in args.sources:
+        try:
+            added = builder.add_many(iter_pairs(source))
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error reading {source}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{source}: {added} pair(s)")
+
+    entries = builder.write(args.output)
+    print(f"Wrote {entries} username(s) to {args.output} in {time.time() - start:.1f}s"
+          + (f" ({builder.skipped} invalid pair(s) skipped)" if builder.skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,19 @@ Instagram Followers Scraper
 Fetches the list of followers for a given Instagram account
 """
 
-import requests
 import json
-import time
-import random
 import re
 import logging
-from typing import List, Dict, Optional
-from instagram_scraper import InstagramIDScraper, InstagramAccount
-from config_loader import load_accounts_from_json
+import threading
+from pathlib import Path
+from typing import Callable, List, Dict, Optional
+from instagram_scraper import AccountsUnavailable, InstagramIDScraper, InstagramAccount
+from config_loader import load_accounts_from_json, load_runtime_state
+from output_sinks import SINK_FORMATS, FOLLOWER_FIELDS, create_sink
+from logging_setup import add_logging_arguments, configure_logging_from_args
+from graphql_paginator import (FOLLOWERS, FOLLOWING, ConnectionQuery, GraphQLPaginator, PageBudget, PageSizer,
+                               PageStatusError, RequestPacer, user_record)
+from tracing import add_tracing_arguments
 
 logger = logging.getLogger(__name__)
 
@@ -21,132 +25,212 @@ class InstagramFollowersScraper(InstagramIDScraper):
     Extended scraper that can fetch followers lists
     """
     
-    def get_followers(self, username: str, max_followers: Optional[int] = None) -> List[Dict]:
+    # Seconds between the start of two page requests of one crawl
+    page_min_delay = 3
+    page_max_delay = 6
+    
+    # Users requested per page; None tunes the size per query (see graphql_paginator.PageSizer)
+    page_size: Optional[int] = None
+    
+    # Limits of one target's crawl (None = unlimited)
+    crawl_max_requests: Optional[int] = None
+    crawl_max_seconds: Optional[float] = None
+    
+    # Accounts a crawl moves to after 429s before it stops with what it has
+    max_account_switches = 5
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._page_sizers: Dict[str, PageSizer] = {}
+    
+    def _page_sizer(self, query: ConnectionQuery) -> PageSizer:
+        """Adaptive page size of a query, shared by all crawls of this scraper"""
+        with self._lock:
+            if query.name not in self._page_sizers:
+                self._page_sizers[query.name] = PageSizer()
+            return self._page_sizers[query.name]
+    
+    def _crawl_budget(self) -> PageBudget:
+        """A fresh budget for one target's crawl"""
+        return PageBudget(self.crawl_max_requests, self.crawl_max_seconds)
+    
+    def get_followers(self, username: str, max_followers: Optional[int] = None,
+                      on_page: Optional[Callable[[List[Dict]], None]] = None,
+                      crawl_status: Optional[Dict] = None) -> List[Dict]:
         """
         Get list of followers for a username
         
         Args:
             username: Instagram username (without @)
             max_followers: Maximum number of followers to fetch (None = all)
+            on_page: Optional callback called with the followers of each fetched page,
+                e.g. to report progress
+            crawl_status: Optional dictionary whose 'complete' key is set to True if the
+                crawl ended normally (end of the list or max_followers), or False if an
+                error, a budget or the HTML fallback cut it short
             
         Returns:
             List of follower dictionaries with 'username' and 'user_id'
+        
+        Raises:
+            AccountsUnavailable: No account is usable
         """
         username = username.lstrip('@').strip()
+        if crawl_status is not None:
+            crawl_status["complete"] = False
         
         # First, get the user ID
         user_id = self.get_user_id(username)
         if not user_id:
-            logger.error(f"Could not get user ID for @{username}")
+            logger.error("Could not get user ID for @%s", username)
             return []
         
-        logger.info(f"Found user ID for @{username}: {user_id}")
+        logger.info("Found user ID for @%s: %s", username, user_id)
         
         # Get followers using GraphQL API
-        return self._fetch_followers_graphql(user_id, username, max_followers)
+        if self.tracer is None:
+            return self._fetch_followers_graphql(user_id, username, max_followers, on_page, crawl_status)
+        with self.tracer.trace("followers", username=username) as span:
+            followers = self._fetch_followers_graphql(user_id, username, max_followers, on_page, crawl_status)
+            if span:
+                span.set(count=len(followers))
+            return followers
     
-    def _fetch_followers_graphql(self, user_id: str, username: str, max_followers: Optional[int] = None) -> List[Dict]:
+    def get_following(self, username: str, max_following: Optional[int] = None,
+                      on_page: Optional[Callable[[List[Dict]], None]] = None,
+                      crawl_status: Optional[Dict] = None) -> List[Dict]:
         """
-        Fetch followers using Instagram's GraphQL API
+        Get the list of accounts a username follows
+        
+        Args:
+            username: Instagram username (without @)
+            max_following: Maximum number of accounts to fetch (None = all)
+            on_page: Optional callback called with the accounts of each fetched page
+            crawl_status: Optional dictionary whose 'complete' key is set (see get_followers)
+            
+        Returns:
+            List of dictionaries with 'username' and 'user_id' (same fields as get_followers)
+        
+        Raises:
+            AccountsUnavailable: No account is usable
         """
-        account = self._get_next_account()
-        session = self._create_session(account)
+        username = username.lstrip('@').strip()
+        if crawl_status is not None:
+            crawl_status["complete"] = False
         
-        followers = []
-        end_cursor = None
-        has_next_page = True
-        page_count = 0
-        max_pages = 50  # Safety limit
+        user_id = self.get_user_id(username)
+        if not user_id:
+            logger.error("Could not get user ID for @%s", username)
+            return []
         
-        while has_next_page and (max_followers is None or len(followers) < max_followers):
-            page_count += 1
-            if page_count > max_pages:
-                logger.warning(f"Reached maximum page limit ({max_pages})")
-                break
-            
-            # GraphQL query for followers
-            variables = {
-                "id": user_id,
-                "include_reel": False,
-                "fetch_mutual": False,
-                "first": 50  # Instagram typically returns 50 per page
-            }
-            
-            if end_cursor:
-                variables["after"] = end_cursor
-            
-            query_hash = "c76146de99bb02f6415203be841dd25a"  # Followers query hash
-            
-            url = f"https://www.instagram.com/graphql/query/?query_hash={query_hash}&variables={json.dumps(variables)}"
-            
-            try:
-                headers = {
-                    'X-Requested-With': 'XMLHttpRequest',
-                    'X-IG-App-ID': '936619743392459',
-                    'X-IG-WWW-Claim': '0',
-                    'Referer': f'https://www.instagram.com/{username}/followers/',
-                }
-                session.headers.update(headers)
-                
-                response = session.get(url, timeout=30)
-                
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        
-                        # Parse followers from response
-                        edges = data.get('data', {}).get('user', {}).get('edge_followed_by', {}).get('edges', [])
-                        
-                        for edge in edges:
-                            node = edge.get('node', {})
-                            follower_username = node.get('username', '')
-                            follower_id = node.get('id', '')
-                            
-                            if follower_username:
-                                followers.append({
-                                    'username': follower_username,
-                                    'user_id': follower_id,
-                                    'full_name': node.get('full_name', ''),
-                                    'is_verified': node.get('is_verified', False),
-                                    'profile_pic_url': node.get('profile_pic_url', '')
-                                })
-                        
-                        # Check for next page
-                        page_info = data.get('data', {}).get('user', {}).get('edge_followed_by', {}).get('page_info', {})
-                        has_next_page = page_info.get('has_next_page', False)
-                        end_cursor = page_info.get('end_cursor')
+        if self.tracer is None:
+            return self._fetch_connection(FOLLOWING, user_id, username, max_following, on_page,
+                                          crawl_status=crawl_status)
+        with self.tracer.trace("following", username=username) as span:
+            following = self._fetch_connection(FOLLOWING, user_id, username, max_following, on_page,
+                                               crawl_status=crawl_status)
+            if span:
+                span.set(count=len(following))
+            return following
+    
+    def _fetch_followers_graphql(self, user_id: str, username: str, max_followers: Optional[int] = None,
+                                 on_page: Optional[Callable[[List[Dict]], None]] = None,
+                                 crawl_status: Optional[Dict] = None) -> List[Dict]:
+        """
+        Fetch followers using Instagram's GraphQL API, falling back to the HTML page
+        """
+        try:
+            return self._fetch_connection(FOLLOWERS, user_id, username, max_followers, on_page,
+                                          raise_status=True, crawl_status=crawl_status)
+        except PageStatusError as e:
+            logger.warning("Failed to fetch followers: Status %s", e.status_code)
+            # Try HTML fallback
+            return self._fetch_followers_html(username, max_followers)
+    
+    def _fetch_connection(self, query: ConnectionQuery, user_id: str, username: str,
+                          max_items: Optional[int] = None,
+                          on_page: Optional[Callable[[List[Dict]], None]] = None,
+                          raise_status: bool = False, crawl_status: Optional[Dict] = None) -> List[Dict]:
+        """
+        Fetch all users of a GraphQL connection (followers, following)
+        
+        A 429 puts the account in cooldown; the crawl continues from the same
+        cursor on another account, up to max_account_switches times, and
+        then stops with the users fetched so far.
+        
+        Args:
+            query: Connection to fetch (see graphql_paginator)
+            user_id: User whose connection is fetched
+            username: Username of user_id
+            max_items: Maximum number of users (None = all)
+            on_page: Optional callback called with the users of each page
+            raise_status: Raise PageStatusError on an unexpected status instead of
+                returning what was fetched so far
+            crawl_status: Optional dictionary whose 'complete' key is set to whether the
+                walk ended normally (not cut short by an error or the budget)
+        """
+        import requests
+        account = self._get_next_account()
+        budget = self._crawl_budget()
+        
+        users = []
+        complete = False
+        cursor, next_page, switches = None, 1, 0
+        try:
+            while True:
+                session = self._create_session(account)
+                paginator = GraphQLPaginator(self, account, session, query, user_id, username,
+                                             page_size=self.page_size, sizer=self._page_sizer(query),
+                                             max_items=max_items - len(users) if max_items else None, budget=budget,
+                                             pacer=RequestPacer(self.page_min_delay, self.page_max_delay),
+                                             start_cursor=cursor, start_page=next_page)
+                try:
+                    for page in paginator.pages():
+                        page_users = [user_record(node) for node in page.nodes if node.get('username')]
+                        if max_items:
+                            page_users = page_users[:max_items - len(users)]
+                        users.extend(page_users)
+                        cursor, next_page = page.end_cursor, page.number + 1
+                        if on_page:
+                            on_page(page_users)
                         
-                        logger.info(f"Fetched page {page_count}: {len(edges)} followers (Total: {len(followers)})")
+                        logger.info("Fetched %s page %d: %d users (Total: %d)",
+                                    query.name, page.number, len(page.nodes), len(users))
                         
-                        # Stop if we have enough followers
-                        if max_followers and len(followers) >= max_followers:
-                            followers = followers[:max_followers]
+                        # Stop if we have enough users
+                        if max_items and len(users) >= max_items:
                             break
-                        
-                        # Rate limiting delay
-                        if has_next_page:
-                            delay = random.uniform(3, 6)
-                            time.sleep(delay)
-                            
-                    except (json.JSONDecodeError, KeyError) as e:
-                        logger.error(f"Error parsing followers response: {e}")
-                        break
-                        
-                elif response.status_code == 429:
-                    logger.warning("Rate limited. Waiting longer...")
-                    time.sleep(30)
-                    continue
-                else:
-                    logger.warning(f"Failed to fetch followers: Status {response.status_code}")
-                    # Try HTML fallback
-                    return self._fetch_followers_html(username, max_followers)
-                    
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error fetching followers: {e}")
-                break
+                    complete = paginator.exhausted is None
+                    break
+                except PageStatusError as e:
+                    if e.status_code != 429:
+                        raise
+                if switches >= self.max_account_switches:
+                    logger.warning("Stopping %s of @%s: rate limited on %d accounts", query.name, username,
+                                   switches + 1)
+                    break
+                switches += 1
+                try:
+                    account = self._get_next_account(exclude=account)
+                except AccountsUnavailable as e:
+                    logger.warning("Stopping %s of @%s after a 429: %s", query.name, username, e)
+                    break
+                logger.warning("Rate limited on %s of @%s after %d users, continuing on account %s",
+                               query.name, username, len(users), account.name)
+        except PageStatusError as e:
+            if raise_status:
+                raise
+            logger.warning("Failed to fetch %s: Status %s", query.name, e.status_code)
+        except ValueError as e:
+            logger.error("Error parsing %s response: %s", query.name, e)
+        except requests.exceptions.RequestException as e:
+            logger.error("Request error fetching %s: %s", query.name, e)
         
-        logger.info(f"Total followers fetched: {len(followers)}")
-        return followers
+        if crawl_status is not None:
+            crawl_status["complete"] = complete
+        logger.info("Total %s fetched: %d", query.name, len(users))
+        self.persist_cookies()
+        return users
     
     def _fetch_followers_html(self, username: str, max_followers: Optional[int] = None) -> List[Dict]:
         """
@@ -159,7 +243,8 @@ class InstagramFollowersScraper(InstagramIDScraper):
         url = f"https://www.instagram.com/{username}/followers/"
         
         try:
-            response = session.get(url, timeout=30)
+            response = session.get(url, timeout=self._request_timeout())
+            self._sync_cookies(account, session)
             
             if response.status_code == 200:
                 # Handle Brotli compression
@@ -191,11 +276,11 @@ class InstagramFollowersScraper(InstagramIDScraper):
                         continue
                 
                 if followers:
-                    logger.info(f"Found {len(followers)} followers via HTML parsing")
+                    logger.info("Found %d followers via HTML parsing", len(followers))
                     return followers
                     
         except Exception as e:
-            logger.error(f"Error fetching followers from HTML: {e}")
+            logger.error("Error fetching followers from HTML: %s", e)
         
         return []
     
@@ -238,16 +323,64 @@ def main():
     import sys
     
     parser = argparse.ArgumentParser(description="Fetch Instagram followers")
-    parser.add_argument("username", help="Instagram username")
+    parser.add_argument("usernames", nargs="*", metavar="username",
+                        help="Instagram username(s); several targets are crawled concurrently")
+    parser.add_argument("--targets-file", help="File with one target username per line")
+    parser.add_argument("--workers", type=int,
+                        help="Targets crawled at the same time, one account each (default: one per account)")
     parser.add_argument("--max", type=int, help="Maximum number of followers to fetch")
-    parser.add_argument("--output", "-o", help="Output file (JSON)")
+    parser.add_argument("--max-requests", type=int,
+                        help="Stop a target's crawl after this many page requests (default: no limit)")
+    parser.add_argument("--max-minutes", type=float,
+                        help="Stop a target's crawl after this many minutes (default: no limit)")
+    parser.add_argument("--page-size", type=int,
+                        help="Users requested per page (default: tuned automatically)")
+    parser.add_argument("--following", action="store_true",
+                        help="Fetch the accounts the user follows instead of its followers")
+    parser.add_argument("--output", "-o",
+                        help="Output file (JSON unless --format is given); a directory with several targets")
+    parser.add_argument("--format", choices=SINK_FORMATS, default="json",
+                        help="Output file format (default: json, with a CSV copy alongside)")
     parser.add_argument("--accounts-file", default="accounts.json", help="Accounts JSON file")
+    parser.add_argument("--config-cache", action="store_true",
+                        help="Cache the parsed accounts file next to it for faster start-up")
+    parser.add_argument("--save-cookies", action="store_true",
+                        help="Write cookies refreshed by Instagram back to the accounts file")
+    parser.add_argument("--persist-state", action="store_true",
+                        help="Keep account usage and cooldowns in a state file next to the accounts file")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Probe all accounts in parallel first and skip dead ones")
+    parser.add_argument("--store",
+                        help="Also add the follower IDs to this follower-set store directory (see follower_sets.py)")
+    parser.add_argument("--progress", type=float,
+                        help="Write a progress line to stderr every this many seconds (default: off)")
+    add_tracing_arguments(parser)
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_logging_from_args(args)
+    
+    targets = list(args.usernames)
+    if args.targets_file:
+        with open(args.targets_file, 'r', encoding='utf-8') as f:
+            targets += [line.strip() for line in f if line.strip()]
+    if not targets:
+        parser.error("no username given")
+    if len(targets) > 1 and not args.output:
+        print("Error: crawling several targets requires --output DIRECTORY", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.format != "json" and not args.output:
+        print(f"Error: --format {args.format} requires --output", file=sys.stderr)
+        sys.exit(1)
+    if args.following and args.store:
+        print("Error: --store only holds follower sets and cannot be used with --following", file=sys.stderr)
+        sys.exit(1)
+    kind = "following" if args.following else "followers"
     
     # Load accounts
     try:
-        accounts = load_accounts_from_json(args.accounts_file)
+        accounts = load_accounts_from_json(args.accounts_file, use_cache=args.config_cache)
         if not accounts:
             print("Error: No accounts found", file=sys.stderr)
             sys.exit(1)
@@ -257,44 +390,159 @@ def main():
     
     # Create scraper
     scraper = InstagramFollowersScraper(accounts=accounts)
+    scraper.page_size = args.page_size
+    scraper.crawl_max_requests = args.max_requests
+    scraper.crawl_max_seconds = args.max_minutes * 60 if args.max_minutes else None
+    if args.save_cookies:
+        scraper.enable_cookie_writeback(args.accounts_file)
+    if args.persist_state:
+        scraper.state_store = load_runtime_state(accounts, accounts_file=args.accounts_file)
+    if args.trace:
+        scraper.enable_tracing(args.trace_sample, args.trace)
     
-    print(f"Fetching followers for @{args.username}...")
+    if args.preflight:
+        from session_preflight import run_preflight, format_readiness_table
+        print("Running pre-flight checks...")
+        print(format_readiness_table(run_preflight(scraper)))
+        if not any(acc.is_active for acc in accounts):
+            print("Error: No usable accounts after pre-flight", file=sys.stderr)
+            sys.exit(1)
+    
+    if len(targets) > 1:
+        _crawl_targets(scraper, targets, args, kind)
+        return
+    args.username = targets[0]
+    
+    print(f"Fetching {kind} for @{args.username}...")
     if args.max:
-        print(f"Limit: {args.max} followers")
+        print(f"Limit: {args.max} {kind}")
     
-    followers = scraper.get_followers(args.username, max_followers=args.max)
+    progress = None
+    if args.progress:
+        from capacity_planner import ProgressReporter
+        progress = ProgressReporter(args.max, label=kind, interval=args.progress)
+    
+    fetch = scraper.get_following if args.following else scraper.get_followers
+    crawl_status = {"complete": False}
+    try:
+        followers = fetch(args.username, args.max,
+                          on_page=(lambda page: progress.advance(len(page))) if progress else None,
+                          crawl_status=crawl_status)
+    except AccountsUnavailable as e:
+        print(f"Error: {e}", file=sys.stderr)
+        followers = []
+    if progress:
+        progress.finish()
+    if scraper.tracer:
+        scraper.tracer.close()
+    scraper.persist_cookies(force=True)
+    if scraper.state_store:
+        scraper.state_store.save(scraper.accounts, force=True)
     
     if not followers:
-        print("No followers found or account not accessible", file=sys.stderr)
+        print(f"No {kind} found or account not accessible", file=sys.stderr)
         sys.exit(1)
     
-    # Output results
-    output_data = {
-        "username": args.username,
-        "total_followers": len(followers),
-        "followers": followers
-    }
+    if args.store:
+        from follower_sets import FollowerSetStore
+        # Only a crawl that ran to the end without --max or a budget replaces the stored set
+        complete = (crawl_status["complete"] and args.max is None and args.max_requests is None
+                    and args.max_minutes is None)
+        if not complete:
+            print(f"Crawl of @{args.username} was limited or cut short, merging it into the stored set", file=sys.stderr)
+        result = FollowerSetStore(args.store).add_followers(args.username, followers, replace=complete)
+        print(f"✓ Follower set of @{args.username} in {args.store}: "
+              f"+{result['added']} -{result['removed']} ({result['total']} total)", file=sys.stderr)
     
-    output_json = json.dumps(output_data, indent=2)
+    if not args.output:
+        output_data = {
+            "username": args.username,
+            f"total_{kind}": len(followers),
+            kind: followers
+        }
+        print(f"\nFound {len(followers)} {kind}:")
+        print(json.dumps(output_data, indent=2))
+        return
     
-    if args.output:
-        with open(args.output, 'w') as f:
-            f.write(output_json)
-        print(f"\n✓ Saved {len(followers)} followers to {args.output}")
-    else:
-        print(f"\nFound {len(followers)} followers:")
-        print(output_json)
+    _write_users(args.username, followers, kind, args.output, args.format)
+
+
+def _write_users(username: str, users: List[Dict], kind: str, output: str, output_format: str):
+    """Write one target's followers/following with an output sink (plus a CSV copy of JSON output)"""
+    sink_kwargs = {}
+    if output_format == "json":
+        sink_kwargs = {"array_key": kind, "header": {"username": username}}
+    with create_sink(output_format, output, FOLLOWER_FIELDS, **sink_kwargs) as sink:
+        sink.write_many(users)
+        sink.trailer = {f"total_{kind}": len(users)}
+    print(f"\n✓ Saved {len(users)} {kind} to {output}")
     
     # Also save as CSV-friendly format
-    if args.output:
-        csv_file = args.output.replace('.json', '.csv')
-        with open(csv_file, 'w') as f:
-            f.write("username,user_id,full_name,is_verified\n")
-            for follower in followers:
-                f.write(f"{follower['username']},{follower.get('user_id', '')},{follower.get('full_name', '').replace(',', ' ')},{follower.get('is_verified', False)}\n")
+    if output_format == "json":
+        csv_file = str(Path(output).with_suffix('.csv'))
+        if csv_file == output:
+            # JSON written to a .csv name; the copy would overwrite it
+            csv_file = str(Path(output).with_suffix('.copy.csv'))
+        with create_sink("csv", csv_file, FOLLOWER_FIELDS) as sink:
+            sink.write_many(users)
         print(f"✓ Also saved CSV format to {csv_file}")
 
 
+def _crawl_targets(scraper: InstagramFollowersScraper, targets: List[str], args, kind: str):
+    """Multi-target mode of main(): crawl all targets concurrently and write one file per target"""
+    import sys
+    from follower_crawler import MultiTargetCrawler
+    
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    extension = {"json": "json", "csv": "csv", "ndjson.gz": "ndjson.gz", "sqlite": "db"}.get(args.format, args.format)
+    store = None
+    if args.store:
+        from follower_sets import FollowerSetStore
+        store = FollowerSetStore(args.store)
+    
+    # As in single-target mode, only a finished crawl without --max or a budget replaces the stored set
+    complete = args.max is None and args.max_requests is None and args.max_minutes is None
+    
+    progress = None
+    if args.progress:
+        from capacity_planner import ProgressReporter
+        progress = ProgressReporter(None, label=kind, interval=args.progress)
+    
+    # Targets finish on several crawl threads at once; the store's manifest is not thread-safe
+    write_lock = threading.Lock()
+    
+    def write_target(target, users, summary):
+        with write_lock:
+            if not users:
+                print(f"✗ @{target}: {summary['status']} ({summary.get('error', 'no users')})", file=sys.stderr)
+                return
+            _write_users(target, users, kind, str(output_dir / f"{target}.{extension}"), args.format)
+            if store is not None and summary["status"] == "done":
+                store.add_followers(target, users, replace=complete)
+    
+    crawler = MultiTargetCrawler(scraper, workers=args.workers, max_items=args.max,
+                                 query=FOLLOWING if args.following else FOLLOWERS,
+                                 on_page=(lambda target, page: progress.advance(len(page))) if progress else None,
+                                 on_target=write_target)
+    print(f"Crawling {kind} of {len(targets)} targets...")
+    summaries = crawler.run(targets)
+    if progress:
+        progress.finish()
+    if scraper.tracer:
+        scraper.tracer.close()
+    scraper.persist_cookies(force=True)
+    if scraper.state_store:
+        scraper.state_store.save(scraper.accounts, force=True)
+    
+    with open(output_dir / "crawl_summary.json", 'w') as f:
+        json.dump(summaries, f, indent=2)
+    done = sum(1 for summary in summaries.values() if summary["status"] == "done")
+    print(f"\nSummary: {done}/{len(summaries)} targets complete, "
+          f"{sum(summary['count'] for summary in summaries.values())} {kind} (see {output_dir / 'crawl_summary.json'})")
+    if not done:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
 
@@ -3,24 +3,43 @@ Instagram User ID Scraper with Account and Proxy Rotation
 Fetches user IDs from Instagram usernames using authenticated sessions
 """
 
-import requests
 import json
 import time
 import random
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
-from datetime import datetime
+import threading
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from logging_setup import SAMPLED
+
+if TYPE_CHECKING:
+    # requests is most of the import time of the CLIs, so it is imported on first network use
+    import requests
+
+# The library only emits records; applications configure handlers
+# (the command-line tools use logging_setup.configure_logging)
 logger = logging.getLogger(__name__)
 
 
+class AccountsUnavailable(Exception):
+    """No account may send a request now: all are inactive, cooling down or at their daily limit"""
+
+    def __init__(self, message: str, retry_at: Optional[datetime] = None):
+        """
+        Args:
+            message: Reason
+            retry_at: When the first account becomes usable again (None if no account will)
+        """
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
 @dataclass
 class InstagramAccount:
     """Represents an Instagram account with its session data"""
@@ -32,6 +51,8 @@ class InstagramAccount:
     last_used: Optional[datetime] = None
     request_count: int = 0
     error_count: int = 0
+    cooldown_until: Optional[datetime] = None  # Not used for new requests before this time
+    daily_requests: Dict[str, int] = field(default_factory=dict)  # ISO date -> requests made that day
 
 
 @dataclass
@@ -44,6 +65,8 @@ class Proxy:
     protocol: str = "http"
     is_active: bool = True
     error_count: int = 0
+    request_count: int = 0
+    last_used: Optional[datetime] = None
     
     def to_dict(self) -> Dict[str, str]:
         """Convert proxy to dictionary format for requests"""
@@ -57,6 +80,217 @@ class Proxy:
         }
 
 
+def find_user_id_in_json(data: any, username: str) -> Optional[str]:
+    """Recursively search for user ID in JSON structure"""
+    if isinstance(data, dict):
+        # Check if this dict has both id and username matching
+        if 'id' in data and 'username' in data:
+            if str(data.get('username', '')).lower() == username.lower():
+                user_id = str(data.get('id', ''))
+                if user_id.isdigit() and len(user_id) >= 8:
+                    return user_id
+        # Recursively search in values
+        for value in data.values():
+            result = find_user_id_in_json(value, username)
+            if result:
+                return result
+    elif isinstance(data, list):
+        for item in data:
+            result = find_user_id_in_json(item, username)
+            if result:
+                return result
+    return None
+
+
+def decode_body(body: bytes, content_encoding: str) -> str:
+    """
+    Decode a profile page body to text
+    
+    Handles Brotli and gzip bodies that were not already decompressed by
+    requests, and falls back to plain UTF-8.
+    """
+    content_encoding = (content_encoding or '').lower()
+    fallback = body.decode('utf-8', errors='ignore')
+    content = None
+    
+    if 'br' in content_encoding or 'brotli' in content_encoding:
+        # Instagram uses Brotli compression
+        try:
+            import brotli
+            content = brotli.decompress(body).decode('utf-8', errors='ignore')
+        except ImportError:
+            logger.warning("brotli module not installed. Install with: pip install brotli")
+            # Try to use the raw text (may fail)
+            content = fallback
+        except Exception as e:
+            logger.debug("Brotli decompression failed: %s", e)
+            content = fallback
+    elif 'gzip' in content_encoding:
+        import gzip
+        try:
+            content = gzip.decompress(body).decode('utf-8', errors='ignore')
+        except Exception as e:
+            logger.debug("Gzip decompression failed: %s", e)
+            content = fallback
+    elif 'deflate' in content_encoding:
+        import zlib
+        try:
+            content = zlib.decompress(body).decode('utf-8', errors='ignore')
+        except zlib.error:
+            try:
+                # Some servers send raw deflate data without the zlib header
+                content = zlib.decompress(body, -zlib.MAX_WBITS).decode('utf-8', errors='ignore')
+            except zlib.error as e:
+                logger.debug("Deflate decompression failed: %s", e)
+                content = fallback
+    else:
+        # No compression or already decompressed by requests
+        content = fallback
+    
+    # Fallback: if content still looks binary, try manual decompression
+    if content and len(content) > 0 and (ord(content[0]) < 32 or not content[:200].isprintable()):
+        try:
+            import brotli
+            content = brotli.decompress(body).decode('utf-8', errors='ignore')
+        except:
+            try:
+                import gzip
+                content = gzip.decompress(body).decode('utf-8', errors='ignore')
+            except:
+                content = body.decode('utf-8', errors='ignore')
+    
+    return content
+
+
+def extract_user_id(content: str, username: str) -> Optional[str]:
+    """
+    Extract a user ID from the HTML of a profile page
+    
+    Pure function (no network, no scraper state), so it can run in a
+    separate process.
+    
+    Args:
+        content: Decoded HTML of https://www.instagram.com/<username>/
+        username: Instagram username the page belongs to
+        
+    Returns:
+        User ID as string, or None if no pattern matched
+    """
+    # Method 1: Look for window._sharedData pattern (older Instagram)
+    if 'window._sharedData' in content:
+        start = content.find('window._sharedData = ') + len('window._sharedData = ')
+        end = content.find(';</script>', start)
+        if end > start:
+            try:
+                data_str = content[start:end]
+                data = json.loads(data_str)
+                user_id = data.get('entry_data', {}).get('ProfilePage', [{}])[0].get('graphql', {}).get('user', {}).get('id')
+                if user_id:
+                    logger.info("Successfully fetched ID for @%s via _sharedData: %s", username, user_id, extra=SAMPLED)
+                    return str(user_id)
+            except (json.JSONDecodeError, KeyError, IndexError) as e:
+                logger.debug("Failed to parse _sharedData: %s", e)
+    
+    # Method 2: Look for profilePage pattern
+    if '"profilePage_' in content:
+        start = content.find('"profilePage_') + len('"profilePage_')
+        end = content.find('"', start)
+        if end > start:
+            user_id = content[start:end]
+            logger.info("Successfully fetched ID for @%s via profilePage pattern: %s", username, user_id, extra=SAMPLED)
+            return user_id
+    
+    # Method 3: Look for various JSON patterns in script tags
+    # Try to find JSON data structures containing user info
+    json_patterns = [
+        # Pattern: "id":"123456789" near username
+        r'"id":"(\d+)"[^}]{0,500}?"username":"' + re.escape(username) + '"',
+        r'"username":"' + re.escape(username) + r'"[^}]{0,500}?"id":"(\d+)"',
+        # Pattern: profilePage_123456789
+        r'"profilePage_(\d+)"',
+        # Pattern: "user_id":"123456789"
+        r'"user_id":"(\d+)"',
+        # Pattern: "owner":{"id":"123456789"}
+        r'"owner":\s*\{\s*"id":"(\d+)"',
+        # Pattern: "profile_id":"123456789"
+        r'"profile_id":"(\d+)"',
+        # Pattern: "pk":"123456789" (primary key)
+        r'"pk":"(\d+)"[^}]{0,500}?"username":"' + re.escape(username) + '"',
+        r'"username":"' + re.escape(username) + r'"[^}]{0,500}?"pk":"(\d+)"',
+    ]
+    
+    for pattern in json_patterns:
+        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
+        if matches:
+            # Filter matches - user IDs are typically 8-15 digits
+            for match in matches:
+                if match.isdigit() and len(match) >= 8:
+                    user_id = match
+                    logger.info("Successfully fetched ID for @%s via JSON pattern: %s", username, user_id, extra=SAMPLED)
+                    return user_id
+    
+    # Method 4: Look for script tags with JSON data
+    script_tag_pattern = r'<script[^>]*type=["\']application/json["\'][^>]*>(.*?)</script>'
+    script_matches = re.findall(script_tag_pattern, content, re.IGNORECASE | re.DOTALL)
+    for script_content in script_matches:
+        try:
+            script_data = json.loads(script_content)
+            # Recursively search for user ID in JSON structure
+            user_id = find_user_id_in_json(script_data, username)
+            if user_id:
+                logger.info("Successfully fetched ID for @%s via script JSON: %s", username, user_id, extra=SAMPLED)
+                return str(user_id)
+        except (json.JSONDecodeError, TypeError):
+            continue
+    
+    # Method 5: Look for data attributes or meta tags
+    meta_patterns = [
+        r'<meta[^>]*property=["\']al:ios:url["\'][^>]*content=["\'].*?/user/(\d+)/',
+        r'data-user-id=["\'](\d+)["\']',
+    ]
+    for pattern in meta_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            user_id = match.group(1)
+            if user_id.isdigit() and len(user_id) >= 8:
+                logger.info("Successfully fetched ID for @%s via meta/data pattern: %s", username, user_id, extra=SAMPLED)
+                return user_id
+    
+    logger.debug("Could not find user ID in HTML for @%s. HTML length: %d", username, len(content))
+    return None
+
+
+def read_raw_body(response) -> bytes:
+    """
+    Read the body of a streamed response as it was sent
+
+    The bytes are still compressed as the Content-Encoding header says, so
+    decode_body can decompress them later (or in another process). Responses
+    whose body was already loaded return their content.
+    """
+    raw = getattr(response, "raw", None)
+    if raw is None or getattr(response, "_content_consumed", True):
+        return response.content
+    import requests
+    from urllib3.exceptions import ProtocolError, ReadTimeoutError, SSLError
+    # Same exceptions as response.content raises
+    try:
+        return raw.read(decode_content=False)
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except SSLError as e:
+        raise requests.exceptions.SSLError(e)
+    finally:
+        response.close()
+
+
+def extract_user_id_from_body(body: bytes, content_encoding: str, username: str) -> Optional[str]:
+    """Decode a raw profile page body and extract the user ID from it"""
+    return extract_user_id(decode_body(body, content_encoding), username)
+
+
 class InstagramIDScraper:
     """
     Instagram User ID Scraper with account and proxy rotation
@@ -79,6 +313,58 @@ class InstagramIDScraper:
         self.min_delay = 2  # Minimum seconds between requests
         self.max_delay = 5  # Maximum seconds between requests
         self.max_errors_per_account = 10  # Switch account after this many errors
+        self.rate_limit_cooldown = 900  # Seconds an account rests after a 429
+        self.max_requests_per_account_per_day: Optional[int] = None  # Daily cap per account (None = no cap)
+        self.max_account_wait = 900  # Seconds to wait for a cooling-down account before giving up
+        
+        # Timeouts
+        self.connect_timeout = 10  # Seconds to establish a connection (through the proxy)
+        self.read_timeout = 30  # Seconds to wait for response data
+        self.lookup_deadline: Optional[float] = None  # Total seconds per username across retries (None = no deadline)
+        
+        # Clock behind delays, deadlines and cooldowns (simulator.py swaps in virtual time)
+        self._time = time.time
+        self._sleep = time.sleep
+        self._now = datetime.now
+        
+        # Hedged requests: if a lookup is slower than this percentile of recent
+        # latencies, a second attempt is started on another account/proxy pair
+        self.hedge_percentile: Optional[float] = None  # e.g. 0.95 (None = disabled)
+        self.hedge_min_samples = 20  # Latencies needed before hedging starts
+        self._latencies = deque(maxlen=500)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Sticky account-proxy affinity (see enable_proxy_affinity)
+        self.proxy_affinity = False
+        self._affinity: Dict[str, Proxy] = {}  # Account name -> bound proxy
+        self._sessions: Dict[Tuple[str, str], "requests.Session"] = {}  # Reused sessions per account/proxy pair
+        
+        # Guards account/proxy selection and bookkeeping when lookups run concurrently
+        self._lock = threading.RLock()
+        
+        # Usernames that recently got a 404, with its time (see confirmed_not_found)
+        self._not_found: "OrderedDict[str, float]" = OrderedDict()
+        self._not_found_limit = 10000
+        
+        # Optional RuntimeStateStore (see config_loader.load_runtime_state)
+        self.state_store = None
+        
+        # Optional read-only IDIndex checked before any request (see enable_id_index)
+        self.id_index_path: Optional[str] = None
+        self.id_index = None
+        
+        # Optional Tracer recording per-phase spans of each lookup (see enable_tracing)
+        self.tracer = None
+        self.trace_path: Optional[str] = None
+        self.trace_sample_rate = 1.0
+        
+        # Cookie write-back (see enable_cookie_writeback)
+        self.cookie_file: Optional[str] = None
+        self._file_session_ids: Dict[str, str] = {}  # Session ID of each account in cookie_file
+        self.cookie_persist_interval = 300  # Seconds between writes of refreshed cookies
+        self._cookies_dirty = False
+        self._last_cookie_persist = time.time()
+        self._cookie_lock = threading.Lock()
         
         # Statistics
         self.stats = {
@@ -86,24 +372,82 @@ class InstagramIDScraper:
             "successful_requests": 0,
             "failed_requests": 0,
             "account_switches": 0,
-            "proxy_switches": 0
+            "proxy_switches": 0,
+            "hedged_requests": 0,
+            "hedge_wins": 0,
+            "index_hits": 0,
+            "config_reloads": 0
         }
+        
+        # Optional ConfigWatcher applying edits of the accounts/proxies files (see watch_config)
+        self.config_watcher = None
     
-    def _get_next_account(self) -> InstagramAccount:
-        """Get the next available account in rotation"""
+    def _get_next_account(self, exclude: Optional[InstagramAccount] = None, wait: bool = True,
+                          deadline: Optional[float] = None) -> InstagramAccount:
+        """
+        Get the next available account in rotation (other than `exclude` if possible)
+        
+        If every account is cooling down or at its daily limit, waits until the
+        first one is usable again, as long as that is within max_account_wait
+        and before `deadline` (a self._time() value).
+        
+        Raises:
+            AccountsUnavailable: No account is usable (or will be soon enough, or `wait` is False)
+        """
+        while True:
+            try:
+                with self._lock:
+                    return self._select_account(exclude)
+            except AccountsUnavailable as e:
+                if not wait or e.retry_at is None:
+                    raise
+                seconds = (e.retry_at - self._now()).total_seconds()
+                max_wait = self.max_account_wait
+                if deadline is not None:
+                    max_wait = min(max_wait, deadline - self._time())
+                if seconds > max_wait:
+                    raise
+                logger.warning("%s, waiting %.0fs", e, seconds)
+                self._sleep(max(seconds, 0.1))
+    
+    def _select_account(self, exclude: Optional[InstagramAccount] = None) -> InstagramAccount:
         active_accounts = [acc for acc in self.accounts if acc.is_active]
+        if exclude is not None and len(active_accounts) > 1:
+            active_accounts = [acc for acc in active_accounts if acc is not exclude]
         
         if not active_accounts:
-            raise Exception("No active accounts available")
+            raise AccountsUnavailable("No active accounts available")
+        
+        # Skip accounts that are cooling down or have used up today's budget
+        now = self._now()
+        today = now.date().isoformat()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        ready_at = {}
+        for acc in active_accounts:
+            ready = now
+            if acc.cooldown_until is not None and acc.cooldown_until > now:
+                ready = acc.cooldown_until
+            if self.max_requests_per_account_per_day is not None \
+                    and acc.daily_requests.get(today, 0) >= self.max_requests_per_account_per_day:
+                ready = max(ready, tomorrow)
+            ready_at[acc.name] = ready
+        ready_accounts = [acc for acc in active_accounts if ready_at[acc.name] <= now]
+        if not ready_accounts:
+            raise AccountsUnavailable("All active accounts are cooling down or at their daily limit",
+                                      retry_at=min(ready_at.values()))
         
         # Find account with least recent usage
-        account = min(active_accounts, key=lambda a: a.request_count)
+        account = min(ready_accounts, key=lambda a: a.request_count)
         self.current_account_index = self.accounts.index(account)
         
         return account
     
     def _get_next_proxy(self) -> Optional[Proxy]:
         """Get the next available proxy in rotation"""
+        with self._lock:
+            return self._select_proxy()
+    
+    def _select_proxy(self) -> Optional[Proxy]:
         if not self.proxies:
             return None
         
@@ -118,8 +462,106 @@ class InstagramIDScraper:
         
         return proxy
     
-    def _create_session(self, account: InstagramAccount, proxy: Optional[Proxy] = None) -> requests.Session:
+    @staticmethod
+    def _proxy_key(proxy: Optional[Proxy]) -> str:
+        return f"{proxy.host}:{proxy.port}" if proxy else "direct"
+    
+    def enable_proxy_affinity(self, prewarm: bool = True):
+        """
+        Bind every account to a stable proxy and reuse one session per pair
+        
+        Each account keeps sending its cookies from the same IP, and its
+        connections stay open between requests. If an account's proxy is
+        deactivated, the account is moved to the least-used active proxy.
+        
+        Args:
+            prewarm: Open (and TLS-handshake) a connection for every pair right away
+        """
+        with self._lock:
+            self.proxy_affinity = True
+            active_proxies = [p for p in self.proxies if p.is_active]
+            if active_proxies:
+                for i, account in enumerate(self.accounts):
+                    self._affinity[account.name] = active_proxies[i % len(active_proxies)]
+        if prewarm:
+            self.prewarm_connections()
+    
+    def _proxy_for(self, account: InstagramAccount) -> Optional[Proxy]:
+        """Proxy to use with an account: its bound proxy in affinity mode, otherwise the next in rotation"""
+        if not self.proxy_affinity:
+            return self._get_next_proxy()
+        
+        with self._lock:
+            proxy = self._affinity.get(account.name)
+            if proxy is not None and proxy.is_active:
+                return proxy
+            
+            active_proxies = [p for p in self.proxies if p.is_active]
+            if not active_proxies:
+                if self.proxies:
+                    logger.warning("No active proxies available, continuing without proxy")
+                return None
+            
+            # Fail over to the active proxy with the fewest bound accounts
+            load = {id(p): 0 for p in active_proxies}
+            for bound in self._affinity.values():
+                if id(bound) in load:
+                    load[id(bound)] += 1
+            new_proxy = min(active_proxies, key=lambda p: load[id(p)])
+            if proxy is not None:
+                logger.warning("Proxy %s is down, moving account %s to %s", self._proxy_key(proxy), account.name,
+                               self._proxy_key(new_proxy))
+                self.stats["proxy_switches"] += 1
+                old_session = self._sessions.pop((account.name, self._proxy_key(proxy)), None)
+                if old_session is not None:
+                    old_session.close()
+            self._affinity[account.name] = new_proxy
+            return new_proxy
+    
+    def _get_session(self, account: InstagramAccount, proxy: Optional[Proxy] = None) -> "requests.Session":
+        """Session for an account/proxy pair: reused in affinity mode, new otherwise"""
+        if not self.proxy_affinity:
+            return self._create_session(account, proxy)
+        key = (account.name, self._proxy_key(proxy))
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session(account, proxy)
+                self._sessions[key] = session
+            return session
+    
+    def prewarm_connections(self, max_workers: int = 16, timeout: float = 10) -> int:
+        """
+        Open a connection for every active account/proxy pair in parallel
+        
+        Each pair's session sends one HEAD request, so the TCP/TLS handshake
+        (including the proxy CONNECT) is done before real lookups start.
+        
+        Returns:
+            Number of pairs that connected
+        """
+        import requests
+        pairs = [(acc, self._proxy_for(acc)) for acc in self.accounts if acc.is_active]
+        
+        def warm(pair):
+            account, proxy = pair
+            session = self._get_session(account, proxy)
+            try:
+                session.head("https://www.instagram.com/", timeout=timeout, allow_redirects=False)
+                self._sync_cookies(account, session)
+                return True
+            except requests.exceptions.RequestException as e:
+                logger.debug("Pre-warming %s via %s failed: %s", account.name, self._proxy_key(proxy), e)
+                return False
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            warmed = sum(executor.map(warm, pairs))
+        logger.info("Pre-warmed %d/%d account/proxy connection(s)", warmed, len(pairs))
+        return warmed
+    
+    def _create_session(self, account: InstagramAccount, proxy: Optional[Proxy] = None) -> "requests.Session":
         """Create a requests session with account cookies and optional proxy"""
+        import requests
         session = requests.Session()
         
         # Set cookies
@@ -148,28 +590,334 @@ class InstagramIDScraper:
         
         return session
     
+    def _sync_cookies(self, account: InstagramAccount, session: "requests.Session"):
+        """Merge cookies rotated by Instagram (Set-Cookie) back into the account"""
+        with self._cookie_lock:
+            for cookie in session.cookies:
+                if cookie.domain and 'instagram.com' not in cookie.domain:
+                    continue
+                if cookie.value and account.cookies.get(cookie.name) != cookie.value:
+                    account.cookies[cookie.name] = cookie.value
+                    if cookie.name == 'sessionid':
+                        account.session_id = cookie.value
+                    self._cookies_dirty = True
+    
+    def enable_id_index(self, path: str):
+        """
+        Answer lookups from a prebuilt ID index before scraping
+        
+        The index file is memory-mapped, so every process that enables the
+        same file shares it through the page cache (see id_index.py).
+        
+        Args:
+            path: Index file written by id_index.py
+        """
+        from id_index import IDIndex
+        self.id_index = IDIndex(path)
+        self.id_index_path = path
+    
+    def enable_tracing(self, sample_rate: float = 1.0, path: Optional[str] = None):
+        """
+        Record timed spans for the phases of each lookup
+        
+        Each sampled lookup produces a "lookup" trace with the spans
+        "connect_ttfb" (connection setup, request and waiting for the response
+        headers), "download" (reading the body), "decompress" and "extract".
+        See tracing.py.
+        
+        Args:
+            sample_rate: Fraction of lookups to trace (0-1)
+            path: Optional JSON lines file the spans are appended to
+        """
+        from tracing import Tracer
+        self.tracer = Tracer(sample_rate=sample_rate, path=path)
+        self.trace_path = path
+        self.trace_sample_rate = sample_rate
+    
+    def _span(self, name: str, **attrs):
+        """A tracing span, or a no-op context when tracing is off"""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, **attrs)
+    
+    def _lookup_index(self, username: str) -> Optional[str]:
+        """User ID from the ID index, or None if there is no index or the username is not in it"""
+        if self.id_index is None:
+            return None
+        user_id = self.id_index.get(username)
+        if user_id:
+            with self._lock:
+                self.stats["index_hits"] += 1
+        return user_id
+    
+    def apply_config(self, accounts: Optional[List[InstagramAccount]] = None,
+                     proxies: Optional[List[Proxy]] = None) -> Dict[str, int]:
+        """
+        Replace the account and/or proxy pool while the scraper is running
+        
+        Accounts are matched by name and proxies by host:port. Matched entries
+        keep their objects, counters and cooldowns. New entries join the
+        rotation, with their saved runtime state if a state store is set.
+        Removed entries are taken out of the rotation. Requests already running
+        on them finish normally, and their cached sessions are dropped. An account
+        whose session ID changed (fresh cookies) gets the new cookies in place
+        and is reactivated. Other cookie differences are ignored, because the
+        running scraper's cookies may be newer than the file's. Both lists are
+        swapped under the scraper lock, so a lookup never sees a half-applied
+        change.
+        
+        Args:
+            accounts: New account list (None = keep the accounts)
+            proxies: New proxy list (None = keep the proxies)
+        
+        Returns:
+            Counts of accounts/proxies added, removed and updated
+        """
+        changes = {"accounts_added": 0, "accounts_removed": 0, "accounts_updated": 0,
+                   "proxies_added": 0, "proxies_removed": 0, "proxies_updated": 0}
+        added_accounts: List[InstagramAccount] = []
+        added_proxies: List[Proxy] = []
+        with self._lock:
+            stale_sessions = set()
+            
+            new_accounts = self.accounts
+            if accounts is not None:
+                current = {acc.name: acc for acc in self.accounts}
+                new_accounts = []
+                with self._cookie_lock:
+                    # The reloaded file is what cookie write-back compares against
+                    self._file_session_ids.update((loaded.name, loaded.session_id) for loaded in accounts)
+                for loaded in accounts:
+                    account = current.pop(loaded.name, None)
+                    if account is None:
+                        new_accounts.append(loaded)
+                        added_accounts.append(loaded)
+                        continue
+                    if loaded.session_id and loaded.session_id != account.session_id:
+                        with self._cookie_lock:
+                            account.cookies = dict(loaded.cookies)
+                            account.session_id = loaded.session_id
+                        account.user_agent = loaded.user_agent
+                        account.is_active = True
+                        account.error_count = 0
+                        account.cooldown_until = None
+                        stale_sessions.update(key for key in self._sessions if key[0] == account.name)
+                        changes["accounts_updated"] += 1
+                    new_accounts.append(account)
+                for removed in current.values():
+                    stale_sessions.update(key for key in self._sessions if key[0] == removed.name)
+                    self._affinity.pop(removed.name, None)
+                changes["accounts_added"] = len(added_accounts)
+                changes["accounts_removed"] = len(current)
+            
+            new_proxies = self.proxies
+            if proxies is not None:
+                current_proxies = {self._proxy_key(p): p for p in self.proxies or []}
+                new_proxies = []
+                for loaded in proxies:
+                    key = self._proxy_key(loaded)
+                    proxy = current_proxies.pop(key, None)
+                    if proxy is None:
+                        new_proxies.append(loaded)
+                        added_proxies.append(loaded)
+                        continue
+                    if (loaded.username, loaded.password, loaded.protocol) != (proxy.username, proxy.password,
+                                                                               proxy.protocol):
+                        proxy.username, proxy.password, proxy.protocol = loaded.username, loaded.password, loaded.protocol
+                        proxy.is_active = True
+                        proxy.error_count = 0
+                        stale_sessions.update(k for k in self._sessions if k[1] == key)
+                        changes["proxies_updated"] += 1
+                    new_proxies.append(proxy)
+                for key, removed in current_proxies.items():
+                    stale_sessions.update(k for k in self._sessions if k[1] == key)
+                    for name in [name for name, bound in self._affinity.items() if bound is removed]:
+                        # Rebound to an active proxy on the account's next request
+                        del self._affinity[name]
+                changes["proxies_added"] = len(added_proxies)
+                changes["proxies_removed"] = len(current_proxies)
+            
+            if self.state_store and (added_accounts or added_proxies):
+                self.state_store.apply(added_accounts, added_proxies)
+            
+            # Sessions in use by running requests stay open until those finish
+            for key in stale_sessions:
+                self._sessions.pop(key, None)
+            self.accounts = new_accounts
+            self.proxies = new_proxies
+            if any(changes.values()):
+                self.stats["config_reloads"] += 1
+        
+        if any(changes.values()):
+            logger.info("Applied configuration change: %s",
+                        ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in changes.items() if count))
+        return changes
+    
+    def watch_config(self, accounts_file: Optional[str] = None, proxies_file: Optional[str] = None,
+                     interval: float = 5):
+        """
+        Apply edits of the accounts and proxies files while running (see apply_config)
+        
+        Args:
+            accounts_file: Accounts JSON file to watch
+            proxies_file: Proxies JSON file to watch
+            interval: Seconds between checks of the files
+        """
+        from config_watcher import ConfigWatcher
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+        self.config_watcher = ConfigWatcher(self, accounts_file, proxies_file, interval=interval)
+        self.config_watcher.start()
+    
+    def enable_cookie_writeback(self, accounts_file: str, interval: float = 300):
+        """
+        Periodically save refreshed cookies back to the accounts JSON file
+        
+        Entries whose session ID in the file changed since the accounts were
+        loaded are not overwritten, so cookies pasted into the file while the
+        scraper runs are kept (and picked up by watch_config).
+        
+        Args:
+            accounts_file: Path of the accounts.json the accounts were loaded from
+            interval: Minimum seconds between writes
+        """
+        self.cookie_file = accounts_file
+        self.cookie_persist_interval = interval
+        with self._cookie_lock:
+            self._file_session_ids = {acc.name: acc.session_id for acc in self.accounts}
+    
+    def persist_cookies(self, force: bool = False) -> bool:
+        """
+        Write refreshed cookies to the accounts file if any changed
+        
+        Args:
+            force: Write now even if the persist interval has not elapsed
+            
+        Returns:
+            True if the file was written
+        """
+        if not self.cookie_file or not self._cookies_dirty:
+            return False
+        if not force and time.time() - self._last_cookie_persist < self.cookie_persist_interval:
+            return False
+        
+        from config_loader import save_account_cookies_to_json
+        
+        with self._cookie_lock:
+            try:
+                self._file_session_ids = save_account_cookies_to_json(self.accounts, self.cookie_file,
+                                                                      self._file_session_ids)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not save refreshed cookies to %s: %s", self.cookie_file, e)
+                return False
+            self._cookies_dirty = False
+            self._last_cookie_persist = time.time()
+        logger.debug("Saved refreshed cookies to %s", self.cookie_file)
+        return True
+    
     def _find_user_id_in_json(self, data: any, username: str) -> Optional[str]:
         """Recursively search for user ID in JSON structure"""
-        if isinstance(data, dict):
-            # Check if this dict has both id and username matching
-            if 'id' in data and 'username' in data:
-                if str(data.get('username', '')).lower() == username.lower():
-                    user_id = str(data.get('id', ''))
-                    if user_id.isdigit() and len(user_id) >= 8:
-                        return user_id
-            # Recursively search in values
-            for value in data.values():
-                result = self._find_user_id_in_json(value, username)
-                if result:
-                    return result
-        elif isinstance(data, list):
-            for item in data:
-                result = self._find_user_id_in_json(item, username)
-                if result:
-                    return result
-        return None
+        return find_user_id_in_json(data, username)
     
-    def _fetch_user_id(self, username: str, account: InstagramAccount, proxy: Optional[Proxy] = None) -> Optional[str]:
+    def _download_profile(self, session: "requests.Session", username: str,
+                          timeout: Optional[Tuple[float, float]] = None
+                          ) -> Optional[Tuple["requests.Response", bytes]]:
+        """
+        Download a profile page, following redirects manually
+        
+        Args:
+            session: Session to use
+            username: Instagram username
+            timeout: (connect, read) timeout, defaults to the scraper's timeouts
+        
+        Returns:
+            The final response and its body as sent (still compressed, see
+            decode_body), or None if Instagram redirected to the login page
+        """
+        url = f"https://www.instagram.com/{username}/"
+        
+        # Handle redirects manually to avoid infinite loops
+        max_redirects = 5
+        redirect_count = 0
+        final_url = url
+        
+        while redirect_count < max_redirects:
+            # stream=True returns once the headers are in, so the body download is timed separately,
+            # and lets the body be read still compressed (decompression is timed, or done in another
+            # process, on its own). It costs nothing without tracing: the body is read in full right
+            # away, so the connection goes back to the pool just as without streaming.
+            with self._span("connect_ttfb", url=final_url) as span:
+                response = session.get(final_url, timeout=timeout or self._request_timeout(),
+                                       allow_redirects=False, stream=True)
+                if span:
+                    span.set(status=response.status_code)
+            with self._span("download") as span:
+                body = read_raw_body(response)
+                if span:
+                    span.set(bytes=len(body))
+            
+            # Handle redirects
+            if response.status_code in [301, 302, 303, 307, 308]:
+                redirect_count += 1
+                location = response.headers.get('Location', '')
+                if location:
+                    final_url = location
+                    # Handle relative URLs
+                    if final_url.startswith('/'):
+                        final_url = f"https://www.instagram.com{final_url}"
+                    # Check if redirecting to login (account might be private/invalid)
+                    if '/accounts/login' in final_url.lower():
+                        logger.warning("Redirected to login page - account @%s may be private or invalid", username)
+                        return None
+                    continue
+                else:
+                    break
+            elif response.status_code == 200:
+                break
+            else:
+                # Not a redirect, break and handle normally
+                break
+        
+        return response, body
+    
+    def _record_failed_status(self, username: str, account: InstagramAccount, status_code: int):
+        """Log a profile response that did not yield an ID and update the account's error count"""
+        if status_code == 429:
+            logger.warning("Rate limited (429) for account %s", account.name)
+            account.error_count += 1
+            account.cooldown_until = self._now() + timedelta(seconds=self.rate_limit_cooldown)
+        elif status_code == 401:
+            logger.warning("Unauthorized (401) for account %s - session may be invalid", account.name)
+            account.error_count += 1
+        elif status_code == 404:
+            logger.warning("User @%s not found (404)", username)
+            # Don't count 404 as an account error - user just doesn't exist
+            with self._lock:
+                self._not_found.pop(username.lower(), None)
+                self._not_found[username.lower()] = self._time()
+                if len(self._not_found) > self._not_found_limit:
+                    self._not_found.popitem(last=False)
+        else:
+            logger.warning("Failed to fetch ID for @%s: Status %s", username, status_code)
+            account.error_count += 1
+    
+    def confirmed_not_found(self, username: str, since: float) -> bool:
+        """
+        Whether a lookup of `username` got a 404 at or after `since`
+        
+        get_user_id returns None both for users that don't exist and for
+        failures (429s, network errors, exhausted retries); this tells them apart.
+        
+        Args:
+            username: Instagram username (without @)
+            since: Start of the lookup (a self._time() value, time.time() by default)
+        """
+        with self._lock:
+            seen = self._not_found.get(username.lstrip('@').strip().lower())
+        return seen is not None and seen >= since
+    
+    def _fetch_user_id(self, username: str, account: InstagramAccount, proxy: Optional[Proxy] = None,
+                       timeout: Optional[Tuple[float, float]] = None) -> Optional[str]:
         """
         Fetch user ID for a given username using the provided account and proxy
         
@@ -177,191 +925,164 @@ class InstagramIDScraper:
             username: Instagram username (without @)
             account: InstagramAccount to use for the request
             proxy: Optional Proxy to use
+            timeout: Optional (connect, read) timeout
             
         Returns:
             User ID as string, or None if failed
         """
-        session = self._create_session(account, proxy)
-        
-        # Method 1: Try scraping HTML page first (more reliable)
-        url = f"https://www.instagram.com/{username}/"
+        import requests
+        session = self._get_session(account, proxy)
         
         try:
-            # Handle redirects manually to avoid infinite loops
-            max_redirects = 5
-            redirect_count = 0
-            final_url = url
-            
-            while redirect_count < max_redirects:
-                response = session.get(final_url, timeout=30, allow_redirects=False)
-                
-                # Handle redirects
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    redirect_count += 1
-                    location = response.headers.get('Location', '')
-                    if location:
-                        final_url = location
-                        # Handle relative URLs
-                        if final_url.startswith('/'):
-                            final_url = f"https://www.instagram.com{final_url}"
-                        # Check if redirecting to login (account might be private/invalid)
-                        if '/accounts/login' in final_url.lower():
-                            logger.warning(f"Redirected to login page - account @{username} may be private or invalid")
-                            return None
-                        continue
-                    else:
-                        break
-                elif response.status_code == 200:
-                    break
-                else:
-                    # Not a redirect, break and handle normally
-                    break
+            downloaded = self._download_profile(session, username, timeout)
+            if downloaded is None:
+                return None
+            response, body = downloaded
             
             if response.status_code == 200:
                 # Try to extract user ID from page source
-                # Handle Brotli compression (Instagram uses 'br' encoding)
-                content_encoding = response.headers.get('Content-Encoding', '').lower()
-                content = None
-                
-                if 'br' in content_encoding or 'brotli' in content_encoding:
-                    # Instagram uses Brotli compression
-                    try:
-                        import brotli
-                        content = brotli.decompress(response.content).decode('utf-8', errors='ignore')
-                    except ImportError:
-                        logger.warning("brotli module not installed. Install with: pip install brotli")
-                        # Try to use response.text (may fail)
-                        content = response.text
-                    except Exception as e:
-                        logger.debug(f"Brotli decompression failed: {e}")
-                        content = response.text
-                elif 'gzip' in content_encoding:
-                    import gzip
-                    try:
-                        content = gzip.decompress(response.content).decode('utf-8', errors='ignore')
-                    except Exception as e:
-                        logger.debug(f"Gzip decompression failed: {e}")
-                        content = response.text
-                else:
-                    # No compression or already decompressed by requests
-                    content = response.text
-                
-                # Fallback: if content still looks binary, try manual decompression
-                if content and len(content) > 0 and (ord(content[0]) < 32 or not content[:200].isprintable()):
-                    try:
-                        import brotli
-                        content = brotli.decompress(response.content).decode('utf-8', errors='ignore')
-                    except:
-                        try:
-                            import gzip
-                            content = gzip.decompress(response.content).decode('utf-8', errors='ignore')
-                        except:
-                            content = response.content.decode('utf-8', errors='ignore')
-                
-                # Method 1: Look for window._sharedData pattern (older Instagram)
-                if 'window._sharedData' in content:
-                    start = content.find('window._sharedData = ') + len('window._sharedData = ')
-                    end = content.find(';</script>', start)
-                    if end > start:
-                        try:
-                            data_str = content[start:end]
-                            data = json.loads(data_str)
-                            user_id = data.get('entry_data', {}).get('ProfilePage', [{}])[0].get('graphql', {}).get('user', {}).get('id')
-                            if user_id:
-                                logger.info(f"Successfully fetched ID for @{username} via _sharedData: {user_id}")
-                                return str(user_id)
-                        except (json.JSONDecodeError, KeyError, IndexError) as e:
-                            logger.debug(f"Failed to parse _sharedData: {e}")
-                
-                # Method 2: Look for profilePage pattern
-                if '"profilePage_' in content:
-                    start = content.find('"profilePage_') + len('"profilePage_')
-                    end = content.find('"', start)
-                    if end > start:
-                        user_id = content[start:end]
-                        logger.info(f"Successfully fetched ID for @{username} via profilePage pattern: {user_id}")
-                        return user_id
-                
-                # Method 3: Look for various JSON patterns in script tags
-                # Try to find JSON data structures containing user info
-                json_patterns = [
-                    # Pattern: "id":"123456789" near username
-                    r'"id":"(\d+)"[^}]{0,500}?"username":"' + re.escape(username) + '"',
-                    r'"username":"' + re.escape(username) + r'"[^}]{0,500}?"id":"(\d+)"',
-                    # Pattern: profilePage_123456789
-                    r'"profilePage_(\d+)"',
-                    # Pattern: "user_id":"123456789"
-                    r'"user_id":"(\d+)"',
-                    # Pattern: "owner":{"id":"123456789"}
-                    r'"owner":\s*\{\s*"id":"(\d+)"',
-                    # Pattern: "profile_id":"123456789"
-                    r'"profile_id":"(\d+)"',
-                    # Pattern: "pk":"123456789" (primary key)
-                    r'"pk":"(\d+)"[^}]{0,500}?"username":"' + re.escape(username) + '"',
-                    r'"username":"' + re.escape(username) + r'"[^}]{0,500}?"pk":"(\d+)"',
-                ]
-                
-                for pattern in json_patterns:
-                    matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-                    if matches:
-                        # Filter matches - user IDs are typically 8-15 digits
-                        for match in matches:
-                            if match.isdigit() and len(match) >= 8:
-                                user_id = match
-                                logger.info(f"Successfully fetched ID for @{username} via JSON pattern: {user_id}")
-                                return user_id
-                
-                # Method 4: Look for script tags with JSON data
-                script_tag_pattern = r'<script[^>]*type=["\']application/json["\'][^>]*>(.*?)</script>'
-                script_matches = re.findall(script_tag_pattern, content, re.IGNORECASE | re.DOTALL)
-                for script_content in script_matches:
-                    try:
-                        script_data = json.loads(script_content)
-                        # Recursively search for user ID in JSON structure
-                        user_id = self._find_user_id_in_json(script_data, username)
-                        if user_id:
-                            logger.info(f"Successfully fetched ID for @{username} via script JSON: {user_id}")
-                            return str(user_id)
-                    except (json.JSONDecodeError, TypeError):
-                        continue
-                
-                # Method 5: Look for data attributes or meta tags
-                meta_patterns = [
-                    r'<meta[^>]*property=["\']al:ios:url["\'][^>]*content=["\'].*?/user/(\d+)/',
-                    r'data-user-id=["\'](\d+)["\']',
-                ]
-                for pattern in meta_patterns:
-                    match = re.search(pattern, content, re.IGNORECASE)
-                    if match:
-                        user_id = match.group(1)
-                        if user_id.isdigit() and len(user_id) >= 8:
-                            logger.info(f"Successfully fetched ID for @{username} via meta/data pattern: {user_id}")
-                            return user_id
-                
-                logger.debug(f"Could not find user ID in HTML for @{username}. HTML length: {len(content)}")
+                with self._span("decompress", encoding=response.headers.get('Content-Encoding', '')) as span:
+                    content = decode_body(body, response.headers.get('Content-Encoding', ''))
+                    if span:
+                        span.set(chars=len(content))
+                with self._span("extract"):
+                    user_id = extract_user_id(content, username)
+                if user_id:
+                    return user_id
             
             # If we get here, the request didn't succeed
-            if response.status_code == 429:
-                logger.warning(f"Rate limited (429) for account {account.name}")
-                account.error_count += 1
-            elif response.status_code == 401:
-                logger.warning(f"Unauthorized (401) for account {account.name} - session may be invalid")
-                account.error_count += 1
-            elif response.status_code == 404:
-                logger.warning(f"User @{username} not found (404)")
-                # Don't count 404 as an account error - user just doesn't exist
-            else:
-                logger.warning(f"Failed to fetch ID for @{username}: Status {response.status_code}")
-                account.error_count += 1
-            
+            self._record_failed_status(username, account, response.status_code)
             return None
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error for @{username}: {e}")
+            logger.error("Request error for @%s: %s", username, e)
             account.error_count += 1
             if proxy:
                 proxy.error_count += 1
             return None
+        finally:
+            self._sync_cookies(account, session)
+    
+    def _record_attempt(self, account: InstagramAccount, proxy: Optional[Proxy], success: bool):
+        """Update statistics and usage counters after one lookup attempt"""
+        with self._lock:
+            self._update_counters(account, proxy, success)
+        self.persist_cookies()
+        if self.state_store:
+            self.state_store.save(self.accounts, self.proxies)
+    
+    def _update_counters(self, account: InstagramAccount, proxy: Optional[Proxy], success: bool):
+        self.stats["total_requests"] += 1
+        account.request_count += 1
+        account.last_used = self._now()
+        today = account.last_used.date().isoformat()
+        account.daily_requests[today] = account.daily_requests.get(today, 0) + 1
+        if proxy:
+            proxy.request_count += 1
+            proxy.last_used = account.last_used
+        
+        if success:
+            self.stats["successful_requests"] += 1
+            return
+        
+        self.stats["failed_requests"] += 1
+        
+        # Check if account should be deactivated
+        if account.error_count >= self.max_errors_per_account:
+            logger.warning("Deactivating account %s due to too many errors", account.name)
+            account.is_active = False
+        
+        # Check if proxy should be deactivated
+        if proxy and proxy.error_count >= self.max_errors_per_account:
+            logger.warning("Deactivating proxy %s:%s due to too many errors", proxy.host, proxy.port)
+            proxy.is_active = False
+    
+    def _request_timeout(self, deadline: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """
+        (connect, read) timeout for the next request
+        
+        Both are capped by the time left until `deadline` (a value of self._time(), time.time() by default).
+        Returns None if the deadline has already passed.
+        """
+        if deadline is None:
+            return (self.connect_timeout, self.read_timeout)
+        remaining = deadline - self._time()
+        if remaining <= 0:
+            return None
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds after which a lookup is hedged, or None if hedging is off or there are too few samples"""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_percentile * (len(ordered) - 1)))]
+    
+    def _timed_fetch(self, username: str, account: InstagramAccount, proxy: Optional[Proxy],
+                     timeout: Optional[Tuple[float, float]]) -> Optional[str]:
+        """Fetch a user ID with one account/proxy pair and record the attempt against that pair"""
+        start = self._time()
+        user_id = self._fetch_user_id(username, account, proxy, timeout)
+        if user_id:
+            with self._lock:
+                self._latencies.append(self._time() - start)
+        self._record_attempt(account, proxy, user_id is not None)
+        return user_id
+    
+    def _fetch_hedged(self, username: str, account: InstagramAccount, proxy: Optional[Proxy],
+                      timeout: Optional[Tuple[float, float]]) -> Optional[str]:
+        """
+        Fetch a user ID, racing a second account/proxy pair if the first one is slow
+        
+        Each attempt is recorded against the account and proxy that sent it
+        (see _timed_fetch). If a hedge is started, the first successful answer
+        wins. requests cannot abort a request that is in flight, so the slower
+        attempt runs to completion (or its timeout) in the background. Its
+        result is then discarded, and only its usage counters are recorded.
+        """
+        hedge_after = self._hedge_delay()
+        active_accounts = sum(1 for acc in self.accounts if acc.is_active)
+        if hedge_after is None or active_accounts < 2:
+            return self._timed_fetch(username, account, proxy, timeout)
+        
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+        
+        # Spans of both attempts belong to the caller's trace
+        fetch = self.tracer.propagate(self._timed_fetch) if self.tracer else self._timed_fetch
+        primary = self._hedge_executor.submit(fetch, username, account, proxy, timeout)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+        
+        try:
+            backup_account = self._get_next_account(exclude=account, wait=False)
+        except AccountsUnavailable:
+            return primary.result()
+        backup_proxy = self._proxy_for(backup_account)
+        if not self.proxy_affinity and proxy is not None and backup_proxy is proxy:
+            backup_proxy = self._get_next_proxy()
+        logger.info("Hedging @%s after %.2fs with account %s", username, hedge_after, backup_account.name)
+        with self._lock:
+            self.stats["hedged_requests"] += 1
+        backup = self._hedge_executor.submit(fetch, username, backup_account, backup_proxy, timeout)
+        
+        pending = {primary, backup}
+        user_id = None
+        while pending and not user_id:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.exception() is None and future.result()
+                if result and not user_id:
+                    user_id = result
+                    if future is backup:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+        return user_id
     
     def get_user_id(self, username: str, retries: int = 3) -> Optional[str]:
         """
@@ -373,80 +1094,133 @@ class InstagramIDScraper:
             
         Returns:
             User ID as string, or None if all retries failed
+        
+        Raises:
+            AccountsUnavailable: No account is usable (see _get_next_account)
         """
         username = username.lstrip('@').strip()
+        user_id = self._lookup_index(username)
+        if user_id:
+            return user_id
+        if self.tracer is None:
+            return self._get_user_id(username, retries)
+        with self.tracer.trace("lookup", username=username) as span:
+            user_id = self._get_user_id(username, retries)
+            if span:
+                span.set(found=user_id is not None)
+            return user_id
+    
+    def _get_user_id(self, username: str, retries: int) -> Optional[str]:
+        """get_user_id without the index check and tracing"""
+        deadline = self._time() + self.lookup_deadline if self.lookup_deadline else None
         
         for attempt in range(retries):
             try:
-                # Get account and proxy
-                account = self._get_next_account()
-                proxy = self._get_next_proxy()
+                timeout = self._request_timeout(deadline)
+                if timeout is None:
+                    logger.error("Deadline of %ss reached for @%s", self.lookup_deadline, username)
+                    return None
                 
-                logger.info(f"Attempt {attempt + 1}/{retries} for @{username} using account {account.name}")
+                # Get account and proxy
+                try:
+                    account = self._get_next_account(deadline=deadline)
+                except AccountsUnavailable as e:
+                    if deadline is None or e.retry_at is None \
+                            or (e.retry_at - self._now()).total_seconds() > self.max_account_wait:
+                        raise
+                    # An account frees up soon, just not within this username's deadline
+                    logger.error("Deadline of %ss reached for @%s waiting for an account", self.lookup_deadline,
+                                 username)
+                    return None
+                proxy = self._proxy_for(account)
                 
-                # Fetch user ID
-                user_id = self._fetch_user_id(username, account, proxy)
+                # First attempts are routine and sampled; retries are always logged
+                logger.info("Attempt %d/%d for @%s using account %s", attempt + 1, retries, username, account.name,
+                            extra=SAMPLED if attempt == 0 else None)
                 
-                # Update statistics
-                self.stats["total_requests"] += 1
-                account.request_count += 1
-                account.last_used = datetime.now()
+                # Fetch user ID (each attempt updates the statistics of its own account and proxy)
+                with self._span("attempt", attempt=attempt + 1, account=account.name):
+                    user_id = self._fetch_hedged(username, account, proxy, timeout)
                 
                 if user_id:
-                    self.stats["successful_requests"] += 1
                     return user_id
-                else:
-                    self.stats["failed_requests"] += 1
-                    
-                    # Check if account should be deactivated
-                    if account.error_count >= self.max_errors_per_account:
-                        logger.warning(f"Deactivating account {account.name} due to too many errors")
-                        account.is_active = False
-                    
-                    # Check if proxy should be deactivated
-                    if proxy and proxy.error_count >= self.max_errors_per_account:
-                        logger.warning(f"Deactivating proxy {proxy.host}:{proxy.port} due to too many errors")
-                        proxy.is_active = False
                 
                 # Random delay before retry
                 if attempt < retries - 1:
                     delay = random.uniform(self.min_delay, self.max_delay)
-                    logger.info(f"Waiting {delay:.2f}s before retry...")
-                    time.sleep(delay)
+                    if deadline is not None:
+                        delay = max(0, min(delay, deadline - self._time()))
+                    logger.info("Waiting %.2fs before retry...", delay)
+                    self._sleep(delay)
                     
+            except AccountsUnavailable:
+                raise
             except Exception as e:
-                logger.error(f"Unexpected error for @{username}: {e}")
-                self.stats["failed_requests"] += 1
+                logger.error("Unexpected error for @%s: %s", username, e)
+                with self._lock:
+                    self.stats["failed_requests"] += 1
         
-        logger.error(f"Failed to fetch ID for @{username} after {retries} attempts")
+        logger.error("Failed to fetch ID for @%s after %d attempts", username, retries)
         return None
     
-    def get_user_ids(self, usernames: List[str], delay_between: Optional[float] = None) -> Dict[str, Optional[str]]:
+    def get_user_ids(self, usernames: List[str], delay_between: Optional[float] = None,
+                     on_result: Optional[Callable[[str, Optional[str]], None]] = None,
+                     journal=None) -> Dict[str, Optional[str]]:
         """
         Get user IDs for multiple usernames
         
         Args:
             usernames: List of Instagram usernames
             delay_between: Optional delay between requests (uses random delay if None)
+            on_result: Optional callback called with (username, user_id) as soon as
+                each username is resolved, e.g. to stream results into an output sink
+            journal: Optional JobJournal; every result is appended to it, and
+                usernames it already resolved (in an earlier run) are not fetched again
             
         Returns:
-            Dictionary mapping usernames to their IDs (or None if failed)
+            Dictionary mapping usernames to their IDs (or None if failed). If no
+            account is usable any more (see AccountsUnavailable), the remaining
+            usernames are not looked up and are returned with None.
         """
         results = {}
         
+        all_usernames = usernames
+        if journal is not None:
+            resolved = journal.resolved()
+            for username in usernames:
+                if username in resolved:
+                    results[username] = resolved[username]
+                    if on_result:
+                        on_result(username, resolved[username])
+            usernames = journal.pending(usernames)
+        
         for i, username in enumerate(usernames):
-            user_id = self.get_user_id(username)
+            # Indexed usernames need no request, so they also skip the delay
+            user_id = self._lookup_index(username)
+            from_index = user_id is not None
+            if not from_index:
+                try:
+                    user_id = self.get_user_id(username)
+                except AccountsUnavailable as e:
+                    logger.error("Stopping with %d username(s) left: %s", len(usernames) - i, e)
+                    break
             results[username] = user_id
+            if journal is not None:
+                journal.record(username, user_id)
+            if on_result:
+                on_result(username, user_id)
             
             # Delay between requests (except for the last one)
-            if i < len(usernames) - 1:
+            if not from_index and i < len(usernames) - 1:
                 if delay_between is None:
                     delay = random.uniform(self.min_delay, self.max_delay)
                 else:
                     delay = delay_between
-                time.sleep(delay)
+                self._sleep(delay)
         
-        return results
+        if journal is not None:
+            journal.flush()
+        return {username: results.get(username) for username in all_usernames}
     
     def get_stats(self) -> Dict:
         """Get scraper statistics"""
@@ -456,6 +1230,7 @@ class InstagramIDScraper:
             "total_accounts": len(self.accounts),
             "active_proxies": sum(1 for p in self.proxies if p.is_active) if self.proxies else 0,
             "total_proxies": len(self.proxies) if self.proxies else 0,
+            **({"tracing": self.tracer.summary()} if self.tracer else {}),
         }
 
 
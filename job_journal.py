@@ -0,0 +1,147 @@
+"""
+Append-only journal of batch results
+Lets long username batches resume after a crash without rewriting their output
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config_loader import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class JobJournal:
+    """
+    Append-only NDJSON journal of (username, user_id) results
+
+    Every result is appended as one line, and the file is fsynced after
+    `fsync_every` records or `fsync_interval` seconds, whichever comes first.
+    The cost per result is constant no matter how large the batch gets. On
+    open, the existing journal is replayed. A line cut off by a crash is
+    dropped, and the file is truncated back to the last complete record.
+    Usernames that already have an ID are then skipped (see pending).
+    Failed usernames are tried again.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 100, fsync_interval: float = 2.0):
+        """
+        Args:
+            path: Journal file (created if missing)
+            fsync_every: Records written between fsyncs
+            fsync_interval: Maximum seconds between fsyncs
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.results: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self._replay()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                    self.results[record["username"]] = record.get("user_id")
+                except (ValueError, KeyError, TypeError):
+                    break
+                good_offset += len(line)
+            size = f.seek(0, os.SEEK_END)
+        if good_offset < size:
+            logger.warning(f"Dropping {size - good_offset} byte(s) of incomplete records from {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+        if self.results:
+            logger.info(f"Resuming from {self.path}: {len(self.resolved())} of {len(self.results)} "
+                        f"journaled username(s) resolved")
+
+    def resolved(self) -> Dict[str, str]:
+        """Journaled usernames that have a user ID"""
+        return {username: user_id for username, user_id in self.results.items() if user_id}
+
+    def pending(self, usernames: List[str]) -> List[str]:
+        """The usernames that still need a lookup, in input order"""
+        return [username for username in usernames if not self.results.get(username)]
+
+    def record(self, username: str, user_id: Optional[str]):
+        """Append one result"""
+        line = json.dumps({"username": username, "user_id": user_id}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.results[username] = user_id
+            self._file.write(line)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.time() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def flush(self):
+        """Write and fsync all recorded results"""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def compact(self):
+        """Rewrite the journal with one line per username (the latest result), atomically"""
+        with self._lock:
+            self._sync()
+            self._file.close()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            tmp_path = os.path.join(directory, f".{os.path.basename(self.path)}.compact")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for username, user_id in self.results.items():
+                    f.write(json.dumps({"username": username, "user_id": user_id}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def write_output(self, output_path: str, usernames: Optional[List[str]] = None):
+        """
+        Write the journaled results as a scraper_cli.py style JSON file (atomically)
+
+        Args:
+            output_path: JSON file to write
+            usernames: Usernames to include, in this order (default: all journaled)
+        """
+        if usernames is None:
+            usernames = list(self.results)
+        results = {username: self.results.get(username) for username in usernames}
+        atomic_write_json({
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "successful": sum(1 for v in results.values() if v is not None),
+                "failed": sum(1 for v in results.values() if v is None)
+            }
+        }, output_path)
+
+    def close(self):
+        """Flush and close the journal"""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
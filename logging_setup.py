@@ -0,0 +1,147 @@
+"""
+Logging configuration for the command-line tools
+Log records are handed to a background thread, so writing them never blocks a request
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Optional
+
+# Pass as `extra=` on high-volume success lines so they can be sampled
+SAMPLED = {"sampled": True}
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_settings: Optional[dict] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including fields passed through `extra=`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sampled":
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records marked with `extra=SAMPLED`; other records always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are; the stock handler formats the message on the calling thread first"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: str = "INFO", log_file: Optional[str] = None, json_format: bool = False,
+                      sample_rate: float = 1.0) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread
+
+    The calling thread only puts the record on a queue. Formatting and
+    writing to stderr (and the optional file) happen on the listener thread.
+    Sampled success lines are dropped before they are queued. Calling this
+    again replaces the previous configuration.
+
+    Args:
+        level: Root log level name
+        log_file: Optional file that receives the same records as stderr
+        json_format: Write JSON lines instead of plain text
+        sample_rate: Fraction of sampled (per-request success) records to keep
+
+    Returns:
+        The running QueueListener (stopped automatically at exit)
+    """
+    global _listener, _settings
+    if _listener is not None:
+        _listener.stop()
+    _settings = {"level": level, "log_file": log_file, "json_format": json_format, "sample_rate": sample_rate}
+
+    formatter = JSONFormatter() if json_format else logging.Formatter(DEFAULT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_in_child():
+    # The writer thread does not survive fork(); forked workers get their own
+    global _listener
+    if _settings is not None:
+        _listener = None
+        configure_logging(**_settings)
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def add_logging_arguments(parser):
+    """Add --log-level, --log-file, --log-json and --log-sample to an argparse parser"""
+    parser.add_argument("--log-level", default="INFO", help="Log level (default: INFO)")
+    parser.add_argument("--log-file", help="Also write log records to this file")
+    parser.add_argument("--log-json", action="store_true", help="Write log records as JSON lines")
+    parser.add_argument("--log-sample", type=float, default=1.0,
+                        help="Fraction of per-request success lines to log (default: 1.0)")
+
+
+def configure_logging_from_args(args) -> logging.handlers.QueueListener:
+    """configure_logging with the values of add_logging_arguments"""
+    return configure_logging(args.log_level, args.log_file, args.log_json, args.log_sample)
@@ -0,0 +1,382 @@
+"""
+Lookup engine that keeps one warm scraper behind shared priority lanes
+Concurrent callers asking for the same username share a single request
+"""
+
+import collections
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from typing import Deque, Dict, List, Optional
+
+from graphql_paginator import RequestPacer
+from id_cache import IDCache
+from instagram_scraper import InstagramIDScraper
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_BACKGROUND = "background"
+
+# Relative share of picks per lane while several lanes have work waiting.
+# A weight of 0 means the lane only gets workers that would otherwise be idle.
+DEFAULT_LANE_WEIGHTS = {PRIORITY_INTERACTIVE: 4, PRIORITY_BULK: 1, PRIORITY_BACKGROUND: 0}
+
+
+class _Task:
+    """A queued lookup or follower job"""
+    __slots__ = ("kind", "lane", "username", "key", "future", "job", "enqueued_at", "taken")
+
+    def __init__(self, kind: str, lane: str, username: str = "", key: str = "",
+                 future: Optional[Future] = None, job: Optional[Dict] = None):
+        self.kind = kind
+        self.lane = lane
+        self.username = username
+        self.key = key
+        self.future = future
+        self.job = job
+        self.enqueued_at = time.time()
+        # Set when a worker picked the task or it was moved to another lane
+        self.taken = False
+
+
+class _LaneStats:
+    """Counters and recent queue wait times of one lane"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.waits: Deque[float] = collections.deque(maxlen=1000)
+
+    def snapshot(self, depth: int) -> Dict:
+        waits = sorted(self.waits)
+
+        def percentile(p):
+            return round(waits[int(p * (len(waits) - 1))], 3) if waits else None
+
+        return {
+            "depth": depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "wait_avg": round(sum(waits) / len(waits), 3) if waits else None,
+            "wait_p50": percentile(0.5),
+            "wait_p95": percentile(0.95),
+            "wait_max": round(waits[-1], 3) if waits else None,
+        }
+
+
+class LookupEngine:
+    """
+    Serves user ID lookups and follower jobs from shared priority lanes
+
+    A fixed pool of worker threads drains the lanes using one long-lived
+    scraper, so sessions, account cooldowns and the ID cache stay warm
+    between calls. Lookups for a username that is already queued or in
+    flight are attached to the existing request instead of being fetched
+    again (and moved to the faster lane if the new caller is interactive).
+
+    Requests go to the "interactive", "bulk" or "background" lane. While
+    several have work, workers pick from them by `lane_weights`, and the
+    first `reserved_workers` workers only serve the interactive lane, so a
+    user-facing lookup never waits behind a large backfill or follower job.
+    At least one worker is always left for the other lanes, so with a single
+    worker the reserved one is added on top. The background lane (weight 0)
+    is only served when the other lanes are empty.
+
+    All workers share one pacer: request starts are spaced by the scraper's
+    random delay however many workers there are, so extra workers add
+    concurrency for slow requests, not request rate.
+    """
+
+    def __init__(self, scraper: InstagramIDScraper, cache: Optional[IDCache] = None, workers: int = 1,
+                 reserved_workers: Optional[int] = None, lane_weights: Optional[Dict[str, int]] = None,
+                 job_ttl: float = 3600):
+        """
+        Args:
+            scraper: Scraper used for all lookups (InstagramFollowersScraper for follower jobs)
+            cache: Optional ID cache consulted before any network request
+            workers: Number of worker threads draining the lanes
+            reserved_workers: Workers that only serve the interactive lane (default: 1); one
+                more worker is started if none would be left for the other lanes
+            lane_weights: Relative share of picks per lane (default: interactive 4, bulk 1, background 0)
+            job_ttl: Seconds a finished follower job (and its followers) is kept for get_job
+        """
+        self.scraper = scraper
+        self.cache = cache if cache is not None else IDCache()
+        self.reserved_workers = max(0, 1 if reserved_workers is None else reserved_workers)
+        # At least one worker must be left for the other lanes
+        self.workers = max(workers, self.reserved_workers + 1)
+        self.lane_weights = dict(lane_weights or DEFAULT_LANE_WEIGHTS)
+        self.job_ttl = job_ttl
+
+        self._lanes: Dict[str, Deque[_Task]] = {lane: collections.deque() for lane in self.lane_weights}
+        self._lane_stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in self.lane_weights}
+        self._credits: Dict[str, int] = {lane: 0 for lane in self.lane_weights}
+        self._pending: Dict[str, _Task] = {}
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._pacer = RequestPacer(scraper.min_delay, scraper.max_delay)
+
+        self.stats = {
+            "lookups": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "promoted": 0,
+            "network_lookups": 0,
+            "follower_jobs": 0,
+        }
+
+    def start(self):
+        """Start the worker threads"""
+        for i in range(self.workers):
+            lanes = [PRIORITY_INTERACTIVE] if i < self.reserved_workers else list(self.lane_weights)
+            thread = threading.Thread(target=self._worker, args=(lanes,), name=f"lookup-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the workers after the tasks they are running finish"""
+        self._stopping.set()
+        with self._work_available:
+            self._work_available.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            for task in self._pending.values():
+                task.future.cancel()
+            self._pending.clear()
+
+    def _check_priority(self, priority: str):
+        if priority not in self.lane_weights:
+            raise ValueError(f"Unknown priority '{priority}' (expected one of: {', '.join(self.lane_weights)})")
+
+    def _enqueue(self, task: _Task):
+        """Append a task to its lane and wake a worker (call with _lock held)"""
+        self._lanes[task.lane].append(task)
+        self._lane_stats[task.lane].submitted += 1
+        self._work_available.notify_all()
+
+    def submit(self, username: str, priority: str = PRIORITY_INTERACTIVE, refresh: bool = False) -> Future:
+        """
+        Queue a user ID lookup
+
+        Args:
+            username: Instagram username (with or without @)
+            priority: Lane to queue the lookup in ("interactive", "bulk" or "background")
+            refresh: Fetch the ID again even if it is cached
+
+        Returns:
+            Future resolving to the user ID, or None if it could not be fetched
+        """
+        self._check_priority(priority)
+        username = username.lstrip('@').strip()
+        key = username.lower()
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            cached = None if refresh else self.cache.get(key)
+            if cached:
+                self.stats["cache_hits"] += 1
+                future = Future()
+                future.set_result(cached)
+                return future
+
+            task = self._pending.get(key)
+            if task is not None:
+                self.stats["coalesced"] += 1
+                # A more urgent caller joined a lookup that is still queued: move it to the faster lane
+                if not task.taken and self.lane_weights[priority] > self.lane_weights[task.lane]:
+                    promoted = _Task("user_id", priority, task.username, key, task.future)
+                    promoted.enqueued_at = task.enqueued_at
+                    task.taken = True
+                    self._pending[key] = promoted
+                    self._enqueue(promoted)
+                    self.stats["promoted"] += 1
+                return task.future
+
+            task = _Task("user_id", priority, username, key, Future())
+            self._pending[key] = task
+            self._enqueue(task)
+            return task.future
+
+    def lookup(self, username: str, timeout: Optional[float] = None,
+               priority: str = PRIORITY_INTERACTIVE) -> Optional[str]:
+        """Resolve a single username, blocking until it is done"""
+        return self.submit(username, priority).result(timeout)
+
+    def lookup_many(self, usernames: List[str], timeout: Optional[float] = None,
+                    priority: str = PRIORITY_BULK) -> Dict[str, Optional[str]]:
+        """
+        Resolve several usernames through the shared lanes, blocking until all are done
+
+        Raises:
+            concurrent.futures.TimeoutError: Not all lookups finished within `timeout` seconds in total
+        """
+        futures = {username: self.submit(username, priority) for username in usernames}
+        _, not_done = wait(futures.values(), timeout)
+        if not_done:
+            raise FutureTimeoutError(f"{len(not_done)} of {len(futures)} lookups did not finish in time")
+        return {username: future.result() for username, future in futures.items()}
+
+    def submit_followers(self, username: str, max_followers: Optional[int] = None,
+                         priority: str = PRIORITY_BULK) -> str:
+        """
+        Queue a follower crawl
+
+        Returns:
+            Job ID that can be polled with get_job()
+        """
+        if not hasattr(self.scraper, "get_followers"):
+            raise ValueError("Scraper does not support follower jobs")
+        self._check_priority(priority)
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "username": username.lstrip('@').strip(),
+            "max_followers": max_followers,
+            "priority": priority,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "followers": None,
+            "error": None,
+        }
+        with self._lock:
+            self._expire_jobs()
+            self._jobs[job_id] = job
+            self.stats["follower_jobs"] += 1
+            self._enqueue(_Task("followers", priority, job=job))
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Return a follower job record, or None if the ID is unknown or expired (see job_ttl)"""
+        with self._lock:
+            self._expire_jobs()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _expire_jobs(self):
+        """Forget follower jobs that finished more than job_ttl seconds ago (call with _lock held)"""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.get("finished_at", cutoff + 1) < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_stats(self) -> Dict:
+        """Engine, per-lane and scraper statistics"""
+        with self._lock:
+            engine_stats = dict(self.stats)
+            engine_stats["in_flight"] = len(self._pending)
+            engine_stats["cached_ids"] = len(self.cache)
+            engine_stats["workers"] = self.workers
+            engine_stats["reserved_workers"] = self.reserved_workers
+            lanes = {
+                lane: self._lane_stats[lane].snapshot(sum(1 for task in tasks if not task.taken))
+                for lane, tasks in self._lanes.items()
+            }
+            engine_stats["queue_depth"] = sum(lane["depth"] for lane in lanes.values())
+        return {"engine": engine_stats, "lanes": lanes, "scraper": self.scraper.get_stats()}
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        """Tasks waiting in one lane, or in all lanes"""
+        lanes = [priority] if priority else list(self._lanes)
+        with self._lock:
+            return sum(1 for lane in lanes for task in self._lanes[lane] if not task.taken)
+
+    def _next_task(self, lanes: List[str]) -> Optional[_Task]:
+        """
+        Pick the next task from the given lanes (call with _lock held)
+
+        Smooth weighted round-robin over the lanes that have work: with
+        weights 4 and 1, the bulk lane gets every fifth pick while the
+        interactive lane is busy, and all picks when it is idle. Lanes with
+        weight 0 are only picked when no weighted lane has work.
+        """
+        for lane in lanes:
+            tasks = self._lanes[lane]
+            while tasks and tasks[0].taken:
+                tasks.popleft()
+        ready = [lane for lane in lanes if self._lanes[lane] and self.lane_weights[lane] > 0]
+        if not ready:
+            idle = [lane for lane in lanes if self._lanes[lane]]
+            if not idle:
+                return None
+            return self._take(idle[0])
+
+        for lane in ready:
+            self._credits[lane] += self.lane_weights[lane]
+        lane = max(ready, key=lambda name: self._credits[name])
+        self._credits[lane] -= sum(self.lane_weights[name] for name in ready)
+        return self._take(lane)
+
+    def _take(self, lane: str) -> _Task:
+        task = self._lanes[lane].popleft()
+        task.taken = True
+        self._lane_stats[lane].waits.append(time.time() - task.enqueued_at)
+        return task
+
+    def _pace(self):
+        """Wait until the scraper's random delay has passed since the previous request of any worker"""
+        # Follow changes of the scraper's delays (e.g. from a config reload)
+        self._pacer.min_delay = self.scraper.min_delay
+        self._pacer.max_delay = self.scraper.max_delay
+        self._pacer.wait()
+
+    def _worker(self, lanes: List[str]):
+        while True:
+            with self._work_available:
+                task = self._next_task(lanes)
+                while task is None and not self._stopping.is_set():
+                    self._work_available.wait(timeout=1)
+                    task = self._next_task(lanes)
+            if task is None:
+                break
+            try:
+                if task.kind == "user_id":
+                    self._run_lookup(task)
+                else:
+                    self._run_followers_job(task.job)
+            except Exception as e:
+                logger.error(f"Lookup engine task failed: {e}")
+            finally:
+                with self._lock:
+                    self._lane_stats[task.lane].completed += 1
+
+    def _run_lookup(self, task: _Task):
+        future = task.future
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            self._pace()
+            with self._lock:
+                self.stats["network_lookups"] += 1
+            user_id = self.scraper.get_user_id(task.username)
+            if user_id:
+                self.cache.put(task.key, user_id)
+            future.set_result(user_id)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._pending.get(task.key) is task:
+                    self._pending.pop(task.key)
+
+    def _run_followers_job(self, job: Dict):
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            self._pace()
+            followers = self.scraper.get_followers(job["username"], max_followers=job["max_followers"])
+            job["followers"] = followers
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "failed"
+        job["finished_at"] = time.time()
@@ -0,0 +1,194 @@
+"""
+Buffered output sinks for scraper results
+Writes records incrementally as gzip-compressed NDJSON, SQLite or CSV
+"""
+
+import csv
+import gzip
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+# Columns written for each kind of record
+USER_ID_FIELDS = ["username", "user_id"]
+FOLLOWER_FIELDS = ["username", "user_id", "full_name", "is_verified", "profile_pic_url"]
+
+SINK_FORMATS = ["json", "ndjson.gz", "sqlite", "csv"]
+
+
+class OutputSink:
+    """
+    Base class for incremental record writers
+
+    Records are dictionaries. They are buffered and written out in chunks of
+    `buffer_size`, so memory use stays flat no matter how many records pass
+    through the sink.
+    """
+
+    def __init__(self, path: str, fields: Sequence[str], buffer_size: int = 1000):
+        self.path = path
+        self.fields = list(fields)
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self._buffer: List[Dict] = []
+
+    def write(self, record: Dict):
+        """Add a single record to the sink"""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict]):
+        """Add several records to the sink"""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write buffered records to the underlying file"""
+        if not self._buffer:
+            return
+        self._write_batch(self._buffer)
+        self.records_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Flush remaining records and release the file"""
+        self.flush()
+        self._close()
+
+    def _write_batch(self, records: List[Dict]):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NDJSONGzipSink(OutputSink):
+    """Writes one JSON object per line into a gzip-compressed file"""
+
+    def __init__(self, path: str, fields: Sequence[str], buffer_size: int = 1000):
+        super().__init__(path, fields, buffer_size)
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+    def _write_batch(self, records: List[Dict]):
+        self._file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+
+    def _close(self):
+        self._file.close()
+
+
+class CSVSink(OutputSink):
+    """Writes records with the csv module so commas and quotes are escaped properly"""
+
+    def __init__(self, path: str, fields: Sequence[str], buffer_size: int = 1000):
+        super().__init__(path, fields, buffer_size)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write_batch(self, records: List[Dict]):
+        self._writer.writerows(records)
+
+    def _close(self):
+        self._file.close()
+
+
+class SQLiteSink(OutputSink):
+    """
+    Writes records into a SQLite table
+
+    The table is created on first use with indexes on `username` and
+    `user_id`. Each buffered batch is inserted in a single transaction.
+    """
+
+    def __init__(self, path: str, fields: Sequence[str], buffer_size: int = 1000, table: str = "results"):
+        super().__init__(path, fields, buffer_size)
+        self.table = table
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f'"{field}"' for field in self.fields)
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+        for field in ("username", "user_id"):
+            if field in self.fields:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{table}_{field}" ON "{table}" ("{field}")'
+                )
+        self._conn.commit()
+        placeholders = ", ".join("?" for _ in self.fields)
+        self._insert_sql = f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})'
+
+    def _write_batch(self, records: List[Dict]):
+        rows = [tuple(record.get(field) for field in self.fields) for record in records]
+        with self._conn:
+            self._conn.executemany(self._insert_sql, rows)
+
+    def _close(self):
+        self._conn.close()
+
+
+class JSONSink(OutputSink):
+    """
+    Writes records as a JSON array, one element at a time
+
+    `header` entries are written before the array and `trailer` entries after
+    it, which keeps the existing CLI output layout
+    (e.g. {"username": ..., "followers": [...], "total_followers": ...}).
+    """
+
+    def __init__(self, path: str, fields: Sequence[str], buffer_size: int = 1000,
+                 array_key: str = "results", header: Optional[Dict] = None):
+        super().__init__(path, fields, buffer_size)
+        self.array_key = array_key
+        self.trailer: Dict = {}
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('{\n')
+        for key, value in (header or {}).items():
+            self._file.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+        self._file.write(f'  {json.dumps(array_key)}: [')
+        self._first = True
+
+    def _write_batch(self, records: List[Dict]):
+        parts = []
+        for record in records:
+            parts.append(('\n    ' if self._first else ',\n    ') + json.dumps(record, ensure_ascii=False))
+            self._first = False
+        self._file.write(''.join(parts))
+
+    def _close(self):
+        self._file.write('\n  ]' if not self._first else ']')
+        for key, value in self.trailer.items():
+            self._file.write(f',\n  {json.dumps(key)}: {json.dumps(value)}')
+        self._file.write('\n}\n')
+        self._file.close()
+
+
+def create_sink(output_format: str, path: str, fields: Sequence[str], **kwargs) -> OutputSink:
+    """
+    Create an output sink for the given format
+
+    Args:
+        output_format: One of SINK_FORMATS
+        path: Output file path
+        fields: Record fields (column order for CSV and SQLite)
+        **kwargs: Extra keyword arguments for the sink class
+
+    Returns:
+        An OutputSink instance
+    """
+    if output_format == "ndjson.gz":
+        return NDJSONGzipSink(path, fields, **kwargs)
+    if output_format == "csv":
+        return CSVSink(path, fields, **kwargs)
+    if output_format == "sqlite":
+        return SQLiteSink(path, fields, **kwargs)
+    if output_format == "json":
+        return JSONSink(path, fields, **kwargs)
+    raise ValueError(f"Unknown output format: {output_format} (choose from {', '.join(SINK_FORMATS)})")
@@ -6,9 +6,13 @@ Command-line interface for Instagram User ID Scraper
 import argparse
 import json
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 from instagram_scraper import InstagramIDScraper
-from config_loader import load_accounts_from_json, load_proxies_from_json
+from config_loader import load_accounts_from_json, load_proxies_from_json, load_runtime_state
+from output_sinks import SINK_FORMATS, USER_ID_FIELDS, create_sink
+from logging_setup import add_logging_arguments, configure_logging_from_args
+from tracing import add_tracing_arguments, profile_run
 
 
 def main():
@@ -36,7 +40,14 @@ def main():
     parser.add_argument(
         "--output",
         "-o",
-        help="Output file path (JSON format). If not specified, prints to stdout"
+        help="Output file path. If not specified, prints JSON to stdout"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=SINK_FORMATS,
+        default="json",
+        help="Output file format (default: json). ndjson.gz, sqlite and csv are written incrementally"
     )
     
     parser.add_argument(
@@ -45,13 +56,137 @@ def main():
         help="Fixed delay between requests in seconds (default: random 2-5s)"
     )
     
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Probe all accounts and proxies in parallel first and skip dead ones"
+    )
+    
+    parser.add_argument(
+        "--config-cache",
+        action="store_true",
+        help="Cache the parsed accounts and proxies files next to them for faster start-up"
+    )
+    
+    parser.add_argument(
+        "--save-cookies",
+        action="store_true",
+        help="Write cookies refreshed by Instagram back to the accounts file"
+    )
+    
+    parser.add_argument(
+        "--persist-state",
+        action="store_true",
+        help="Keep account/proxy usage, cooldowns and daily totals in a state file next to the accounts file"
+    )
+    
+    parser.add_argument(
+        "--watch-config",
+        action="store_true",
+        help="Apply edits of the accounts and proxies files while running (single process only)"
+    )
+    
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes; accounts and proxies are split between them (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        help="Parse pages in this many processes while downloads continue (two-stage pipeline)"
+    )
+    
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=10,
+        help="Seconds to establish a connection (default: 10)"
+    )
+    
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=30,
+        help="Seconds to wait for response data (default: 30)"
+    )
+    
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Maximum total seconds per username, across retries"
+    )
+    
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        help="Start a second attempt on another account/proxy when a lookup is slower than this "
+             "percentile of recent latencies (e.g. 0.95)"
+    )
+    
+    parser.add_argument(
+        "--proxy-affinity",
+        action="store_true",
+        help="Bind each account to one proxy, reuse its connection and pre-open it at startup"
+    )
+    
+    parser.add_argument(
+        "--journal",
+        help="Append each result to this journal file; a rerun with the same journal skips usernames "
+             "that are already resolved"
+    )
+    
+    parser.add_argument(
+        "--id-index",
+        help="Answer usernames found in this ID index (built with id_index.py) without scraping"
+    )
+    
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the estimated throughput and duration for this pool and exit"
+    )
+    
+    parser.add_argument(
+        "--finish-within",
+        type=float,
+        help="Hours the batch has to finish in; warns up front (and in --progress lines) if the pool is too small"
+    )
+    
+    parser.add_argument(
+        "--progress",
+        type=float,
+        help="Write a progress line with rate and ETA to stderr every this many seconds (default: off)"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Profile the batch run and write collapsed stacks for flamegraph.pl/speedscope to FILE "
+             "(this process only, not --processes workers)"
+    )
+    
+    parser.add_argument(
+        "--profile-mode",
+        choices=["sampling", "cprofile"],
+        default="sampling",
+        help="sampling: sample all threads every 5ms (low overhead); cprofile: trace every call of the "
+             "main thread, also writes FILE.pstats (default: sampling)"
+    )
+    
     parser.add_argument(
         "--stats",
         action="store_true",
         help="Print scraper statistics after completion"
     )
     
+    add_tracing_arguments(parser)
+    add_logging_arguments(parser)
+    
     args = parser.parse_args()
+    configure_logging_from_args(args)
     
     # Load accounts
     if not Path(args.accounts_file).exists():
@@ -60,7 +195,7 @@ def main():
         sys.exit(1)
     
     try:
-        accounts = load_accounts_from_json(args.accounts_file)
+        accounts = load_accounts_from_json(args.accounts_file, use_cache=args.config_cache)
         if not accounts:
             print("Error: No accounts found in configuration file", file=sys.stderr)
             sys.exit(1)
@@ -75,22 +210,146 @@ def main():
             print(f"Warning: Proxies file not found: {args.proxies_file}", file=sys.stderr)
         else:
             try:
-                proxies = load_proxies_from_json(args.proxies_file)
+                proxies = load_proxies_from_json(args.proxies_file, use_cache=args.config_cache)
             except Exception as e:
                 print(f"Warning: Error loading proxies: {e}", file=sys.stderr)
     
     # Initialize scraper
     scraper = InstagramIDScraper(accounts=accounts, proxies=proxies)
+    scraper.connect_timeout = args.connect_timeout
+    scraper.read_timeout = args.read_timeout
+    scraper.lookup_deadline = args.deadline
+    scraper.hedge_percentile = args.hedge_percentile
+    if args.id_index:
+        try:
+            scraper.enable_id_index(args.id_index)
+        except (OSError, ValueError) as e:
+            print(f"Error opening ID index: {e}", file=sys.stderr)
+            sys.exit(1)
+    if args.save_cookies:
+        scraper.enable_cookie_writeback(args.accounts_file)
+    if args.persist_state:
+        scraper.state_store = load_runtime_state(accounts, proxies, args.accounts_file)
+    if args.trace:
+        scraper.enable_tracing(args.trace_sample, args.trace)
+    
+    if args.proxy_affinity:
+        if args.processes > 1:
+            # Each worker process binds and pre-warms its own slice
+            scraper.proxy_affinity = True
+        else:
+            scraper.enable_proxy_affinity(prewarm=not args.preflight)
+    
+    if args.preflight:
+        from session_preflight import run_preflight, format_readiness_table
+        print("Running pre-flight checks...")
+        print(format_readiness_table(run_preflight(scraper)))
+        if not any(acc.is_active for acc in accounts):
+            print("Error: No usable accounts after pre-flight", file=sys.stderr)
+            sys.exit(1)
+        if scraper.proxy_affinity:
+            scraper.prewarm_connections()
+    
+    if args.watch_config:
+        if args.processes > 1:
+            print("Warning: --watch-config is ignored with --processes", file=sys.stderr)
+        else:
+            scraper.watch_config(args.accounts_file, args.proxies_file)
     
     # Clean usernames (remove @ if present)
     usernames = [u.lstrip('@').strip() for u in args.usernames]
     
+    finish_within = args.finish_within * 3600 if args.finish_within else None
+    if args.plan or finish_within:
+        from capacity_planner import plan_job, format_plan
+        plan = plan_job(scraper, len(usernames), processes=args.processes, finish_within=finish_within,
+                        delay=args.delay)
+        if args.plan:
+            print(format_plan(plan))
+            return
+        for warning in plan["warnings"]:
+            print(f"Warning: {warning}", file=sys.stderr)
+    
     print(f"Scraping {len(usernames)} username(s) using {len(accounts)} account(s)...")
     if proxies:
         print(f"Using {len(proxies)} proxy/proxies")
     
+    if args.format != "json" and not args.output:
+        print(f"Error: --format {args.format} requires --output", file=sys.stderr)
+        sys.exit(1)
+    
+    # Stream results into the sink as they are resolved
+    sink = None
+    if args.output and args.format != "json":
+        sink = create_sink(args.format, args.output, USER_ID_FIELDS)
+    
+    progress = None
+    if args.progress and len(usernames) > 1:
+        from capacity_planner import ProgressReporter
+        progress = ProgressReporter(len(usernames), interval=args.progress, finish_within=finish_within)
+    
+    journal = None
+    pending = usernames
+    if args.journal:
+        from job_journal import JobJournal
+        journal = JobJournal(args.journal)
+        pending = journal.pending(usernames)
+        if len(pending) < len(usernames):
+            print(f"Resuming: {len(usernames) - len(pending)} username(s) already resolved in {args.journal}")
+        if progress:
+            progress.total = len(pending)
+    
+    def write_result(username, user_id):
+        if journal:
+            journal.record(username, user_id)
+        if sink:
+            sink.write({"username": username, "user_id": user_id})
+        if progress:
+            progress(username, user_id)
+    
+    # Results from an earlier run still belong in this run's output
+    if journal and sink:
+        for username in usernames:
+            if journal.results.get(username):
+                sink.write({"username": username, "user_id": journal.results[username]})
+    
+    profiler = nullcontext()
+    if args.profile:
+        profiler = profile_run(args.profile, args.profile_mode)
+    
     # Scrape user IDs
-    results = scraper.get_user_ids(usernames, delay_between=args.delay)
+    runner = None
+    try:
+        with profiler:
+            if args.processes > 1:
+                from sharded_runner import ShardedRunner
+                runner = ShardedRunner.from_scraper(scraper, processes=args.processes, delay=args.delay)
+                print(f"Running {runner.processes} worker process(es)")
+                results = runner.run(pending, on_result=write_result)
+            elif args.extract_workers:
+                from extraction_pipeline import ExtractionPipeline
+                pipeline = ExtractionPipeline(scraper, extract_workers=args.extract_workers)
+                results = pipeline.run(pending, on_result=write_result)
+            else:
+                results = scraper.get_user_ids(pending, delay_between=args.delay, on_result=write_result)
+    finally:
+        if scraper.config_watcher:
+            scraper.config_watcher.stop()
+        if progress:
+            progress.finish()
+        if scraper.tracer:
+            scraper.tracer.close()
+        if journal:
+            journal.compact()
+            journal.close()
+        if sink:
+            sink.close()
+        scraper.persist_cookies(force=True)
+        if scraper.state_store:
+            scraper.state_store.save(scraper.accounts, scraper.proxies, force=True)
+    
+    if journal:
+        results = {username: journal.results.get(username) for username in usernames}
     
     # Prepare output
     output_data = {
@@ -103,18 +362,20 @@ def main():
     }
     
     if args.stats:
-        output_data["statistics"] = scraper.get_stats()
+        output_data["statistics"] = runner.get_stats() if runner else scraper.get_stats()
     
     # Output results
-    output_json = json.dumps(output_data, indent=2)
-    
-    if args.output:
+    if sink:
+        print(f"\nResults saved to {args.output} ({args.format})")
+        if args.stats:
+            print(json.dumps(output_data["statistics"], indent=2))
+    elif args.output:
         with open(args.output, 'w') as f:
-            f.write(output_json)
+            json.dump(output_data, f, indent=2)
         print(f"\nResults saved to {args.output}")
     else:
         print("\nResults:")
-        print(output_json)
+        print(json.dumps(output_data, indent=2))
     
     # Print summary
     print(f"\nSummary: {output_data['summary']['successful']}/{output_data['summary']['total']} successful")
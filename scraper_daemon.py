@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Long-running lookup daemon with a local HTTP API
+Keeps one warm scraper so callers don't pay startup cost per batch
+
+Endpoints:
+    GET  /health
+    GET  /v1/user_id?username=<name>[&priority=bulk]
+    POST /v1/user_ids          {"usernames": [...], "priority": "bulk"}
+    POST /v1/followers         {"username": "...", "max": 100, "priority": "bulk"}
+    GET  /v1/jobs/<job_id>
+    GET  /v1/stats
+    GET  /v1/history?user_id=<id> | ?username=<name>
+
+Single lookups default to the interactive lane, batches and follower jobs to bulk.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from config_loader import load_accounts_from_json, load_proxies_from_json
+from id_cache import IDCache
+from instagram_followers_scraper import InstagramFollowersScraper
+from instagram_scraper import AccountsUnavailable
+from logging_setup import add_logging_arguments, configure_logging_from_args
+from lookup_engine import PRIORITY_BULK, PRIORITY_INTERACTIVE, LookupEngine
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler exposing the lookup engine as JSON endpoints"""
+
+    server_version = "InstagramIDScraperDaemon/1.0"
+
+    @property
+    def engine(self) -> LookupEngine:
+        return self.server.engine
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_unavailable(self, error: AccountsUnavailable):
+        """503 for lookups that no account can serve, with Retry-After when an account frees up"""
+        headers = {}
+        if error.retry_at is not None:
+            headers["Retry-After"] = str(max(1, math.ceil(error.retry_at.timestamp() - time.time())))
+        self._send_json(503, {"error": str(error)}, headers)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip('/')
+
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/v1/user_id":
+            query = parse_qs(parsed.query)
+            username = query.get("username", [""])[0]
+            if not username:
+                self._send_json(400, {"error": "username is required"})
+                return
+            try:
+                user_id = self.engine.lookup(username, timeout=self.server.request_timeout,
+                                             priority=query.get("priority", [PRIORITY_INTERACTIVE])[0])
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except FutureTimeoutError:
+                self._send_json(504, {"error": "lookup timed out", "username": username})
+                return
+            except AccountsUnavailable as e:
+                self._send_unavailable(e)
+                return
+            self._send_json(200, {"username": username, "user_id": user_id})
+        elif path.startswith("/v1/jobs/"):
+            job = self.engine.get_job(path[len("/v1/jobs/"):])
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+            else:
+                self._send_json(200, job)
+        elif path == "/v1/stats":
+            stats = self.engine.get_stats()
+            if getattr(self.server, "refresher", None):
+                stats["refresher"] = self.server.refresher.get_stats()
+            self._send_json(200, stats)
+        elif path == "/v1/history":
+            query = parse_qs(parsed.query)
+            user_id = query.get("user_id", [""])[0]
+            username = query.get("username", [""])[0]
+            if user_id:
+                self._send_json(200, {"user_id": user_id, "usernames": self.engine.cache.history(user_id)})
+            elif username:
+                self._send_json(200, {"username": username,
+                                      "owner_changes": self.engine.cache.owner_changes(username)})
+            else:
+                self._send_json(400, {"error": "user_id or username is required"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip('/')
+        try:
+            payload = self._read_json()
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "JSON body must be an object"})
+            return
+
+        if path == "/v1/user_ids":
+            usernames = payload.get("usernames") or []
+            if not isinstance(usernames, list) or not usernames or not all(isinstance(u, str) for u in usernames):
+                self._send_json(400, {"error": "usernames must be a non-empty list of strings"})
+                return
+            try:
+                results = self.engine.lookup_many(usernames, timeout=self.server.request_timeout,
+                                                  priority=payload.get("priority", PRIORITY_BULK))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except FutureTimeoutError:
+                self._send_json(504, {"error": "lookups timed out"})
+                return
+            except AccountsUnavailable as e:
+                self._send_unavailable(e)
+                return
+            self._send_json(200, {
+                "results": results,
+                "summary": {
+                    "total": len(results),
+                    "successful": sum(1 for v in results.values() if v is not None),
+                    "failed": sum(1 for v in results.values() if v is None)
+                }
+            })
+        elif path == "/v1/followers":
+            username = payload.get("username")
+            if not username or not isinstance(username, str):
+                self._send_json(400, {"error": "username is required"})
+                return
+            try:
+                job_id = self.engine.submit_followers(username, max_followers=payload.get("max"),
+                                                      priority=payload.get("priority", PRIORITY_BULK))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(202, {"job_id": job_id, "status": "queued"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """Threaded HTTP server listening on a Unix domain socket"""
+    daemon_threads = True
+
+
+def create_server(engine: LookupEngine, host: str = "127.0.0.1", port: int = 8765,
+                  unix_socket: str = None, request_timeout: float = None):
+    """
+    Create the HTTP server for a lookup engine
+
+    Args:
+        engine: Started LookupEngine
+        host: Interface to bind (localhost by default)
+        port: TCP port
+        unix_socket: Optional Unix socket path, used instead of host/port
+        request_timeout: Maximum seconds a request waits for its lookups
+
+    Returns:
+        Server instance (call serve_forever() on it)
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, DaemonRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+        server.daemon_threads = True
+    server.engine = engine
+    server.request_timeout = request_timeout
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Instagram ID scraper as a local lookup daemon")
+    parser.add_argument("--accounts-file", default="accounts.json", help="Path to accounts JSON file")
+    parser.add_argument("--proxies-file", help="Path to proxies JSON file (optional)")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--cache", default="id_cache.db", help="SQLite ID cache path (default: id_cache.db)")
+    parser.add_argument("--cache-ttl", type=float, help="Maximum age of cached IDs in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="Worker threads draining the lanes (default: 1)")
+    parser.add_argument("--reserved-workers", type=int,
+                        help="Workers that only serve interactive lookups (default: 1; added on top "
+                             "of --workers if none would be left for the other lanes)")
+    parser.add_argument("--request-timeout", type=float, help="Maximum seconds an HTTP request waits")
+    parser.add_argument("--refresh-max-age", type=float,
+                        help="Re-validate cached IDs in the background so none is older than this many days")
+    parser.add_argument("--refresh-daily-budget", type=int, help="Maximum background re-validations per day")
+    parser.add_argument("--watch-config", action="store_true",
+                        help="Apply edits of the accounts and proxies files without restarting")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    if not Path(args.accounts_file).exists():
+        print(f"Error: Accounts file not found: {args.accounts_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        accounts = load_accounts_from_json(args.accounts_file)
+        if not accounts:
+            print("Error: No accounts found in configuration file", file=sys.stderr)
+            sys.exit(1)
+    except Exception as e:
+        print(f"Error loading accounts: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    proxies = None
+    if args.proxies_file:
+        try:
+            proxies = load_proxies_from_json(args.proxies_file)
+        except Exception as e:
+            print(f"Warning: Error loading proxies: {e}", file=sys.stderr)
+
+    scraper = InstagramFollowersScraper(accounts=accounts, proxies=proxies)
+    engine = LookupEngine(scraper, cache=IDCache(args.cache, ttl=args.cache_ttl), workers=args.workers,
+                          reserved_workers=args.reserved_workers)
+    engine.start()
+    if args.watch_config:
+        scraper.watch_config(args.accounts_file, args.proxies_file)
+
+    refresher = None
+    if args.refresh_max_age:
+        from cache_refresher import CacheRefresher
+        refresher = CacheRefresher(engine, max_age=args.refresh_max_age * 86400,
+                                   daily_budget=args.refresh_daily_budget)
+        refresher.start()
+
+    server = create_server(engine, args.host, args.port, args.socket, args.request_timeout)
+    server.refresher = refresher
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Lookup daemon listening on {where} with {len(accounts)} account(s)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        if scraper.config_watcher:
+            scraper.config_watcher.stop()
+        if refresher:
+            refresher.stop(timeout=5)
+        engine.stop(timeout=5)
+        engine.cache.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
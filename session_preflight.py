@@ -0,0 +1,167 @@
+"""
+Parallel health pre-flight for accounts and proxies
+Probes every session and proxy before a batch starts and deactivates dead ones
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+from instagram_scraper import InstagramIDScraper, InstagramAccount, Proxy
+
+logger = logging.getLogger(__name__)
+
+# Small authenticated page: 200 when logged in, redirect to /accounts/login/ when the session is dead
+ACCOUNT_PROBE_URL = "https://www.instagram.com/accounts/edit/"
+# Tiny public file, only used to check that the proxy can reach Instagram
+PROXY_PROBE_URL = "https://www.instagram.com/robots.txt"
+
+
+def probe_proxy(scraper: InstagramIDScraper, proxy: Proxy, timeout: float = 10) -> Dict:
+    """
+    Check that a proxy can reach Instagram
+
+    Returns:
+        Dictionary with 'proxy', 'status' ('ok' or 'dead'), 'http_status', 'latency' and 'detail'
+    """
+    result = {"proxy": f"{proxy.host}:{proxy.port}", "status": "dead", "http_status": None,
+              "latency": None, "detail": ""}
+    session = requests.Session()
+    session.proxies.update(proxy.to_dict())
+    start = time.time()
+    try:
+        response = session.get(PROXY_PROBE_URL, timeout=timeout, allow_redirects=False)
+        result["latency"] = time.time() - start
+        result["http_status"] = response.status_code
+        if response.status_code < 500:
+            result["status"] = "ok"
+        else:
+            result["detail"] = f"Status {response.status_code}"
+    except requests.exceptions.RequestException as e:
+        result["detail"] = str(e)
+    finally:
+        session.close()
+    return result
+
+
+def probe_account(scraper: InstagramIDScraper, account: InstagramAccount, proxy: Optional[Proxy] = None,
+                  timeout: float = 10) -> Dict:
+    """
+    Check that an account's session is still logged in
+
+    Only the response headers are read, so the probe costs one small request.
+
+    Returns:
+        Dictionary with 'account', 'proxy', 'status' ('ok', 'expired', 'rate_limited' or 'error'),
+        'http_status', 'latency' and 'detail'
+    """
+    result = {"account": account.name, "proxy": f"{proxy.host}:{proxy.port}" if proxy else None,
+              "status": "error", "http_status": None, "latency": None, "detail": ""}
+    session = scraper._create_session(account, proxy)
+    start = time.time()
+    try:
+        response = session.get(ACCOUNT_PROBE_URL, timeout=timeout, allow_redirects=False, stream=True)
+        result["latency"] = time.time() - start
+        result["http_status"] = response.status_code
+        location = response.headers.get('Location', '')
+        response.close()
+        scraper._sync_cookies(account, session)
+
+        if response.status_code == 200:
+            result["status"] = "ok"
+        elif response.status_code in [301, 302, 303, 307, 308] and '/accounts/login' in location.lower():
+            result["status"] = "expired"
+            result["detail"] = "Redirected to login"
+        elif response.status_code == 401:
+            result["status"] = "expired"
+            result["detail"] = "Unauthorized"
+        elif response.status_code == 429:
+            result["status"] = "rate_limited"
+        else:
+            result["detail"] = f"Status {response.status_code}"
+    except requests.exceptions.RequestException as e:
+        result["detail"] = str(e)
+    finally:
+        session.close()
+    return result
+
+
+def run_preflight(scraper: InstagramIDScraper, max_workers: int = 16, timeout: float = 10,
+                  deactivate: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Probe all proxies and then all accounts of a scraper concurrently
+
+    Proxies are checked first so that account probes only go through proxies
+    that work. Dead proxies and expired accounts are marked inactive when
+    `deactivate` is set. Rate-limited accounts stay active, and so do accounts
+    whose probe failed with a network error or an unexpected status ('error'):
+    that says more about the proxy or the network than about the session.
+
+    Args:
+        scraper: Scraper whose accounts and proxies are checked
+        max_workers: Maximum number of concurrent probes
+        timeout: Per-probe timeout in seconds
+        deactivate: Mark failing accounts/proxies inactive
+
+    Returns:
+        Dictionary with 'accounts' and 'proxies' probe results
+    """
+    report = {"accounts": [], "proxies": []}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        proxies = [p for p in scraper.proxies if p.is_active]
+        report["proxies"] = list(executor.map(lambda p: probe_proxy(scraper, p, timeout), proxies))
+
+        if deactivate:
+            for proxy, result in zip(proxies, report["proxies"]):
+                if result["status"] != "ok":
+                    logger.warning(f"Pre-flight: deactivating proxy {proxy.host}:{proxy.port} ({result['detail']})")
+                    proxy.is_active = False
+
+        working_proxies = [p for p, r in zip(proxies, report["proxies"]) if r["status"] == "ok"]
+        accounts = [acc for acc in scraper.accounts if acc.is_active]
+        pairs = [
+            (acc, working_proxies[i % len(working_proxies)] if working_proxies else None)
+            for i, acc in enumerate(accounts)
+        ]
+        report["accounts"] = list(executor.map(lambda pair: probe_account(scraper, pair[0], pair[1], timeout), pairs))
+
+    if deactivate:
+        for account, result in zip(accounts, report["accounts"]):
+            if result["status"] == "expired":
+                logger.warning(f"Pre-flight: deactivating account {account.name} ({result['status']})")
+                account.is_active = False
+
+    return report
+
+
+def format_readiness_table(report: Dict[str, List[Dict]]) -> str:
+    """Render a pre-flight report as a plain-text table"""
+    lines = []
+
+    def latency(value):
+        return f"{value * 1000:.0f} ms" if value is not None else "-"
+
+    if report["proxies"]:
+        lines.append(f"{'PROXY':<32} {'STATUS':<12} {'HTTP':<6} {'LATENCY':<10} DETAIL")
+        for r in report["proxies"]:
+            lines.append(f"{r['proxy']:<32} {r['status']:<12} {str(r['http_status'] or '-'):<6} "
+                         f"{latency(r['latency']):<10} {r['detail'][:60]}")
+        lines.append("")
+
+    lines.append(f"{'ACCOUNT':<20} {'PROXY':<28} {'STATUS':<12} {'HTTP':<6} {'LATENCY':<10} DETAIL")
+    for r in report["accounts"]:
+        lines.append(f"{r['account']:<20} {(r['proxy'] or 'direct'):<28} {r['status']:<12} "
+                     f"{str(r['http_status'] or '-'):<6} {latency(r['latency']):<10} {r['detail'][:60]}")
+
+    ready = sum(1 for r in report["accounts"] if r["status"] in ("ok", "rate_limited"))
+    unchecked = sum(1 for r in report["accounts"] if r["status"] == "error")
+    ready_proxies = sum(1 for r in report["proxies"] if r["status"] == "ok")
+    lines.append("")
+    lines.append(f"Ready: {ready}/{len(report['accounts'])} account(s)"
+                 + (f", {ready_proxies}/{len(report['proxies'])} proxy/proxies" if report["proxies"] else "")
+                 + (f" ({unchecked} account(s) could not be checked and stay active)" if unchecked else ""))
+    return "\n".join(lines)
@@ -0,0 +1,293 @@
+"""
+Multi-process sharded runner
+Partitions accounts and proxies across worker processes, each with its own scraper
+"""
+
+import logging
+import multiprocessing
+import queue
+import random
+import signal
+import time
+from typing import Callable, Dict, List, Optional
+
+from instagram_scraper import AccountsUnavailable, InstagramIDScraper, InstagramAccount, Proxy
+from logging_setup import stop_logging
+
+logger = logging.getLogger(__name__)
+
+# Scraper attributes copied into every worker process
+SCRAPER_SETTINGS = ["min_delay", "max_delay", "max_errors_per_account", "rate_limit_cooldown",
+                    "max_requests_per_account_per_day", "connect_timeout", "read_timeout",
+                    "lookup_deadline", "hedge_percentile", "hedge_min_samples", "proxy_affinity",
+                    "id_index_path", "trace_path", "trace_sample_rate"]
+
+# Account and proxy fields that workers change and send back to the parent
+ACCOUNT_STATE = ["cookies", "session_id", "is_active", "last_used", "request_count", "error_count",
+                 "cooldown_until", "daily_requests"]
+PROXY_STATE = ["is_active", "error_count", "request_count", "last_used"]
+
+
+def partition(items: List, parts: int) -> List[List]:
+    """
+    Split items round-robin into `parts` lists
+
+    When there are fewer items than parts, items are reused so that no part
+    is empty (used for proxies, which may be shared between workers).
+    """
+    if not items:
+        return [[] for _ in range(parts)]
+    if len(items) < parts:
+        return [[items[i % len(items)]] for i in range(parts)]
+    return [items[i::parts] for i in range(parts)]
+
+
+def _proxy_key(proxy: Proxy) -> str:
+    return f"{proxy.host}:{proxy.port}"
+
+
+def _shard_state(scraper: InstagramIDScraper) -> Dict[str, Dict[str, Dict]]:
+    """Account and proxy fields of a worker's scraper, for merging into the parent's objects"""
+    return {
+        "accounts": {acc.name: {key: getattr(acc, key) for key in ACCOUNT_STATE} for acc in scraper.accounts},
+        "proxies": {_proxy_key(p): {key: getattr(p, key) for key in PROXY_STATE} for p in scraper.proxies},
+    }
+
+
+def _worker_main(worker_index: int, accounts: List[InstagramAccount], proxies: List[Proxy],
+                 settings: Dict, task_queue, result_queue, stop_event):
+    # The parent handles Ctrl+C and tells workers to stop through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    scraper = InstagramIDScraper(accounts=accounts, proxies=proxies)
+    for key, value in settings.items():
+        if key not in ("proxy_affinity", "id_index_path", "trace_path", "trace_sample_rate", "delay"):
+            setattr(scraper, key, value)
+    if settings.get("proxy_affinity"):
+        scraper.enable_proxy_affinity()
+    if settings.get("id_index_path"):
+        # Every worker maps the same file, so the index is shared through the page cache
+        scraper.enable_id_index(settings["id_index_path"])
+    if settings.get("trace_path"):
+        # Workers append whole traces to the shared file
+        scraper.enable_tracing(settings.get("trace_sample_rate", 1.0), settings["trace_path"])
+
+    delay = settings.get("delay")
+    processed = 0
+    try:
+        while not stop_event.is_set():
+            if not any(acc.is_active for acc in scraper.accounts):
+                logger.error(f"Worker {worker_index} has no active accounts left, stopping")
+                break
+            try:
+                username = task_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if username is None:
+                break
+
+            user_id = scraper._lookup_index(username)
+            if user_id is None:
+                if processed:
+                    time.sleep(delay if delay is not None else random.uniform(scraper.min_delay, scraper.max_delay))
+                try:
+                    user_id = scraper.get_user_id(username)
+                except AccountsUnavailable as e:
+                    logger.error(f"Worker {worker_index} stopping: {e}")
+                    result_queue.put(("result", worker_index, username, None))
+                    break
+                processed += 1
+            result_queue.put(("result", worker_index, username, user_id))
+    finally:
+        result_queue.put(("stats", worker_index, scraper.get_stats(), _shard_state(scraper)))
+        if scraper.tracer:
+            scraper.tracer.close()
+        # Worker processes exit without running atexit handlers
+        stop_logging()
+
+
+class ShardedRunner:
+    """
+    Resolves usernames with N worker processes
+
+    Each process gets a disjoint slice of the accounts (and a slice of the
+    proxies) and its own InstagramIDScraper, so HTML decompression and
+    extraction run on all cores instead of being serialized by the GIL.
+    Usernames are fed over a shared queue, so fast workers take more of them.
+
+    Workers use copies of the accounts and proxies. When they finish, their
+    cookies, counters, cooldowns and deactivations are copied back into the
+    objects passed to the runner, so saving cookies or state afterwards
+    writes what the workers did.
+    """
+
+    def __init__(self, accounts: List[InstagramAccount], proxies: Optional[List[Proxy]] = None,
+                 processes: Optional[int] = None, settings: Optional[Dict] = None):
+        """
+        Args:
+            accounts: All accounts; partitioned across processes
+            proxies: Optional proxies; partitioned across processes
+            processes: Number of worker processes (default: CPU count, capped at the number of accounts)
+            settings: Scraper attributes for the workers (e.g. {"min_delay": 3}); "delay" sets a
+                fixed delay between requests instead of the random min_delay-max_delay one
+        """
+        if not accounts:
+            raise ValueError("ShardedRunner needs at least one account")
+        self.accounts = accounts
+        self.proxies = proxies or []
+        self.processes = max(1, min(processes or multiprocessing.cpu_count(), len(accounts)))
+        self.settings = settings or {}
+        self.stats: Dict = {}
+        self.scraper: Optional[InstagramIDScraper] = None
+
+    @classmethod
+    def from_scraper(cls, scraper: InstagramIDScraper, processes: Optional[int] = None,
+                     delay: Optional[float] = None) -> "ShardedRunner":
+        """
+        Create a runner with the accounts, proxies and rate-limit settings of an existing scraper
+
+        Worker state is merged back into the scraper's accounts and proxies, and
+        its cookies are marked for saving when a worker refreshed them.
+
+        Args:
+            scraper: Scraper to take the accounts, proxies and settings from
+            processes: Number of worker processes
+            delay: Optional fixed delay between requests in seconds
+        """
+        settings = {key: getattr(scraper, key) for key in SCRAPER_SETTINGS if hasattr(scraper, key)}
+        if delay is not None:
+            settings["delay"] = delay
+        runner = cls(scraper.accounts, scraper.proxies, processes=processes, settings=settings)
+        runner.scraper = scraper
+        return runner
+
+    def run(self, usernames: List[str],
+            on_result: Optional[Callable[[str, Optional[str]], None]] = None) -> Dict[str, Optional[str]]:
+        """
+        Resolve usernames across the worker processes
+
+        Ctrl+C stops the workers after their current lookup; usernames that were
+        not processed are returned with None.
+
+        Args:
+            usernames: Instagram usernames
+            on_result: Optional callback called with (username, user_id) as results arrive
+
+        Returns:
+            Dictionary mapping usernames to their IDs (or None if failed), in input order
+        """
+        usernames = [u.lstrip('@').strip() for u in usernames]
+        ctx = multiprocessing.get_context()
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        stop_event = ctx.Event()
+
+        account_slices = partition(self.accounts, self.processes)
+        proxy_slices = partition(self.proxies, self.processes)
+        workers = []
+        for i in range(self.processes):
+            process = ctx.Process(
+                target=_worker_main,
+                args=(i, account_slices[i], proxy_slices[i], self.settings, task_queue, result_queue, stop_event),
+                name=f"scraper-shard-{i}",
+                daemon=True,
+            )
+            process.start()
+            workers.append(process)
+
+        for username in usernames:
+            task_queue.put(username)
+        for _ in workers:
+            task_queue.put(None)
+
+        results: Dict[str, Optional[str]] = {}
+        worker_stats: Dict[int, Dict] = {}
+        worker_states: Dict[int, Dict] = {}
+        try:
+            self._collect(result_queue, workers, results, worker_stats, worker_states, on_result)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted - stopping worker processes")
+            stop_event.set()
+            self._collect(result_queue, workers, results, worker_stats, worker_states, on_result,
+                          deadline=time.time() + 60)
+        finally:
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            task_queue.cancel_join_thread()
+
+        self.stats = self._merge_stats(list(worker_stats.values()))
+        self._merge_state(list(worker_states.values()))
+        return {username: results.get(username) for username in usernames}
+
+    @staticmethod
+    def _collect(result_queue, workers, results: Dict, worker_stats: Dict, worker_states: Dict,
+                 on_result: Optional[Callable] = None, deadline: Optional[float] = None):
+        """Receive results until every worker has reported its stats (or exited, or the deadline passes)"""
+        while len(worker_stats) < len(workers) and (deadline is None or time.time() < deadline):
+            try:
+                message = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(p.is_alive() for p in workers):
+                    break
+                continue
+            if message[0] == "result":
+                _, _, username, user_id = message
+                results[username] = user_id
+                if on_result:
+                    on_result(username, user_id)
+            else:
+                _, index, stats, state = message
+                worker_stats[index] = stats
+                worker_states[index] = state
+
+    def _merge_stats(self, worker_stats: List[Dict]) -> Dict:
+        merged: Dict = {}
+        for stats in worker_stats:
+            for key, value in stats.items():
+                if isinstance(value, (int, float)):
+                    merged[key] = merged.get(key, 0) + value
+        # Proxies may be shared between shards, so report the configured totals
+        merged["total_proxies"] = len(self.proxies)
+        merged["active_proxies"] = min(merged.get("active_proxies", 0), len(self.proxies))
+        merged["processes"] = self.processes
+        merged["workers_reported"] = len(worker_stats)
+        return merged
+
+    def _merge_state(self, worker_states: List[Dict]):
+        """Copy the workers' account and proxy fields into the parent's objects"""
+        accounts = {acc.name: acc for acc in self.accounts}
+        proxies = {_proxy_key(p): p for p in self.proxies}
+        cookies_changed = False
+        # Each account belongs to one worker, so its fields are copied as they are
+        for state in worker_states:
+            for name, fields in state["accounts"].items():
+                account = accounts.get(name)
+                if account is None:
+                    continue
+                cookies_changed = cookies_changed or fields["cookies"] != account.cookies
+                for key, value in fields.items():
+                    setattr(account, key, value)
+
+        # Proxies may be shared between workers: add up what each one counted
+        start = {key: (p.request_count, p.error_count) for key, p in proxies.items()}
+        for state in worker_states:
+            for key, fields in state["proxies"].items():
+                proxy = proxies.get(key)
+                if proxy is None:
+                    continue
+                requests_before, errors_before = start[key]
+                proxy.request_count += fields["request_count"] - requests_before
+                proxy.error_count += fields["error_count"] - errors_before
+                proxy.is_active = proxy.is_active and fields["is_active"]
+                if fields["last_used"] and (proxy.last_used is None or fields["last_used"] > proxy.last_used):
+                    proxy.last_used = fields["last_used"]
+
+        if cookies_changed and self.scraper is not None:
+            with self.scraper._cookie_lock:
+                self.scraper._cookies_dirty = True
+
+    def get_stats(self) -> Dict:
+        """Merged statistics of all worker processes from the last run"""
+        return self.stats
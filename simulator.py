@@ -0,0 +1,475 @@
+"""
+Offline simulator for rotation and rate-limit policies
+Runs the real scraper scheduling and retry code against a model of Instagram on a virtual clock
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+import requests
+
+from instagram_scraper import AccountsUnavailable, InstagramAccount, InstagramIDScraper, Proxy
+from logging_setup import add_logging_arguments, configure_logging_from_args
+from sharded_runner import partition
+
+logger = logging.getLogger(__name__)
+
+# Virtual time starts here, so daily request totals fall on stable dates
+SIMULATION_START = datetime(2024, 1, 1).timestamp()
+
+
+class SimulationEnded(BaseException):
+    """
+    Raised in a worker whose next wake-up lies past the end of the simulation
+
+    A BaseException, so the scraper's own `except Exception` handlers let it through.
+    """
+
+
+class VirtualClock:
+    """
+    Discrete-event clock shared by simulated workers
+
+    Every worker is a thread, but only one runs at a time. A worker that
+    sleeps (a delay or a simulated request) is queued with its wake-up time.
+    When no worker is running, the clock jumps to the earliest wake-up and
+    resumes that worker. Idle time therefore costs nothing, and a seeded run
+    is reproducible.
+    """
+
+    def __init__(self, start: float = SIMULATION_START, end: Optional[float] = None):
+        """
+        Args:
+            start: Virtual time.time() value at the start
+            end: Virtual time at which workers are stopped (None = when they finish)
+        """
+        self.start = start
+        self.end = end
+        self._now = start
+        self._condition = threading.Condition()
+        self._timers: List = []  # Heap of (wake-up time, ticket)
+        self._tickets = itertools.count()
+        self._turn: Optional[int] = None
+        self._running = 0
+
+    def time(self) -> float:
+        """Virtual replacement of time.time()"""
+        return self._now
+
+    def now(self) -> datetime:
+        """Virtual replacement of datetime.now()"""
+        return datetime.fromtimestamp(self._now)
+
+    def sleep(self, seconds: float):
+        """Virtual replacement of time.sleep(): hand over to the next worker until the wake-up time"""
+        wake = self._now + max(0.0, seconds)
+        with self._condition:
+            ticket = self._schedule(wake)
+            self._running -= 1
+            self._dispatch()
+            self._wait_turn(ticket)
+        if self.end is not None and wake > self.end:
+            raise SimulationEnded()
+
+    def run(self, workers: List[Callable[[], None]]):
+        """Run the workers to completion (or until the end time), one at a time in virtual time"""
+        errors = []
+
+        def body(ticket: int, worker: Callable[[], None]):
+            with self._condition:
+                self._wait_turn(ticket)
+            try:
+                worker()
+            except SimulationEnded:
+                pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._dispatch()
+
+        with self._condition:
+            threads = [threading.Thread(target=body, args=(self._schedule(self._now), worker), daemon=True)
+                       for worker in workers]
+        for thread in threads:
+            thread.start()
+        with self._condition:
+            self._dispatch()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _schedule(self, wake: float) -> int:
+        ticket = next(self._tickets)
+        heapq.heappush(self._timers, (wake, ticket))
+        return ticket
+
+    def _dispatch(self):
+        if self._running or not self._timers:
+            return
+        wake, ticket = heapq.heappop(self._timers)
+        self._now = max(self._now, wake if self.end is None else min(wake, self.end))
+        self._turn = ticket
+        self._running = 1
+        self._condition.notify_all()
+
+    def _wait_turn(self, ticket: int):
+        while self._turn != ticket:
+            self._condition.wait()
+
+
+@dataclass
+class SimulationModel:
+    """
+    Assumed behaviour of Instagram, the accounts and the proxies
+
+    The defaults are rough guesses, not measured limits. Override them with
+    values observed in production (see --model).
+    """
+    accounts: int = 10
+    proxies: int = 5
+    latency_median: float = 0.8  # Seconds per profile request (log-normal)
+    latency_sigma: float = 0.5
+    proxy_failure_rate: float = 0.01  # Share of requests failing with a connection error
+    account_hourly_limit: int = 200  # Requests per account per rolling hour before 429s
+    account_daily_limit: int = 2000  # Requests per account per rolling day before 429s
+    proxy_hourly_limit: int = 1000  # Requests per IP per rolling hour before 429s
+    limit_spread: float = 0.3  # Each account's limits vary by up to this fraction
+    penalty_seconds: float = 1800  # An account or IP that got a 429 keeps getting them this long
+    ban_after: int = 30  # 429s (strikes) after which an account is checkpointed for good (401)
+    session_expiry_rate: float = 0.0001  # Chance per request that an account's session expires (401)
+    not_found_rate: float = 0.02  # Share of usernames that do not exist (404)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SimulationModel':
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown model setting(s): {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+
+@dataclass
+class Policy:
+    """Scraper settings to simulate, e.g. {"min_delay": 3, "rate_limit_cooldown": 1800}"""
+    name: str
+    settings: Dict = field(default_factory=dict)
+    processes: int = 1  # Worker processes sharing the accounts, as with --processes
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Policy':
+        data = dict(data)
+        name = data.pop("name")
+        processes = data.pop("processes", 1)
+        return cls(name, data, processes)
+
+
+class _Response:
+    """The parts of a requests.Response the scraper reads"""
+
+    def __init__(self, status_code: int, content: bytes = b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers: Dict[str, str] = {}
+
+
+class _Limiter:
+    """Rolling request windows of one account or IP"""
+
+    def __init__(self, hourly: int, daily: Optional[int]):
+        self.hourly = hourly
+        self.daily = daily
+        self.hour: Deque[float] = deque()
+        self.day: Deque[float] = deque()
+        self.penalty_until = 0.0
+        self.strikes = 0
+
+    def over_limit(self, now: float) -> bool:
+        while self.hour and self.hour[0] <= now - 3600:
+            self.hour.popleft()
+        while self.day and self.day[0] <= now - 86400:
+            self.day.popleft()
+        self.hour.append(now)
+        self.day.append(now)
+        return (now < self.penalty_until or len(self.hour) > self.hourly
+                or (self.daily is not None and len(self.day) > self.daily))
+
+
+class SimulatedInstagram:
+    """
+    Server side of the simulation: answers profile requests and records what happened
+
+    Requests over an account's or IP's rolling hourly/daily limit get a 429
+    and start a penalty during which every request gets a 429. Each 429 of
+    an account is a strike. After `ban_after` strikes the account is
+    checkpointed and all its requests get a 401. Latency is log-normal per
+    request, and requests that exceed the scraper's read timeout fail with a
+    timeout.
+    """
+
+    def __init__(self, model: SimulationModel, clock: VirtualClock, rng: random.Random):
+        self.model = model
+        self.clock = clock
+        self.rng = rng
+        self._accounts: Dict[str, _Limiter] = {}
+        self._ips: Dict[str, _Limiter] = {}
+        self.banned: set = set()
+        self.expired: set = set()
+        self.stats = {"requests": 0, "found": 0, "not_found": 0, "rate_limited": 0, "unauthorized": 0,
+                      "connection_errors": 0, "timeouts": 0, "requests_while_penalized": 0}
+
+    def _spread(self, value: int) -> int:
+        return max(1, round(value * self.rng.uniform(1 - self.model.limit_spread, 1 + self.model.limit_spread)))
+
+    def _limiter(self, table: Dict[str, _Limiter], key: str, hourly: int, daily: Optional[int]) -> _Limiter:
+        if key not in table:
+            table[key] = _Limiter(self._spread(hourly), self._spread(daily) if daily else None)
+        return table[key]
+
+    def max_strikes(self) -> int:
+        """Most 429s received by one account"""
+        return max((limits.strikes for limits in self._accounts.values()), default=0)
+
+    def session(self, account: InstagramAccount, proxy: Optional[Proxy] = None) -> '_SimulatedSession':
+        """Replacement of InstagramIDScraper._create_session"""
+        return _SimulatedSession(self, account, proxy)
+
+    def handle(self, account: InstagramAccount, proxy: Optional[Proxy], url: str, timeout) -> _Response:
+        """Answer one request, advancing the virtual clock by its latency"""
+        model = self.model
+        self.stats["requests"] += 1
+        connect_timeout, read_timeout = timeout or (10, 30)
+        if proxy is not None and self.rng.random() < model.proxy_failure_rate:
+            self.clock.sleep(min(connect_timeout, self.rng.uniform(0.1, 3)))
+            self.stats["connection_errors"] += 1
+            raise requests.exceptions.ProxyError("Simulated proxy failure")
+        latency = self.rng.lognormvariate(math.log(model.latency_median), model.latency_sigma)
+        if latency > read_timeout:
+            self.clock.sleep(read_timeout)
+            self.stats["timeouts"] += 1
+            raise requests.exceptions.ReadTimeout("Simulated read timeout")
+        self.clock.sleep(latency)
+        now = self.clock.time()
+
+        if account.name in self.banned or account.name in self.expired:
+            self.stats["unauthorized"] += 1
+            return _Response(401)
+        if self.rng.random() < model.session_expiry_rate:
+            self.expired.add(account.name)
+            self.stats["unauthorized"] += 1
+            return _Response(401)
+
+        account_limits = self._limiter(self._accounts, account.name, model.account_hourly_limit,
+                                       model.account_daily_limit)
+        ip = f"{proxy.host}:{proxy.port}" if proxy else "direct"
+        ip_limits = self._limiter(self._ips, ip, model.proxy_hourly_limit, None)
+        penalized = now < account_limits.penalty_until or now < ip_limits.penalty_until
+        # Both windows count the request, so evaluate both before combining
+        account_over, ip_over = account_limits.over_limit(now), ip_limits.over_limit(now)
+        if account_over or ip_over:
+            if penalized:
+                self.stats["requests_while_penalized"] += 1
+            for limits in (account_limits, ip_limits):
+                limits.penalty_until = max(limits.penalty_until, now + model.penalty_seconds)
+            account_limits.strikes += 1
+            if account_limits.strikes >= model.ban_after:
+                self.banned.add(account.name)
+            self.stats["rate_limited"] += 1
+            return _Response(429)
+
+        username = url.rstrip('/').rsplit('/', 1)[-1]
+        digest = int(hashlib.blake2b(username.encode(), digest_size=8).hexdigest(), 16)
+        if digest % 10000 < model.not_found_rate * 10000:
+            self.stats["not_found"] += 1
+            return _Response(404)
+        self.stats["found"] += 1
+        return _Response(200, f'<html>"profilePage_{10 ** 9 + digest % 10 ** 9}"</html>'.encode())
+
+
+class _SimulatedSession:
+    """Stands in for requests.Session: requests go to SimulatedInstagram"""
+
+    def __init__(self, server: SimulatedInstagram, account: InstagramAccount, proxy: Optional[Proxy]):
+        self.server = server
+        self.account = account
+        self.proxy = proxy
+        self.headers: Dict[str, str] = {}
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def get(self, url: str, timeout=None, **kwargs) -> _Response:
+        return self.server.handle(self.account, self.proxy, url, timeout)
+
+    def close(self):
+        pass
+
+
+def simulate(policy: Policy, model: SimulationModel, hours: float = 24, usernames: int = 1_000_000,
+             seed: int = 1) -> Dict:
+    """
+    Simulate one policy
+
+    Each worker runs its own InstagramIDScraper on a slice of the accounts
+    and proxies and resolves usernames from a shared queue with the delays
+    of sharded_runner. Only the network and the clock are simulated: account
+    selection, cooldowns, retries and deactivation are the scraper's own
+    code. Hedged requests need real threads and are turned off.
+
+    Args:
+        policy: Scraper settings to run
+        model: Assumed behaviour of Instagram, accounts and proxies
+        hours: Virtual duration
+        usernames: Usernames in the queue (the run ends early if they are all resolved)
+        seed: Random seed; the same seed gives the same result
+
+    Returns:
+        Throughput, ban risk and wasted requests of the policy. Throughput is
+        measured over the whole period, also when every account was
+        deactivated before its end (see virtual_hours and stopped_early).
+    """
+    random.seed(seed)
+    rng = random.Random(seed)
+    clock = VirtualClock(end=SIMULATION_START + hours * 3600)
+    server = SimulatedInstagram(model, clock, rng)
+    accounts = [InstagramAccount(f"sim{i + 1}", {"sessionid": f"sim{i + 1}"}, f"sim{i + 1}")
+                for i in range(model.accounts)]
+    proxies = [Proxy(f"10.0.{i // 250}.{i % 250 + 1}", 8080) for i in range(model.proxies)]
+    processes = max(1, min(policy.processes, len(accounts)))
+    queue = deque(f"user{i}" for i in range(usernames))
+    results = {"resolved": 0, "failed": 0}
+    scrapers = []
+
+    def make_worker(worker_accounts: List[InstagramAccount], worker_proxies: List[Proxy]) -> Callable[[], None]:
+        scraper = InstagramIDScraper(worker_accounts, worker_proxies)
+        scraper._time, scraper._sleep, scraper._now = clock.time, clock.sleep, clock.now
+        scraper._create_session = server.session
+        for key, value in policy.settings.items():
+            if key != "proxy_affinity":
+                setattr(scraper, key, value)
+        scraper.hedge_percentile = None
+        if policy.settings.get("proxy_affinity"):
+            scraper.enable_proxy_affinity(prewarm=False)
+        scrapers.append(scraper)
+
+        def run():
+            processed = 0
+            while queue:
+                if not any(acc.is_active for acc in scraper.accounts):
+                    return
+                username = queue.popleft()
+                if processed:
+                    clock.sleep(random.uniform(scraper.min_delay, scraper.max_delay))
+                try:
+                    user_id = scraper.get_user_id(username)
+                except AccountsUnavailable:
+                    queue.appendleft(username)
+                    return
+                processed += 1
+                results["resolved" if user_id else "failed"] += 1
+        return run
+
+    workers = [make_worker(a, p) for a, p in zip(partition(accounts, processes), partition(proxies, processes))]
+    clock.run(workers)
+
+    # A policy that loses all its accounts early is charged for the whole period
+    ran_hours = (clock.time() - clock.start) / 3600
+    elapsed_hours = ran_hours if not queue else hours
+    requests_sent = server.stats["requests"]
+    wasted = requests_sent - server.stats["found"] - server.stats["not_found"]
+    return {
+        "policy": policy.name,
+        "settings": policy.settings,
+        "processes": processes,
+        "virtual_hours": round(ran_hours, 2),
+        "stopped_early": bool(queue) and ran_hours < hours,
+        "resolved": results["resolved"],
+        "failed": results["failed"],
+        "usernames_per_hour": round(results["resolved"] / elapsed_hours, 1) if elapsed_hours else 0.0,
+        "requests": requests_sent,
+        "wasted_requests": wasted,
+        "wasted_share": round(wasted / requests_sent, 3) if requests_sent else 0.0,
+        "banned_accounts": len(server.banned),
+        # How close the most exposed account came to a checkpoint (1.0 = banned)
+        "ban_risk": round(min(1.0, server.max_strikes() / model.ban_after), 3),
+        "deactivated_accounts": sum(1 for s in scrapers for acc in s.accounts if not acc.is_active),
+        "server": dict(server.stats),
+    }
+
+
+def format_comparison(reports: List[Dict]) -> str:
+    """Table with one row per simulated policy"""
+    columns = [("policy", "Policy", "{}"), ("usernames_per_hour", "IDs/hour", "{:.1f}"),
+               ("resolved", "Resolved", "{}"), ("failed", "Failed", "{}"), ("requests", "Requests", "{}"),
+               ("wasted_share", "Wasted", "{:.1%}"), ("ban_risk", "Ban risk", "{:.0%}"),
+               ("deactivated_accounts", "Deactivated", "{}"), ("virtual_hours", "Ran (h)", "{:g}")]
+    rows = [[header for _, header, _ in columns]]
+    rows += [[fmt.format(report[key]) for key, _, fmt in columns] for report in reports]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def main():
+    """CLI: compare policies in simulation"""
+    parser = argparse.ArgumentParser(description="Simulate scraper rotation and rate-limit policies offline")
+    parser.add_argument("--policies",
+                        help='JSON file with a list of policies, e.g. [{"name": "slow", "min_delay": 5, '
+                             '"max_delay": 9}] (default: the scraper defaults)')
+    parser.add_argument("--model", help="JSON file overriding SimulationModel settings")
+    parser.add_argument("--accounts", type=int, help="Simulated accounts (overrides the model)")
+    parser.add_argument("--proxies", type=int, help="Simulated proxies (overrides the model)")
+    parser.add_argument("--hours", type=float, default=24, help="Virtual hours to simulate (default: 24)")
+    parser.add_argument("--usernames", type=int, default=1_000_000,
+                        help="Usernames to resolve; the run ends early when all are done (default: 1000000)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    parser.add_argument("--output", "-o", help="Also write the full reports to this JSON file")
+    add_logging_arguments(parser)
+    # The scraper logs every simulated failure; show them only when asked
+    parser.set_defaults(log_level="CRITICAL")
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    try:
+        model = SimulationModel()
+        if args.model:
+            with open(args.model, 'r') as f:
+                model = SimulationModel.from_dict(json.load(f))
+        policies = [Policy("default")]
+        if args.policies:
+            with open(args.policies, 'r') as f:
+                policies = [Policy.from_dict(p) for p in json.load(f)]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error loading configuration: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.accounts is not None:
+        model.accounts = args.accounts
+    if args.proxies is not None:
+        model.proxies = args.proxies
+
+    reports = []
+    for policy in policies:
+        print(f"Simulating {policy.name}...", file=sys.stderr)
+        reports.append(simulate(policy, model, hours=args.hours, usernames=args.usernames, seed=args.seed))
+
+    print(f"{model.accounts} accounts, {model.proxies} proxies, {args.hours:g} virtual hours\n")
+    print(format_comparison(reports))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"model": asdict(model), "reports": reports}, f, indent=2)
+        print(f"\n✓ Saved reports to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
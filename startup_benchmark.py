@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Start-up time benchmark for the command-line tools
+Measures interpreter start, module imports, config loading and `--help` in fresh processes
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose import is on the start-up path of a CLI
+IMPORTS = ["instagram_scraper", "config_loader", "scraper_cli", "instagram_followers_scraper"]
+
+# Scripts timed end to end with --help
+SCRIPTS = ["scraper_cli.py", "instagram_followers_scraper.py"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "requests": "requests" in sys.modules}}))
+"""
+
+CONFIG_SNIPPET = """
+import json, time
+import config_loader
+start = time.perf_counter()
+accounts = config_loader.load_accounts_from_json({path!r}, use_cache={use_cache})
+print(json.dumps({{"seconds": time.perf_counter() - start, "accounts": len(accounts)}}))
+"""
+
+
+def _run_snippet(code: str) -> Dict:
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _wall_time(args: List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   check=True)
+    return time.perf_counter() - start
+
+
+def _summary(samples: List[float]) -> Dict:
+    return {"median_ms": round(statistics.median(samples) * 1000, 2), "min_ms": round(min(samples) * 1000, 2)}
+
+
+def write_sample_accounts(path: str, count: int):
+    """Write an accounts file with `count` made-up accounts"""
+    accounts = [{
+        "name": f"account{i}",
+        "cookies": {"sessionid": f"{i}%3Asession", "csrftoken": "x" * 32, "ds_user_id": str(10 ** 9 + i),
+                    "rur": "\"CLN\\054123\\0541700000000:01f7\""},
+        "session_id": f"{i}%3Asession",
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/120.0.0.0 Safari/537.36",
+    } for i in range(count)]
+    with open(path, 'w') as f:
+        json.dump({"accounts": accounts}, f, indent=2)
+
+
+def run_benchmark(repeat: int = 10, accounts: int = 200) -> Dict[str, Dict]:
+    """
+    Time every start-up step in fresh interpreter processes
+
+    Each step runs once to warm the bytecode and config caches, then
+    `repeat` times. Import steps also record whether requests was loaded.
+
+    Args:
+        repeat: Measured runs per step
+        accounts: Accounts in the generated file used for the config-load steps
+
+    Returns:
+        Step name -> median and minimum milliseconds (plus "requests" for imports)
+    """
+    results: Dict[str, Dict] = {}
+
+    samples = [_wall_time(["-c", "pass"]) for _ in range(repeat + 1)][1:]
+    results["interpreter"] = _summary(samples)
+
+    for module in IMPORTS:
+        runs = [_run_snippet(IMPORT_SNIPPET.format(module=module)) for _ in range(repeat + 1)][1:]
+        results[f"import {module}"] = {**_summary([r["seconds"] for r in runs]), "requests": runs[-1]["requests"]}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "accounts.json")
+        write_sample_accounts(path, accounts)
+        for use_cache, label in ((False, "parse"), (True, "cached")):
+            runs = [_run_snippet(CONFIG_SNIPPET.format(path=path, use_cache=use_cache))
+                    for _ in range(repeat + 1)][1:]
+            results[f"load {accounts} accounts ({label})"] = _summary([r["seconds"] for r in runs])
+
+    for script in SCRIPTS:
+        samples = [_wall_time([script, "--help"]) for _ in range(repeat + 1)][1:]
+        results[f"{script} --help"] = _summary(samples)
+    return results
+
+
+def format_results(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> str:
+    """Table of the results, with the change against a baseline if given"""
+    width = max(len(name) for name in results)
+    lines = [f"{'Step':<{width}}  {'Median':>10}  {'Min':>10}" + ("  Change" if baseline else "")]
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['median_ms']:>8.2f}ms  {result['min_ms']:>8.2f}ms"
+        if baseline and name in baseline and baseline[name]["median_ms"]:
+            change = result["median_ms"] / baseline[name]["median_ms"] - 1
+            line += f"  {change:+.0%}"
+        if result.get("requests"):
+            line += "  (imports requests)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Steps whose median got slower than the baseline by more than `tolerance` (a fraction)"""
+    return [name for name, result in results.items()
+            if name in baseline and result["median_ms"] > baseline[name]["median_ms"] * (1 + tolerance)]
+
+
+def main():
+    """CLI for the start-up benchmark"""
+    parser = argparse.ArgumentParser(description="Measure start-up time of the command-line tools")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured runs per step (default: 10)")
+    parser.add_argument("--accounts", type=int, default=200,
+                        help="Accounts in the generated accounts file (default: 200)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="With --compare, exit with status 1 if a step is this much slower (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = run_benchmark(args.repeat, args.accounts)
+    print(format_results(results, baseline))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Saved results to {args.save}")
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"\nSlower than {args.compare} by more than {args.tolerance:.0%}: {', '.join(slower)}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Persistent runtime state for accounts and proxies
+Keeps usage counters, cooldowns and daily totals across process restarts
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config_loader import atomic_write_json
+from instagram_scraper import InstagramAccount, Proxy
+
+logger = logging.getLogger(__name__)
+
+# Days of per-account daily totals kept in the state file
+DAILY_HISTORY_DAYS = 7
+
+
+def default_state_path(accounts_file: str) -> str:
+    """State file that lives next to an accounts file (accounts.json -> accounts.state.json)"""
+    root, _ = os.path.splitext(accounts_file)
+    return f"{root}.state.json"
+
+
+def _session_fingerprint(account: InstagramAccount) -> str:
+    # Lets us notice freshly extracted cookies without storing the session ID itself
+    return hashlib.sha256(account.session_id.encode('utf-8')).hexdigest()[:16]
+
+
+def _to_iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _from_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class RuntimeStateStore:
+    """
+    JSON state file holding the runtime fields of accounts and proxies
+
+    Saved fields are `request_count`, `error_count`, `last_used`, `is_active`,
+    `cooldown_until` and `daily_requests` for accounts, and `request_count`,
+    `error_count`, `last_used` and `is_active` for proxies. `save` is cheap to
+    call after every request: it only rewrites the file (atomically) once
+    every `flush_interval` seconds.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 30):
+        """
+        Args:
+            path: State file path
+            flush_interval: Minimum seconds between writes
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict:
+        """Read the raw state file (empty state if it doesn't exist or is unreadable)"""
+        if not os.path.exists(self.path):
+            return {"accounts": {}, "proxies": {}}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.path}: {e}")
+            return {"accounts": {}, "proxies": {}}
+        data.setdefault("accounts", {})
+        data.setdefault("proxies", {})
+        return data
+
+    def apply(self, accounts: List[InstagramAccount], proxies: Optional[List[Proxy]] = None):
+        """
+        Restore saved runtime state onto account and proxy objects
+
+        An account whose session ID changed since the state was saved (fresh
+        cookies were extracted) starts with a clean error count and is active again.
+        """
+        data = self.load()
+
+        for account in accounts:
+            saved = data["accounts"].get(account.name)
+            if not saved:
+                continue
+            account.request_count = saved.get("request_count", 0)
+            account.last_used = _from_iso(saved.get("last_used"))
+            account.cooldown_until = _from_iso(saved.get("cooldown_until"))
+            account.daily_requests = dict(saved.get("daily_requests", {}))
+            if saved.get("session") == _session_fingerprint(account):
+                account.error_count = saved.get("error_count", 0)
+                account.is_active = saved.get("is_active", True)
+
+        for proxy in proxies or []:
+            saved = data["proxies"].get(f"{proxy.host}:{proxy.port}")
+            if not saved:
+                continue
+            proxy.request_count = saved.get("request_count", 0)
+            proxy.error_count = saved.get("error_count", 0)
+            proxy.last_used = _from_iso(saved.get("last_used"))
+            proxy.is_active = saved.get("is_active", True)
+
+    def save(self, accounts: List[InstagramAccount], proxies: Optional[List[Proxy]] = None, force: bool = False):
+        """Write the current runtime state if the flush interval has elapsed (or force is set)"""
+        if not force and time.time() - self._last_flush < self.flush_interval:
+            return
+        with self._lock:
+            self._last_flush = time.time()
+            oldest_day = (datetime.now() - timedelta(days=DAILY_HISTORY_DAYS)).date().isoformat()
+            # Keep entries for accounts/proxies not in this process (e.g. another slice of accounts.json)
+            data = self.load()
+            for account in accounts:
+                data["accounts"][account.name] = {
+                    "session": _session_fingerprint(account),
+                    "request_count": account.request_count,
+                    "error_count": account.error_count,
+                    "last_used": _to_iso(account.last_used),
+                    "is_active": account.is_active,
+                    "cooldown_until": _to_iso(account.cooldown_until),
+                    "daily_requests": {day: n for day, n in account.daily_requests.items() if day >= oldest_day},
+                }
+            for proxy in proxies or []:
+                data["proxies"][f"{proxy.host}:{proxy.port}"] = {
+                    "request_count": proxy.request_count,
+                    "error_count": proxy.error_count,
+                    "last_used": _to_iso(proxy.last_used),
+                    "is_active": proxy.is_active,
+                }
+            data["saved_at"] = datetime.now().isoformat()
+            try:
+                atomic_write_json(data, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save runtime state to {self.path}: {e}")
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from config_loader import load_accounts_from_json
+from config_watcher import ConfigWatcher
+from instagram_scraper import InstagramAccount, InstagramIDScraper, Proxy
+
+
+def account(name, session_id="1%3Aold"):
+    return InstagramAccount(name=name, cookies={"sessionid": session_id, "csrftoken": "token"}, session_id=session_id)
+
+
+def write_accounts(path, accounts):
+    with open(path, 'w') as f:
+        json.dump({"accounts": [{"name": acc.name, "cookies": acc.cookies, "session_id": acc.session_id}
+                                for acc in accounts]}, f)
+
+
+@pytest.fixture
+def scraper():
+    return InstagramIDScraper([account("a"), account("b")], [Proxy("10.0.0.1", 8080), Proxy("10.0.0.2", 8080)])
+
+
+def test_matched_accounts_keep_their_state(scraper):
+    original = scraper.accounts[0]
+    original.request_count = 7
+    changes = scraper.apply_config(accounts=[account("a"), account("c")])
+    assert changes["accounts_added"] == 1
+    assert changes["accounts_removed"] == 1
+    assert changes["accounts_updated"] == 0
+    assert [acc.name for acc in scraper.accounts] == ["a", "c"]
+    assert scraper.accounts[0] is original
+    assert original.request_count == 7
+
+
+def test_new_session_id_replaces_cookies_and_reactivates(scraper):
+    original = scraper.accounts[0]
+    original.is_active = False
+    original.error_count = 5
+    original.cookies["rur"] = "newer"
+    changes = scraper.apply_config(accounts=[account("a", "1%3Anew"), account("b")])
+    assert changes["accounts_updated"] == 1
+    assert scraper.accounts[0] is original
+    assert original.session_id == "1%3Anew"
+    assert original.cookies == {"sessionid": "1%3Anew", "csrftoken": "token"}
+    assert original.is_active and original.error_count == 0
+    # Same session ID: the running scraper's cookies are kept
+    assert scraper.accounts[1].cookies == {"sessionid": "1%3Aold", "csrftoken": "token"}
+
+
+def test_proxies_matched_by_host_and_port(scraper):
+    kept = scraper.proxies[0]
+    changes = scraper.apply_config(proxies=[Proxy("10.0.0.1", 8080, "user", "secret"), Proxy("10.0.0.3", 8080)])
+    assert changes == {"accounts_added": 0, "accounts_removed": 0, "accounts_updated": 0,
+                       "proxies_added": 1, "proxies_removed": 1, "proxies_updated": 1}
+    assert scraper.proxies[0] is kept
+    assert kept.username == "user"
+    assert [proxy.host for proxy in scraper.proxies] == ["10.0.0.1", "10.0.0.3"]
+
+
+def test_watcher_skips_invalid_and_empty_files(tmp_path, scraper):
+    path = tmp_path / "accounts.json"
+    write_accounts(path, [account("a"), account("b")])
+    watcher = ConfigWatcher(scraper, accounts_file=str(path))
+    assert watcher.check() is None
+
+    path.write_text('{"accounts": [')
+    assert watcher.check() is None
+    assert watcher.errors == 1
+    path.write_text('{"accounts": []}')
+    assert watcher.check() is None
+    assert [acc.name for acc in scraper.accounts] == ["a", "b"]
+
+    write_accounts(path, [account("a")])
+    assert watcher.check()["accounts_removed"] == 1
+
+
+def test_cookie_writeback_keeps_cookies_pasted_into_the_file(tmp_path, scraper):
+    path = tmp_path / "accounts.json"
+    write_accounts(path, scraper.accounts)
+    scraper.enable_cookie_writeback(str(path))
+    write_accounts(path, [account("a", "1%3Apasted"), account("b")])
+    for acc in scraper.accounts:
+        acc.cookies["rur"] = "refreshed"
+    scraper._cookies_dirty = True
+
+    assert scraper.persist_cookies(force=True)
+    saved = {acc.name: acc for acc in load_accounts_from_json(str(path))}
+    assert saved["a"].session_id == "1%3Apasted"
+    assert "rur" not in saved["a"].cookies
+    assert saved["b"].cookies["rur"] == "refreshed"
+
+
+def test_cookie_writeback_without_top_level_session_id(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps({"accounts": [{"name": "a", "cookies": {"sessionid": "S1", "csrftoken": "token"}}]}))
+    accounts = load_accounts_from_json(str(path))
+    assert accounts[0].session_id == "S1"
+    scraper = InstagramIDScraper(accounts)
+    scraper.enable_cookie_writeback(str(path))
+    accounts[0].cookies["rur"] = "refreshed"
+    scraper._cookies_dirty = True
+
+    assert scraper.persist_cookies(force=True)
+    assert load_accounts_from_json(str(path))[0].cookies["rur"] == "refreshed"
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from follower_sets import FollowerSetStore
+
+SIZES = {"big": 5000, "mid": 3000, "tiny": 20, "empty": 0}
+
+
+@pytest.fixture
+def sets():
+    rnd = random.Random(1)
+    return {name: {rnd.randrange(10000) for _ in range(size)} for name, size in SIZES.items()}
+
+
+@pytest.fixture
+def store(tmp_path, sets):
+    s = FollowerSetStore(str(tmp_path / "sets"))
+    for name, ids in sets.items():
+        s.add(name, ids)
+    return s
+
+
+@pytest.mark.parametrize("targets", [["big", "mid"], ["big", "tiny"], ["mid", "tiny", "big"], ["big", "empty"]])
+def test_set_operations_match_python_sets(store, sets, targets):
+    members = [sets[t] for t in targets]
+    assert list(store.intersection(targets)) == sorted(set.intersection(*members))
+    assert store.intersection_size(targets) == len(set.intersection(*members))
+    assert list(store.union(targets)) == sorted(set.union(*members))
+    assert store.union_size(targets) == len(set.union(*members))
+    assert list(store.exclusive(targets[0], targets[1:])) == sorted(members[0].difference(*members[1:]))
+
+
+def test_jaccard_and_overlap_matrix(store, sets):
+    big, mid = sets["big"], sets["mid"]
+    assert store.jaccard("big", "mid") == pytest.approx(len(big & mid) / len(big | mid))
+    assert store.jaccard("empty", "empty") == 0.0
+    rows = store.overlap_matrix(["big", "mid", "tiny"])
+    assert len(rows) == 3
+    assert [row["jaccard"] for row in rows] == sorted((row["jaccard"] for row in rows), reverse=True)
+
+
+def test_add_merges_by_default_and_replace_drops_unfollows(store, sets):
+    old = sorted(sets["tiny"])
+    result = store.add("tiny", [old[0], 10 ** 12, "not-an-id"])
+    assert result == {"added": 1, "removed": 0, "total": len(old) + 1}
+    stored = set(old) | {10 ** 12}
+    result = store.add("tiny", [old[0], 7], replace=True)
+    assert result == {"added": len({old[0], 7} - stored), "removed": len(stored - {old[0], 7}), "total": 2}
+    assert list(store.get("@Tiny")) == sorted({old[0], 7})
+
+
+def test_store_reopens_from_disk(tmp_path, store, sets):
+    reopened = FollowerSetStore(store.path)
+    assert reopened.targets() == sorted(SIZES)
+    assert reopened.info("mid")["count"] == len(sets["mid"])
+    assert list(reopened.get("big")) == sorted(sets["big"])
+
+
+def test_remove_and_invalid_names(store):
+    store.remove("tiny")
+    assert "tiny" not in store.targets()
+    with pytest.raises(KeyError):
+        store.get("tiny")
+    with pytest.raises(ValueError):
+        store.add("../escape", [1])
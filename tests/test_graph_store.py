@@ -0,0 +1,95 @@
+import pytest
+
+from graph_crawler import CRAWLING, DONE, LEAF, QUEUED, BloomFilter, GraphStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = GraphStore(str(tmp_path / "graph.db"))
+    yield s
+    s.close()
+
+
+def follower(user_id):
+    return {"user_id": str(user_id), "username": f"user{user_id}"}
+
+
+def node(store, user_id):
+    """(depth, state) of a stored node"""
+    return store._conn.execute("SELECT depth, state FROM nodes WHERE user_id = ?", (user_id,)).fetchone()
+
+
+def crawl(store, target_id, follower_ids, seen_ids=(), max_depth=2):
+    """Claim `target_id` and store one page of followers for it"""
+    claimed = store.claim()
+    assert claimed[0] == target_id
+    depth = claimed[2]
+    store.add_page(target_id, [follower(i) for i in follower_ids], depth + 1, max_depth,
+                   [i for i in follower_ids if i not in seen_ids], list(seen_ids), "cursor")
+    return claimed
+
+
+def test_claim_is_breadth_first(store):
+    store.add_seed(1, "seed", max_depth=2)
+    crawl(store, 1, [10, 11])
+    store.finish(1, DONE)
+    assert [store.claim()[0], store.claim()[0]] == [10, 11]
+    assert store.claim() is None
+
+
+def test_outermost_level_is_stored_as_leaves(store):
+    store.add_seed(1, "seed", max_depth=1)
+    crawl(store, 1, [10], max_depth=1)
+    assert node(store, 10) == (1, LEAF)
+
+
+def test_requeue_resumes_interrupted_nodes_from_their_cursor(store):
+    store.add_seed(1, "seed", max_depth=2)
+    crawl(store, 1, [10])
+    assert node(store, 1)[1] == CRAWLING
+    assert store.requeue(max_depth=2) == 1
+    assert store.claim() == (1, "seed", 0, "cursor", 1, 1)
+
+
+def test_requeue_queues_leaves_inside_a_larger_max_depth(store):
+    store.add_seed(1, "seed", max_depth=1)
+    crawl(store, 1, [10], max_depth=1)
+    store.finish(1, DONE)
+    assert store.requeue(max_depth=2) == 1
+    assert node(store, 10) == (1, QUEUED)
+
+
+def test_node_found_again_closer_to_a_seed_moves_up(store):
+    store.add_seed(1, "a", max_depth=2)
+    store.add_seed(2, "b", max_depth=2)
+    crawl(store, 1, [10])
+    store.finish(1, DONE)
+    crawl(store, 2, [])
+    store.finish(2, DONE)
+    crawl(store, 10, [20])
+    store.finish(10, DONE)
+    assert node(store, 20) == (2, LEAF)
+
+    store.add_seed(3, "c", max_depth=2)
+    crawl(store, 3, [20], seen_ids=[20])
+    assert node(store, 20) == (1, QUEUED)
+
+
+def test_new_seed_moves_its_stored_followers_up(store):
+    store.add_seed(1, "a", max_depth=2)
+    crawl(store, 1, [10])
+    store.finish(1, DONE)
+    crawl(store, 10, [20])
+    store.finish(10, DONE)
+
+    store.add_seed(10, "user10", max_depth=2)
+    assert node(store, 10) == (0, DONE)
+    assert node(store, 20) == (1, QUEUED)
+
+
+def test_bloom_filter_remembers_added_values():
+    bloom = BloomFilter(1000)
+    assert not bloom.add(42)
+    assert bloom.add(42)
+    assert 42 in bloom
+    assert bloom.count == 1
@@ -0,0 +1,66 @@
+from graphql_paginator import PageSizer
+
+
+def page(sizer, requested, returned, has_next_page=True):
+    sizer.record(requested, returned, has_next_page, seconds=returned * 0.01)
+
+
+def test_size_doubles_after_full_pages_up_to_maximum():
+    sizer = PageSizer(initial=50, maximum=150, grow_after=2)
+    page(sizer, 50, 50)
+    assert sizer.size == 50
+    page(sizer, 50, 50)
+    assert sizer.size == 100
+    page(sizer, 100, 100)
+    page(sizer, 100, 100)
+    assert sizer.size == 150
+
+
+def test_single_short_page_sets_no_cap():
+    sizer = PageSizer(initial=100)
+    page(sizer, 100, 60)
+    page(sizer, 100, 100)
+    assert sizer.cap is None
+    assert sizer.size == 100
+
+
+def test_repeated_short_page_sets_cap(clock):
+    sizer = PageSizer(initial=50, grow_after=1)
+    page(sizer, 50, 50)
+    assert sizer.size == 100
+    page(sizer, 100, 60)
+    assert sizer.cap is None
+    page(sizer, 100, 60)
+    assert sizer.cap == 60
+    assert sizer.size == 60
+    page(sizer, 60, 60)
+    assert sizer.size == 60
+
+
+def test_cap_expires_after_ttl(clock):
+    sizer = PageSizer(initial=100, grow_after=1, cap_ttl=600)
+    page(sizer, 100, 60)
+    page(sizer, 100, 60)
+    assert sizer.size == 60
+    clock[0] += 601
+    page(sizer, 60, 60)
+    assert sizer.cap is None
+    assert sizer.size == 120
+
+
+def test_last_page_teaches_nothing():
+    sizer = PageSizer(initial=100)
+    page(sizer, 100, 10, has_next_page=False)
+    page(sizer, 100, 10, has_next_page=False)
+    assert sizer.cap is None
+    assert sizer.size == 100
+
+
+def test_failed_page_halves_size_down_to_minimum():
+    sizer = PageSizer(initial=50, minimum=12)
+    assert sizer.failed(50, "HTTP 500")
+    assert sizer.size == 25
+    assert sizer.failed(25, "timeout")
+    assert sizer.size == 12
+    assert not sizer.failed(12, "timeout")
+    assert sizer.size == 12
@@ -0,0 +1,51 @@
+import pytest
+
+from simulator import SIMULATION_START, Policy, SimulationModel, VirtualClock, simulate
+
+
+def test_workers_wake_in_virtual_time_order():
+    clock = VirtualClock()
+    events = []
+
+    def worker(name, delays):
+        def run():
+            for delay in delays:
+                clock.sleep(delay)
+                events.append((clock.time() - SIMULATION_START, name))
+        return run
+
+    clock.run([worker("a", [5, 5]), worker("b", [3, 3, 3]), worker("c", [20])])
+    assert events == [(3, "b"), (5, "a"), (6, "b"), (9, "b"), (10, "a"), (20, "c")]
+
+
+def test_end_time_stops_sleeping_workers():
+    clock = VirtualClock(end=SIMULATION_START + 10)
+    wakes = []
+
+    def run():
+        while True:
+            clock.sleep(4)
+            wakes.append(clock.time() - SIMULATION_START)
+
+    clock.run([run, run])
+    assert wakes == [4, 4, 8, 8]
+    assert clock.time() == SIMULATION_START + 10
+
+
+def test_worker_errors_are_raised():
+    clock = VirtualClock()
+
+    def fail():
+        clock.sleep(1)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        clock.run([fail, lambda: clock.sleep(2)])
+
+
+def test_same_seed_gives_same_report():
+    policy = Policy("test", {"min_delay": 1, "max_delay": 3}, processes=2)
+    model = SimulationModel(accounts=4, proxies=2)
+    first = simulate(policy, model, hours=0.5, usernames=300, seed=7)
+    assert first["resolved"] + first["failed"] > 0
+    assert simulate(policy, model, hours=0.5, usernames=300, seed=7) == first
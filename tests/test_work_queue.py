@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from work_queue import SQLiteWorkQueue, TASK_FOLLOWERS, TASK_USER_ID, _extend_leases, run_worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield q
+    q.close()
+
+
+def test_enqueue_skips_duplicate_usernames(queue):
+    assert queue.enqueue(TASK_USER_ID, [{"username": "alice"}, {"username": "@Alice "}, {"username": "bob"}]) == 2
+
+
+def test_leased_task_is_not_leased_twice(queue, clock):
+    queue.enqueue(TASK_USER_ID, [{"username": "alice"}])
+    assert len(queue.lease("w1", lease_seconds=60)) == 1
+    assert queue.lease("w2", lease_seconds=60) == []
+
+
+def test_expired_lease_is_leased_again_and_old_owner_cannot_complete(queue, clock):
+    queue.enqueue(TASK_USER_ID, [{"username": "alice"}])
+    [task] = queue.lease("w1", lease_seconds=60)
+    clock[0] += 61
+    [again] = queue.lease("w2", lease_seconds=60)
+    assert again.task_id == task.task_id
+    assert again.attempts == 2
+    assert not queue.complete(task, "w1", "1")
+    assert queue.complete(again, "w2", "1")
+    assert queue.results() == {"alice": "1"}
+
+
+def test_task_fails_after_max_attempts(queue, clock):
+    queue.enqueue(TASK_USER_ID, [{"username": "alice"}])
+    for _ in range(2):
+        assert queue.lease("w1", lease_seconds=60)
+        clock[0] += 61
+    assert queue.lease("w1", lease_seconds=60) == []
+    assert queue.get_stats()["tasks"][TASK_USER_ID] == {"failed": 1}
+
+
+def test_extend_keeps_lease_alive(queue, clock):
+    queue.enqueue(TASK_USER_ID, [{"username": "alice"}])
+    [task] = queue.lease("w1", lease_seconds=60)
+    clock[0] += 50
+    assert queue.extend(task, "w1", lease_seconds=60)
+    clock[0] += 50
+    assert queue.lease("w2", lease_seconds=60) == []
+    assert queue.complete(task, "w1", "1")
+
+
+def test_extend_leases_drops_lost_tasks(queue, clock):
+    queue.enqueue(TASK_USER_ID, [{"username": "alice"}, {"username": "bob"}])
+    [first] = queue.lease("w1", lease_seconds=60)
+    clock[0] += 40
+    [second] = queue.lease("w1", lease_seconds=60)
+    clock[0] += 25
+    [stolen] = queue.lease("w2", lease_seconds=60)
+    assert stolen.task_id == first.task_id
+    held = _extend_leases(queue, [first, second], "w1", lease_seconds=60, margin=40)
+    assert held == [second]
+    assert second.lease_expires == time.time() + 60
+
+
+class SlowScraper:
+    """Follower tasks that take longer than the lease"""
+    min_delay = max_delay = 0
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.accounts = [type("Account", (), {"is_active": True})()]
+
+    def get_followers(self, username, max_followers=None):
+        time.sleep(self.seconds)
+        return [{"user_id": "1", "username": username}]
+
+
+def test_lease_is_kept_while_a_long_task_runs(queue):
+    queue.enqueue(TASK_FOLLOWERS, [{"username": "alice", "max_followers": None}])
+    completed = {}
+
+    def work(worker_id, start_after):
+        time.sleep(start_after)
+        completed[worker_id] = run_worker(SlowScraper(1.0), queue, worker_id, lease_seconds=0.4)
+
+    # w2 looks for work after w1's original lease would have expired
+    workers = [threading.Thread(target=work, args=("w1", 0)), threading.Thread(target=work, args=("w2", 0.6))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert completed == {"w1": 1, "w2": 0}
+    assert queue.get_stats()["tasks"][TASK_FOLLOWERS] == {"done": 1}
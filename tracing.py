@@ -0,0 +1,350 @@
+"""
+Per-phase request tracing and profiling
+Timed spans for the phases of a lookup, exported as JSON lines, plus profilers for whole batch runs
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed phase of a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "duration_ms", "attrs", "_perf_start")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attrs: Dict):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration_ms: Optional[float] = None
+        self.attrs = attrs
+        self._perf_start = time.perf_counter()
+
+    def set(self, **attrs):
+        """Add attributes to the span"""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": self.duration_ms,
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class Tracer:
+    """
+    Records timed spans for a sample of traces
+
+    A trace is one top-level operation (e.g. one username lookup), and its
+    spans are the phases inside it. The decision to sample is made once per
+    trace, so a sampled trace always has all of its spans. Spans opened
+    outside a sampled trace cost one thread-local lookup and record nothing.
+    Finished traces are appended to `path` as JSON lines (one span per line,
+    children before their parent). The most recent spans are kept in memory
+    for summary().
+    """
+
+    def __init__(self, sample_rate: float = 1.0, path: Optional[str] = None, keep: int = 10000):
+        """
+        Args:
+            sample_rate: Fraction of traces to record (0-1)
+            path: Optional JSON lines file the spans are appended to
+            keep: Number of recent spans kept in memory
+        """
+        self.sample_rate = sample_rate
+        self.path = path
+        self.spans: deque = deque(maxlen=keep)
+        self.traces = 0
+        self.sampled = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8') if path else None
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        """
+        Start a trace (or a child span, if this thread is already inside a trace)
+
+        Yields:
+            The root Span, or None if the trace is not sampled
+        """
+        if getattr(self._local, "stack", None) is not None:
+            with self.span(name, **attrs) as span:
+                yield span
+            return
+
+        with self._lock:
+            self.traces += 1
+            sampled = random.random() < self.sample_rate
+            if sampled:
+                self.sampled += 1
+        if not sampled:
+            # An empty stack marks an unsampled trace, so its spans are skipped
+            self._local.stack = []
+            try:
+                yield None
+            finally:
+                self._local.stack = None
+            return
+
+        root = Span(os.urandom(8).hex(), None, name, attrs)
+        finished: List[Span] = []
+        self._local.stack = [root]
+        self._local.finished = finished
+        try:
+            yield root
+        except BaseException as e:
+            root.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self._finish(root)
+            self._local.stack = None
+            self._local.finished = None
+            finished.append(root)
+            self._export(finished)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time one phase of the current trace
+
+        Yields:
+            The Span, or None if there is no sampled trace on this thread
+        """
+        stack = getattr(self._local, "stack", None)
+        if not stack:
+            yield None
+            return
+        span = Span(stack[0].trace_id, stack[-1].span_id, name, attrs)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self._finish(span)
+            stack.pop()
+            self._local.finished.append(span)
+
+    def propagate(self, func: Callable) -> Callable:
+        """
+        Wrap func so that, on another thread, its spans join the current trace
+
+        Spans that finish after the trace has been exported are dropped.
+        """
+        stack = getattr(self._local, "stack", None)
+        if not stack:
+            return func
+        parent, finished = stack[-1], self._local.finished
+
+        def run(*args, **kwargs):
+            self._local.stack = [parent]
+            self._local.finished = finished
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.stack = None
+                self._local.finished = None
+        return run
+
+    @staticmethod
+    def _finish(span: Span):
+        span.duration_ms = round((time.perf_counter() - span._perf_start) * 1000, 3)
+
+    def _export(self, spans: List[Span]):
+        records = [span.to_dict() for span in spans]
+        with self._lock:
+            self.spans.extend(records)
+            if self._file:
+                # One write per trace, so traces from several processes do not interleave
+                self._file.write(''.join(json.dumps(r, ensure_ascii=False, default=str) + '\n' for r in records))
+                self._file.flush()
+
+    def get_spans(self, name: Optional[str] = None) -> List[Dict]:
+        """Recent spans, optionally only those with the given name"""
+        with self._lock:
+            return [s for s in self.spans if name is None or s["name"] == name]
+
+    def summary(self) -> Dict:
+        """Count, mean, p50, p95 and max duration (ms) of the recent spans, per span name"""
+        by_name: Dict[str, List[float]] = {}
+        with self._lock:
+            for record in self.spans:
+                by_name.setdefault(record["name"], []).append(record["duration_ms"])
+            result = {"traces": self.traces, "sampled": self.sampled, "spans": {}}
+        for name, durations in by_name.items():
+            durations.sort()
+            result["spans"][name] = {
+                "count": len(durations),
+                "avg_ms": round(sum(durations) / len(durations), 3),
+                "p50_ms": durations[len(durations) // 2],
+                "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                "max_ms": durations[-1],
+            }
+        return result
+
+    def close(self):
+        """Close the export file"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for all threads of the process
+
+    A background thread snapshots every thread's Python stack each
+    `interval` seconds. Identical stacks are counted, and write() saves
+    them in the collapsed format ("outer;inner;leaf count"). That format is
+    read by flamegraph.pl, speedscope and inferno. The cost is independent of
+    how many calls the program makes, so it can stay on for long batches.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval: Seconds between stack samples
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start sampling"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: str):
+        """Write the collapsed stacks"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _collapse_cprofile(profile) -> Counter:
+    # cProfile only keeps caller -> callee edges, not whole stacks. Each
+    # function's own time is attributed to its callers in proportion to the
+    # time each of them spent in it, walking up to the roots.
+    import pstats
+    stats = pstats.Stats(profile).stats
+
+    def label(func):
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    stacks: Counter = Counter()
+
+    def walk(path, weight):
+        # Recursive calls are cut at the first repeat
+        callers = {caller: entry for caller, entry in stats[path[-1]][4].items() if caller not in path}
+        total = sum(entry[3] for entry in callers.values())
+        if total <= 0 or len(path) > 64:
+            stacks[';'.join(label(f) for f in reversed(path))] += weight
+            return
+        for caller, entry in callers.items():
+            walk(path + [caller], weight * entry[3] / total)
+
+    for func, (_, _, own_time, _, _) in stats.items():
+        if own_time > 0:
+            walk([func], own_time)
+    # Collapsed stacks count samples; use microseconds
+    return Counter({stack: int(weight * 1e6) for stack, weight in stacks.items() if weight * 1e6 >= 1})
+
+
+@contextmanager
+def profile_run(path: str, mode: str = "sampling", interval: float = 0.005):
+    """
+    Profile the enclosed block and write a report to path
+
+    mode "sampling" samples the stacks of all threads (SamplingProfiler).
+    mode "cprofile" traces every call of the calling thread with cProfile.
+    Both write collapsed stacks for flamegraph tools. cprofile additionally
+    writes the raw pstats data next to the report (path + ".pstats").
+
+    Args:
+        path: Report file
+        mode: "sampling" or "cprofile"
+        interval: Seconds between samples (sampling mode)
+    """
+    if mode not in ("sampling", "cprofile"):
+        raise ValueError(f"Unknown profile mode: {mode}")
+    if mode == "sampling":
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            profiler.write(path)
+            logger.info("Wrote %d stack sample(s) to %s", profiler.samples, path)
+        return
+
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path + ".pstats")
+        stacks = _collapse_cprofile(profile)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("Wrote cProfile report to %s (raw stats: %s.pstats)", path, path)
+
+
+def add_tracing_arguments(parser):
+    """Add --trace and --trace-sample to an argparse parser"""
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Append per-phase timing spans of each request to this JSON lines file")
+    parser.add_argument("--trace-sample", type=float, default=1.0,
+                        help="Fraction of lookups to trace (default: 1.0)")
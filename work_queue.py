@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Shared work queue with leases for multi-node scraping
+Workers lease usernames and follower jobs, so a fleet drains one backlog together
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from instagram_scraper import AccountsUnavailable
+from logging_setup import add_logging_arguments, configure_logging_from_args
+
+logger = logging.getLogger(__name__)
+
+TASK_USER_ID = "user_id"
+TASK_FOLLOWERS = "followers"
+
+
+@dataclass
+class Task:
+    """A unit of work leased from the queue"""
+    task_id: int
+    kind: str
+    payload: Dict
+    attempts: int
+    lease_expires: float
+
+
+class WorkQueue:
+    """
+    Interface for lease-based work queue backends
+
+    A task is leased by one worker at a time. If the worker does not
+    complete or release it before the lease expires, it becomes available
+    again. Results are written once: completing a task whose lease was lost
+    is rejected.
+    """
+
+    def enqueue(self, kind: str, payloads: List[Dict]) -> int:
+        """Add tasks, returns the number added (duplicates of pending work are skipped)"""
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, limit: int = 1, lease_seconds: float = 300) -> List[Task]:
+        """Lease up to `limit` available tasks for `worker_id`"""
+        raise NotImplementedError
+
+    def extend(self, task: Task, worker_id: str, lease_seconds: float = 300) -> bool:
+        """Extend the lease of a task that is still being worked on"""
+        raise NotImplementedError
+
+    def complete(self, task: Task, worker_id: str, result) -> bool:
+        """Store the result of a leased task; False if the lease was lost or the result already exists"""
+        raise NotImplementedError
+
+    def release(self, task: Task, worker_id: str, error: Optional[str] = None) -> bool:
+        """Give a task back to the queue (e.g. the worker ran out of accounts)"""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Make tasks with expired leases available again, returns how many"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict:
+        """Queue depth per status and throughput per worker"""
+        raise NotImplementedError
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue stored in a SQLite database
+
+    Suitable for workers on one machine or sharing a filesystem that supports
+    SQLite locking. Leasing uses an IMMEDIATE transaction so two workers
+    never lease the same task.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        """
+        Args:
+            path: Database path
+            max_attempts: Leases after which a task is marked failed instead of re-queued
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                task_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                completed_by TEXT,
+                completed_at REAL,
+                last_error TEXT,
+                UNIQUE (kind, task_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, task_id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                started_at REAL,
+                last_seen REAL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                released INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    @staticmethod
+    def _task_key(kind: str, payload: Dict) -> str:
+        if kind == TASK_USER_ID:
+            return payload["username"].lstrip('@').strip().lower()
+        return json.dumps(payload, sort_keys=True)
+
+    def _transaction(self, sql_fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = sql_fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, kind: str, payloads: List[Dict]) -> int:
+        rows = [(kind, self._task_key(kind, p), json.dumps(p)) for p in payloads]
+
+        def run(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, task_key, payload) VALUES (?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+        return self._transaction(run)
+
+    def lease(self, worker_id: str, limit: int = 1, lease_seconds: float = 300) -> List[Task]:
+        now = time.time()
+        expires = now + lease_seconds
+
+        def run(conn):
+            self._requeue_expired(conn, now)
+            rows = conn.execute(
+                "SELECT task_id, kind, payload, attempts FROM tasks WHERE status = 'pending' "
+                "ORDER BY attempts, task_id LIMIT ?", (limit,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE task_id = ?",
+                [(worker_id, expires, row[0]) for row in rows]
+            )
+            conn.execute(
+                "INSERT INTO workers (worker_id, started_at, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (worker_id, now, now)
+            )
+            return [Task(row[0], row[1], json.loads(row[2]), row[3] + 1, expires) for row in rows]
+
+        return self._transaction(run)
+
+    def extend(self, task: Task, worker_id: str, lease_seconds: float = 300) -> bool:
+        expires = time.time() + lease_seconds
+
+        def run(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE task_id = ? AND status = 'leased' AND lease_owner = ?",
+                (expires, task.task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+        extended = self._transaction(run)
+        if extended:
+            task.lease_expires = expires
+        return extended
+
+    def complete(self, task: Task, worker_id: str, result) -> bool:
+        now = time.time()
+
+        def run(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, completed_by = ?, completed_at = ?, "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE task_id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(result), worker_id, now, task.task_id, worker_id)
+            )
+            if cursor.rowcount == 1:
+                conn.execute(
+                    "UPDATE workers SET completed = completed + 1, last_seen = ? WHERE worker_id = ?",
+                    (now, worker_id)
+                )
+                return True
+            return False
+
+        return self._transaction(run)
+
+    def release(self, task: Task, worker_id: str, error: Optional[str] = None) -> bool:
+        def run(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_expires = NULL, last_error = ? "
+                "WHERE task_id = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, error, task.task_id, worker_id)
+            )
+            if cursor.rowcount == 1:
+                conn.execute("UPDATE workers SET released = released + 1 WHERE worker_id = ?", (worker_id,))
+                return True
+            return False
+
+        return self._transaction(run)
+
+    def _requeue_expired(self, conn, now: float) -> int:
+        cursor = conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_owner = NULL, lease_expires = NULL, last_error = 'lease expired' "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now)
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        return self._transaction(lambda conn: self._requeue_expired(conn, time.time()))
+
+    def results(self, kind: str = TASK_USER_ID) -> Dict[str, object]:
+        """Completed results for a task kind, keyed by task key (the username for ID lookups)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_key, result FROM tasks WHERE kind = ? AND status = 'done'", (kind,)
+            ).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def get_stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            status_rows = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status"
+            ).fetchall()
+            worker_rows = self._conn.execute(
+                "SELECT worker_id, started_at, last_seen, completed, released FROM workers ORDER BY worker_id"
+            ).fetchall()
+
+        tasks: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in status_rows:
+            tasks.setdefault(kind, {})[status] = count
+
+        workers = []
+        for worker_id, started_at, last_seen, completed, released in worker_rows:
+            elapsed = max((last_seen or now) - (started_at or now), 1e-9)
+            workers.append({
+                "worker_id": worker_id,
+                "completed": completed,
+                "released": released,
+                "items_per_minute": round(completed / elapsed * 60, 2) if completed else 0.0,
+                "last_seen_seconds_ago": round(now - last_seen, 1) if last_seen else None,
+            })
+        return {"tasks": tasks, "workers": workers}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _extend_leases(work_queue: WorkQueue, tasks: List[Task], worker_id: str, lease_seconds: float,
+                   margin: float) -> List[Task]:
+    """Extend the leases that expire within `margin` seconds; returns the tasks still held"""
+    held = []
+    for task in tasks:
+        if time.time() > task.lease_expires - margin and not work_queue.extend(task, worker_id, lease_seconds):
+            logger.warning(f"Lease on task {task.task_id} was lost, skipping it")
+            continue
+        held.append(task)
+    return held
+
+
+def _keep_leases(work_queue: WorkQueue, tasks: List[Task], worker_id: str, lease_seconds: float, margin: float,
+                 stop: threading.Event):
+    """Heartbeat run while a task is processed: extend the batch's leases before they expire until `stop` is set"""
+    while not stop.wait(margin / 2):
+        for task in tasks:
+            # A lease that could not be extended is dropped by _extend_leases before the next task
+            if time.time() > task.lease_expires - margin:
+                work_queue.extend(task, worker_id, lease_seconds)
+
+
+def run_worker(scraper, work_queue: WorkQueue, worker_id: Optional[str] = None, batch_size: int = 10,
+               lease_seconds: float = 300, idle_exit: bool = True, poll_interval: float = 10):
+    """
+    Lease tasks from a queue and process them with a scraper until the queue is drained
+
+    A username that could not be resolved is released so that another worker
+    (with other accounts and proxies) retries it, until the queue's
+    max_attempts is reached. If the scraper runs out of active accounts or
+    the worker is interrupted, the tasks it holds are released so other
+    workers pick them up.
+
+    Tasks are spaced by the scraper's random min_delay-max_delay delay. Before
+    each task, every lease of the batch that is close to expiring is extended,
+    and a heartbeat thread keeps extending them while the task runs, so a
+    follower crawl may take longer than lease_seconds. A task whose lease
+    could not be extended was given to another worker and is dropped from
+    the batch.
+
+    Args:
+        scraper: InstagramIDScraper (InstagramFollowersScraper for follower tasks)
+        work_queue: Queue backend
+        worker_id: Worker name (defaults to hostname-pid)
+        batch_size: Tasks leased at a time
+        lease_seconds: Lease duration
+        idle_exit: Stop when nothing is left to lease, instead of polling
+        poll_interval: Seconds to wait between polls when idle_exit is False
+
+    Returns:
+        Number of tasks completed by this worker
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    completed = 0
+    processed = 0
+    # Extend leases this long before they expire
+    margin = min(60.0, lease_seconds / 2)
+
+    while True:
+        tasks = work_queue.lease(worker_id, limit=batch_size, lease_seconds=lease_seconds)
+        if not tasks:
+            if idle_exit:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        pending = list(tasks)
+        try:
+            while pending:
+                if not any(acc.is_active for acc in scraper.accounts):
+                    logger.error(f"Worker {worker_id} has no active accounts left, releasing its tasks")
+                    for remaining in pending:
+                        work_queue.release(remaining, worker_id, error="no active accounts")
+                    return completed
+
+                if processed:
+                    time.sleep(random.uniform(scraper.min_delay, scraper.max_delay))
+                pending = _extend_leases(work_queue, pending, worker_id, lease_seconds, margin)
+                if not pending:
+                    break
+                task = pending[0]
+                processed += 1
+
+                stop_heartbeat = threading.Event()
+                heartbeat = threading.Thread(target=_keep_leases, name=f"lease-heartbeat-{worker_id}", daemon=True,
+                                             args=(work_queue, list(pending), worker_id, lease_seconds, margin,
+                                                   stop_heartbeat))
+                heartbeat.start()
+                try:
+                    if task.kind == TASK_USER_ID:
+                        result = scraper.get_user_id(task.payload["username"])
+                    elif task.kind == TASK_FOLLOWERS:
+                        result = scraper.get_followers(task.payload["username"],
+                                                       max_followers=task.payload.get("max_followers"))
+                    else:
+                        raise ValueError(f"unknown task kind {task.kind}")
+                except AccountsUnavailable as e:
+                    logger.error(f"Worker {worker_id} stopping, releasing its tasks: {e}")
+                    for remaining in pending:
+                        work_queue.release(remaining, worker_id, error=str(e))
+                    return completed
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} failed task {task.task_id}: {e}")
+                    work_queue.release(task, worker_id, error=str(e))
+                    pending.pop(0)
+                    continue
+                finally:
+                    stop_heartbeat.set()
+                    heartbeat.join()
+
+                if task.kind == TASK_USER_ID and result is None:
+                    work_queue.release(task, worker_id, error="not resolved")
+                elif work_queue.complete(task, worker_id, result):
+                    completed += 1
+                else:
+                    logger.warning(f"Lease on task {task.task_id} was lost, result discarded")
+                pending.pop(0)
+        except KeyboardInterrupt:
+            for remaining in pending:
+                work_queue.release(remaining, worker_id, error="worker interrupted")
+            raise
+
+    return completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared work queue for multi-node scraping")
+    parser.add_argument("--queue", default="work_queue.db", help="Queue database path (default: work_queue.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add usernames or follower jobs to the queue")
+    enqueue_parser.add_argument("usernames", nargs="*", help="Usernames to add")
+    enqueue_parser.add_argument("--file", help="File with one username per line")
+    enqueue_parser.add_argument("--followers", action="store_true", help="Queue follower crawls instead of ID lookups")
+    enqueue_parser.add_argument("--max", type=int, help="Maximum followers per follower job")
+
+    work_parser = subparsers.add_parser("work", help="Drain the queue with this machine's accounts")
+    work_parser.add_argument("--accounts-file", default="accounts.json", help="Path to accounts JSON file")
+    work_parser.add_argument("--proxies-file", help="Path to proxies JSON file (optional)")
+    work_parser.add_argument("--worker-id", help="Worker name (default: hostname-pid)")
+    work_parser.add_argument("--batch-size", type=int, default=10, help="Tasks leased at a time")
+    work_parser.add_argument("--lease-seconds", type=float, default=300, help="Lease duration in seconds")
+    work_parser.add_argument("--wait", action="store_true", help="Keep polling for new work instead of exiting")
+
+    subparsers.add_parser("status", help="Show queue depth and per-worker throughput")
+
+    export_parser = subparsers.add_parser("export", help="Write completed ID results as JSON")
+    export_parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+    work_queue = SQLiteWorkQueue(args.queue)
+
+    if args.command == "enqueue":
+        usernames = list(args.usernames)
+        if args.file:
+            with open(args.file, 'r') as f:
+                usernames.extend(line.strip() for line in f if line.strip())
+        usernames = [u.lstrip('@').strip() for u in usernames]
+        if args.followers:
+            added = work_queue.enqueue(TASK_FOLLOWERS, [{"username": u, "max_followers": args.max} for u in usernames])
+        else:
+            added = work_queue.enqueue(TASK_USER_ID, [{"username": u} for u in usernames])
+        print(f"Queued {added} new task(s) ({len(usernames) - added} already queued)")
+
+    elif args.command == "work":
+        from config_loader import load_accounts_from_json, load_proxies_from_json
+        from instagram_followers_scraper import InstagramFollowersScraper
+
+        try:
+            accounts = load_accounts_from_json(args.accounts_file)
+            proxies = load_proxies_from_json(args.proxies_file) if args.proxies_file else None
+        except Exception as e:
+            print(f"Error loading configuration: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        scraper = InstagramFollowersScraper(accounts=accounts, proxies=proxies)
+        try:
+            completed = run_worker(scraper, work_queue, worker_id=args.worker_id, batch_size=args.batch_size,
+                                   lease_seconds=args.lease_seconds, idle_exit=not args.wait)
+        except KeyboardInterrupt:
+            print("\nInterrupted - unfinished tasks were released back to the queue")
+            completed = None
+        if completed is not None:
+            print(f"Worker finished: {completed} task(s) completed")
+
+    elif args.command == "status":
+        print(json.dumps(work_queue.get_stats(), indent=2))
+
+    elif args.command == "export":
+        results = work_queue.results(TASK_USER_ID)
+        output_json = json.dumps({"results": results}, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output_json)
+            print(f"Results saved to {args.output}")
+        else:
+            print(output_json)
+
+    work_queue.close()
+
+
+if __name__ == "__main__":
+    main()